@@ -1,126 +1,66 @@
 import streamlit as st
-import matplotlib.pyplot as plt # Keep for future stats visualizations
+import datetime
 import json
 import os
-import hashlib
-import pandas as pd
 import time
-import math # Needed for ceiling function in set/leg logic
+from urllib.parse import urlsplit
+from dart_engine import (
+    ALL_POSSIBLE_DOUBLES, STANDARD_START_SCORES, MAX_START_SCORE,
+    CHECK_IN_MODES, CHECK_OUT_MODES, is_valid_start_score, new_opened_flags,
+    calculate_turn_total, parse_score_input, score_turn, apply_turn, get_checkout_suggestion, parse_visit, split_visit,
+)
+from cricket_engine import (
+    CRICKET_TARGETS, CRICKET_VARIANTS, MARK_SYMBOLS, new_cricket_state, copy_state,
+    marks_on, marks_per_round,
+)
+from cricket_engine import apply_turn as apply_cricket_turn, turn_wins as cricket_turn_wins
+from ratings import update_ratings, ratings_stale
+from tournament import FORMATS as TOURNAMENT_FORMATS, create_tournament, record_result, standings_table, board_utilization
+from broadcast import start_feed_thread
+from leaderboard import METRICS as LEADERBOARD_METRICS, Leaderboards
+from replay import (
+    is_replayable, build_checkpoints, state_at, suggestion_at,
+    update_checkpoint, drop_stale_checkpoint, resume_state, resumable_games,
+)
+from doubles import checkout_table_rows
+from jobs import ACTIVE as ACTIVE_JOB_STATES, JOB_TYPES, JobManager
+from practice import DRILLS, LADDER_ATTEMPTS, LADDER_DARTS, add_session, append_dart, apply_dart, current_target, delete_stream, hit_rate, new_drill, stream_path
+from shared_tables import attach as attach_checkout_tables, refresh as refresh_checkout_tables
+from indexes import finish_game
+from head_to_head import head_to_head_record, head_to_head_stale, three_dart_average, update_head_to_head
+from trends import RESOLUTIONS as TREND_RESOLUTIONS, TREND_METRICS, chart_points, trends_stale, update_trends
+from dart_log import SEGMENT_COUNT, record_darts, remove_darts, recent_codes, delete_log, histogram_of, segment_code, segment_name, neighbours, draw_heatmap
+from user_store import LazyUsers, hash_password, apply_turn_stats, add_double_attempts, checkout_log_entry, player_profiles
+from i18n import (
+    LANGUAGE_NAMES, available_languages, compile_catalog,
+    find_used_keys, find_missing_translations,
+)
 
 # --- Language Translation Setup ---
+catalog = {} # Flat key -> text table for the session language, set after session init
 
-# Define translation dictionary for app text
-translations = {
-    "welcome": {"de": "Willkommen bei Darts Counter", "en": "Welcome to Darts Counter"},
-    "login": {"de": "Anmelden", "en": "Login"},
-    "register": {"de": "Registrieren", "en": "Register"},
-    "username": {"de": "Benutzername", "en": "Username"},
-    "password": {"de": "Passwort", "en": "Password"},
-    "start_game": {"de": "Spiel starten", "en": "Start Game"},
-    "logout": {"de": "Abmelden", "en": "Logout"},
-    "players": {"de": "Spieler", "en": "Players"},
-    "score": {"de": "Punktestand", "en": "Score"},
-    "statistics": {"de": "Statistiken", "en": "Statistics"},
-    "settings": {"de": "Einstellungen", "en": "Settings"},
-    "game": {"de": "Spiel", "en": "Game"},
-    "homepage": {"de": "Startseite", "en": "Homepage"},
-    "select_language": {"de": "Sprache wählen", "en": "Select Language"},
-    "selected_language": {"de": "Gewählte Sprache:", "en": "Selected Language:"},
-    "players_selected": {"de": "Spieler ausgewählt", "en": "Players selected"},
-    "start_game_button": {"de": "🎯 Spiel starten", "en": "🎯 Start Game"},
-    "configure_game": {"de": "Spiel konfigurieren,", "en": "Configure game,"},
-
-    # Game Page
-    "game_on": {"de": "Spiel läuft", "en": "Game On"},
-    "set": {"de": "Satz", "en": "Set"},
-    "leg": {"de": "Leg"},
-    "mode": {"de": "Modus", "en": "Mode"},
-    "rule": {"de": "Regel", "en": "Rule"},
-    "enter_score_for": {"de": "Punkte eingeben für:", "en": "Enter score for:"},
-    "dart": {"de": "Dart", "en": "Dart"},
-    "double": {"de": "Doppel", "en": "Double"},
-    "triple": {"de": "Triple", "en": "Triple"},
-    "back": {"de": "Zurück", "en": "Back"},
-    "undo": {"de": "Rückgängig", "en": "Undo"},
-    "miss": {"de": "Fehler", "en": "Miss"},
-    "remove_last": {"de": "Letzten entfernen", "en": "Remove last"},
-    "set_double": {"de": "Doppel setzen", "en": "Set Double"},
-    "set_triple": {"de": "Triple setzen", "en": "Set Triple"},
-    "undo_last_turn": {"de": "Letzten Wurf rückgängig", "en": "Undo last turn"},
-    "game_over_start_new": {"de": "Spiel vorbei. Neues Spiel starten.", "en": "Game over. Start new game."},
-    "invalid_page_state": {"de": "Ungültiger Seitenstatus.", "en": "Invalid page state."},
-
-    # Statistics Page
-    "select_statistic": {"de": "Statistik auswählen:", "en": "Select Statistic:"},
-    "stats_for_account": {"de": "Statistiken für Konto:", "en": "Stats for account:"},
-    "no_data_selected_stat": {"de": "Keine Daten für gewählte Statistik.", "en": "No data for selected statistic."},
-    "visualizations_placeholder": {"de": "Visualisierungen (Platzhalter)", "en": "Visualizations (Placeholder)"},
-    "charts_coming_soon": {"de": "Diagramme folgen bald.", "en": "Charts coming soon."},
-
-    # Settings Page
-    "settings_title": {"de": "⚙️ Einstellungen & Spieler-Verwaltung", "en": "⚙️ Settings & Player Management"},
-    "manage_players_prefs": {"de": "Verwalte Spieler und Einstellungen für Konto:", "en": "Manage players and preferences for account:"},
-    "set_preferences": {"de": "🎯 Einstellungen festlegen", "en": "🎯 Set Preferences"},
-    "delete_player": {"de": "🗑️ Spieler löschen", "en": "🗑️ Delete Player"},
-    "set_preferred_double_outs": {"de": "Bevorzugte Doppel für Checkouts festlegen", "en": "Set Preferred Double Outs"},
-    "select_player_edit_prefs": {"de": "Wähle Spieler für Einstellungen:", "en": "Select Player to Edit Preferences:"},
-    "save_preferences": {"de": "Einstellungen speichern", "en": "Save Preferences"},
-    "delete_player_data": {"de": "Spielerdaten löschen", "en": "Delete Player Data"},
-    "delete_warning": {"de": "⚠️ Löschen entfernt alle Statistiken und Checkout-Logs dauerhaft!", "en": "⚠️ Deleting removes all stats and checkout logs permanently!"},
-    "no_players_added": {"de": "Noch keine Spieler hinzugefügt.", "en": "No players added yet."},
-    "player_deleted_success": {"de": "Spieler erfolgreich gelöscht.", "en": "Player deleted successfully."},
-    "confirm_deletion": {"de": "Bestätigung für Löschen von", "en": "Confirm Deletion of"},
-    "yes_delete": {"de": "✔️ Ja, Spieler löschen", "en": "✔️ Yes, DELETE Player Data"},
-    "cancel": {"de": "❌ Abbrechen", "en": "❌ Cancel"},
-    "add_players_homepage": {"de": "Spieler auf der Startseite hinzufügen.", "en": "Add players on the Homepage."},
-    "no_players_delete": {"de": "Keine Spieler zum Löschen vorhanden.", "en": "No players to delete."},
-    "language_settings": {"de": "🌐 Spracheinstellungen", "en": "🌐 Language Settings"},
-}
-
-# Define helper function to fetch translation based on session state
 def t(key):
     """Returns the translation for a given key based on selected language."""
-    lang = st.session_state.get("language", "en")  # Default to English
-    return translations.get(key, {}).get(lang, key)  # Fallback to key if missing
+    return catalog.get(key, key)  # Fallback to key if missing
 
 # --- Configuration ---
 USER_DATA_FILE = "user_data.json"
+SPECTATOR_PORT = 8766 # Live feed for spectators, see broadcast.py
+CHECKOUT_TABLES_FILE = "checkout_tables.bin" # See shared_tables.py
+HEATMAP_RECENT_DARTS = 1000 # "Last darts" range of the heatmap
+JOBS_SHOWN = 3 # Recent background jobs listed in the sidebar
+JOBS_REFRESH_SECONDS = 2
+TREND_PERIODS = {"all_time": None, "last_year": 365, "last_90_days": 90} # Days shown in the form trend chart
+CHECKOUT_BED_NAMES = {"S": "Single", "D": "Double", "T": "Treble"} # For the invalid checkout message
 st.set_page_config(page_title="Darts Counter", page_icon="🎯", layout="wide")
 
-# --- Default Preferred Doubles & Constants ---
-DEFAULT_PREFERRED_DOUBLES = {"D18", "D4", "D13", "D6", "D10", "D15", "D2", "D17", "D3", "D20", "D16", "D8"}
-ALL_POSSIBLE_DOUBLES = sorted([f"D{i}" for i in range(1, 21)] + ["D25"], key=lambda x: int(x[1:]))
-BOGIE_NUMBERS_SET = {169, 168, 166, 165, 163, 162, 159}
-
 # --- User Authentication & Data Handling ---
 def load_users():
-    """Loads user data from the JSON file."""
+    """Loads user data lazily: accounts are parsed from the JSON file only when accessed."""
     if os.path.exists(USER_DATA_FILE):
         try:
-            with open(USER_DATA_FILE, "r") as f:
-                users_data = json.load(f)
-            # Ensure essential keys exist for each user and player upon loading
-            for username, data in users_data.items():
-                data.setdefault("password", "")
-                player_stats_dict = data.setdefault("player_stats", {})
-                data.setdefault("games", [])
-                data.setdefault("checkout_log", [])
-                # Ensure stats and preferences dict has default keys for players
-                for player, stats in player_stats_dict.items():
-                     stats.setdefault("games_played", 0)
-                     stats.setdefault("games_won", 0)
-                     stats.setdefault("legs_won", 0)
-                     stats.setdefault("sets_won", 0)
-                     stats.setdefault("total_score", 0)
-                     stats.setdefault("highest_score", 0)
-                     stats.setdefault("total_turns", 0)
-                     stats.setdefault("num_busts", 0)
-                     stats.setdefault("darts_thrown", 0)
-                     stats.setdefault("preferred_doubles", []) # Ensure exists per player
-            return users_data
-        except json.JSONDecodeError:
-            st.error(f"Error reading {USER_DATA_FILE}. Starting fresh.")
-            return {}
+            # Only an offset index is built here; LazyUsers applies the default keys per account on access
+            return LazyUsers(USER_DATA_FILE)
         except Exception as e:
             st.error(f"Error loading user data: {e}")
             return {}
@@ -129,14 +69,147 @@ def load_users():
 def save_users(users_data):
     """Saves the current user data dictionary to the JSON file."""
     try:
-        with open(USER_DATA_FILE, "w") as f:
-            json.dump(users_data, f, indent=4)
+        if isinstance(users_data, LazyUsers):
+            users_data.save() # Untouched accounts are copied without parsing
+        else:
+            with open(USER_DATA_FILE, "w") as f:
+                json.dump(users_data, f, indent=4)
     except Exception as e:
         st.error(f"Failed to save user data: {e}")
 
-def hash_password(password):
-    """Hashes the password using SHA256."""
-    return hashlib.sha256(password.encode()).hexdigest()
+def find_game(users_data, username, game_id):
+    """Returns the recorded game with the given id for an account, or None."""
+    for game in reversed(users_data.get(username, {}).get("games", [])):
+        if isinstance(game, dict) and game.get("id") == game_id:
+            return game
+    return None
+
+def start_x01_game(players_to_start, settings=None, tournament_ref=None):
+    """Initializes the X01 game state in the session, records the game and switches to the Game page.
+
+    ``settings`` (e.g. from a tournament) overrides the Homepage choices; ``tournament_ref``
+    links the game to a tournament match so the result is reported when it ends.
+    """
+    for key, value in (settings or {}).items():
+        st.session_state[key] = value
+    if "starting_score" in (settings or {}):
+        st.session_state.game_mode = settings["starting_score"]
+    st.session_state.players_selected_for_game = list(players_to_start)
+    st.session_state.current_page = "Game"
+    st.session_state.starting_score = st.session_state.game_mode
+    st.session_state.player_scores = {p: st.session_state.starting_score for p in players_to_start}
+    st.session_state.player_legs_won = {p: 0 for p in players_to_start}
+    st.session_state.player_sets_won = {p: 0 for p in players_to_start}
+    st.session_state.player_darts_thrown = {p: 0 for p in players_to_start}
+    st.session_state.player_turn_history = {p: [] for p in players_to_start}
+    st.session_state.player_last_turn_scores = {p: [] for p in players_to_start}
+    st.session_state.player_opened = new_opened_flags(players_to_start, st.session_state.check_in_mode)
+    st.session_state.current_player_index = 0
+    st.session_state.current_turn_shots = []
+    st.session_state.current_leg = 1
+    st.session_state.current_set = 1
+    st.session_state.game_over = False
+    st.session_state.leg_over = False
+    st.session_state.set_over = False
+    st.session_state.winner = None
+    st.session_state.message = ""
+    st.session_state.pending_modifier = None
+    st.session_state.state_before_last_turn = None
+    st.session_state.tournament_ref = dict(tournament_ref) if tournament_ref else None
+    st.session_state.player_profiles = player_profiles(users[st.session_state.username], players_to_start)
+    # Record the match so it can be replayed turn by turn later
+    game_record = {
+        "id": str(int(time.time() * 1000)),
+        "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "mode": "X01",
+        "players": list(players_to_start),
+        "settings": {
+            "starting_score": st.session_state.starting_score,
+            "check_out_mode": st.session_state.check_out_mode,
+            "check_in_mode": st.session_state.check_in_mode,
+            "set_leg_rule": st.session_state.set_leg_rule,
+            "sets_to_play": st.session_state.sets_to_play,
+            "legs_to_play": st.session_state.legs_to_play,
+        },
+        "turns": [],
+        "finished": False,
+        "winner": None,
+    }
+    if tournament_ref:
+        game_record["tournament"] = dict(tournament_ref)
+    users[st.session_state.username].setdefault("games", []).append(game_record)
+    save_users(users)
+    st.session_state.current_game_id = game_record["id"]
+
+def resume_game(game):
+    """Restores an unfinished recorded X01 or Cricket game into the session and switches to the Game page."""
+    if game.get("mode") == "Cricket":
+        cricket_state = resume_state(game)
+        st.session_state.game_mode = "Cricket"
+        st.session_state.cricket = cricket_state
+        st.session_state.players_selected_for_game = list(cricket_state["players"])
+        st.session_state.current_player_index = cricket_state["current_player_index"]
+        st.session_state.current_turn_shots = []
+        st.session_state.game_over = False
+        st.session_state.winner = None
+    else:
+        for key, value in resume_state(game).items():
+            st.session_state[key] = value
+        st.session_state.game_mode = st.session_state.starting_score
+    st.session_state.current_page = "Game"
+    st.session_state.message = ""
+    st.session_state.pending_modifier = None
+    st.session_state.state_before_last_turn = None # The undo snapshot is not part of the record
+    st.session_state.tournament_ref = dict(game["tournament"]) if game.get("tournament") else None
+    st.session_state.current_game_id = game["id"]
+    st.session_state.player_profiles = player_profiles(users[st.session_state.username], game["players"])
+
+def get_player_profile(player):
+    """Scoreboard profile of a player in the running match; rebuilt only after Settings saved a player."""
+    if st.session_state.get("player_profiles") is None:
+        st.session_state.player_profiles = player_profiles(users.get(st.session_state.username, {}),
+                                                           st.session_state.players_selected_for_game)
+    profiles = st.session_state.player_profiles
+    if player not in profiles: # Not part of the match the profiles were built for
+        profiles.update(player_profiles(users.get(st.session_state.username, {}), [player]))
+    return profiles[player]
+
+def find_tournament(users_data, username, tournament_id):
+    """Returns the tournament with the given id for an account, or None."""
+    for tournament in users_data.get(username, {}).get("tournaments", []):
+        if tournament.get("id") == tournament_id:
+            return tournament
+    return None
+
+def suggestion_html(suggestion):
+    """Formats a checkout suggestion from dart_engine for the scoreboard."""
+    if suggestion["kind"] == "out" and suggestion["darts"] == 1:
+        return f"<p style='text-align: center; font-size: 0.9em; color: #008000; font-weight: bold; margin-top: 5px;'>🎯 **Out: {suggestion['text']}** (1D)</p>"
+    if suggestion["kind"] == "out":
+        return f"<p style='text-align: center; font-size: 0.9em; color: green; margin-top: 5px;'>🎯 **Out: {suggestion['text']}** ({suggestion['darts']}D)</p>"
+    if suggestion["kind"] == "setup":
+        return f"<p style='text-align: center; font-size: 0.9em; color: orange; margin-top: 5px;'>🔧 **{suggestion['text']}**</p>"
+    return "<p style='text-align: center; font-size: 0.8em; color: red; margin-top: 5px;'>No checkout</p>"
+
+# --- Keypad (Game and Practice pages) ---
+def keypad_shot(num_val, modifier):
+    """Dart notation for a keypad press with the pending D/T modifier. Returns (shot, warning); shot is None if invalid."""
+    shot = f"{modifier or ''}{num_val}"
+    if not parse_score_input(shot)[3]:
+        return None, "T only 1-20" if modifier == "T" else "D only 1-20, 25"
+    return shot, None
+
+def render_number_pad(on_dart, key_prefix, disabled=False):
+    """The 1-20, bull and miss buttons; a press calls ``on_dart(number)`` before the rerun."""
+    keypad_numbers = list(range(1, 21)) + [25, 0]
+    num_cols = 4
+    rows_of_numbers = [keypad_numbers[i:i + num_cols] for i in range(0, len(keypad_numbers), num_cols)]
+    for row in rows_of_numbers:
+        cols = st.columns(num_cols)
+        for i, num_val in enumerate(row):
+            button_text = t('miss') if num_val == 0 else str(num_val)
+            cols[i].button(button_text, key=f"{key_prefix}{num_val}", use_container_width=True, disabled=disabled,
+                           on_click=on_dart, args=(num_val,))
 
 # --- Load Users ---
 users = load_users()
@@ -174,6 +247,113 @@ if "app_initialized" not in st.session_state:
     st.session_state.state_before_last_turn = None
     st.session_state.confirm_delete_player = None
     st.session_state.player_to_edit_prefs = None # Initialize if needed
+    st.session_state.current_game_id = None # Recorded game in users[...]["games"]
+    st.session_state.player_profiles = None # Per-match scoreboard profiles, see get_player_profile
+
+# --- Translation Catalog ---
+@st.cache_resource
+def get_catalog(lang):
+    """Compiles the flat translation table for a language once per server process."""
+    return compile_catalog(lang)
+
+@st.cache_resource
+def check_translations():
+    """Reports keys used in this script that have no text in some language (once per process)."""
+    missing = find_missing_translations(find_used_keys(__file__), available_languages())
+    for lang, keys in missing.items():
+        print(f"Missing '{lang}' translations: {', '.join(keys)}")
+    return missing
+
+check_translations()
+
+# --- Shared Checkout Tables ---
+@st.cache_resource
+def get_checkout_tables():
+    """Maps the checkout table file shared by all server processes (built on first start)."""
+    return attach_checkout_tables(CHECKOUT_TABLES_FILE)
+
+refresh_checkout_tables(get_checkout_tables()) # A stat per rerun; picks up a rebuilt file
+
+# --- Leaderboards ---
+@st.cache_resource
+def get_leaderboards():
+    """Builds the leaderboards once per server process; turns keep them current afterwards."""
+    return Leaderboards().load(load_users())
+
+def update_leaderboards(player_names):
+    """Re-ranks players of the session account after their stats changed."""
+    account_stats = users.get(st.session_state.username, {}).get("player_stats", {})
+    boards = get_leaderboards()
+    for player in player_names:
+        boards.update_player(st.session_state.username, player, account_stats.get(player))
+
+# --- Spectator Feed ---
+@st.cache_resource
+def get_broadcast_hub():
+    """Starts the spectator feed once per server process. None if the port is taken."""
+    try:
+        return start_feed_thread(port=SPECTATOR_PORT)
+    except OSError as e:
+        print(f"Spectator feed not started: {e}")
+        return None
+
+def spectator_url(game_id):
+    """Feed link on the host the browser reached the app through, so it works from other devices too."""
+    host = urlsplit("//" + (st.context.headers.get("Host") or "")).hostname or "localhost"
+    if ":" in host: # IPv6 address
+        host = f"[{host}]"
+    return f"http://{host}:{SPECTATOR_PORT}/spectate/{game_id}"
+
+# --- Background Jobs ---
+@st.cache_resource
+def get_job_manager():
+    """Starts the job pools once per server process; jobs a restart interrupted are queued again."""
+    return JobManager(USER_DATA_FILE)
+
+def account_jobs(active_only=False):
+    jobs = get_job_manager().jobs(st.session_state.username)
+    return [j for j in jobs if j["status"] in ACTIVE_JOB_STATES] if active_only else jobs
+
+def submit_account_job(job_type, **params):
+    """Queues a job for the session's account unless the same one is already waiting or running."""
+    for job in account_jobs(active_only=True):
+        if job["type"] == job_type and not job.get("cancel_requested"):
+            return job["id"]
+    return get_job_manager().submit(job_type, dict(params, account=st.session_state.username), st.session_state.username)
+
+def render_jobs():
+    """Recent jobs of the account with progress and a cancel button. Returns whether any is still active."""
+    jobs = account_jobs()[:JOBS_SHOWN]
+    if jobs:
+        st.markdown(f"**{t('jobs')}**")
+    for job in jobs:
+        done, total = job["progress"]
+        label = f"{t(job['type'])}: {t('job_' + job['status'])}"
+        if job["status"] in ACTIVE_JOB_STATES:
+            st.progress(done / total if total else 0.0, text=f"{label} {job['message']}")
+            if not job.get("cancel_requested") and st.button(t("cancel"), key=f"cancel_job_{job['id']}"):
+                get_job_manager().cancel(job["id"])
+        else:
+            st.caption(f"{label} {job['message']}")
+    return any(job["status"] in ACTIVE_JOB_STATES for job in jobs)
+
+@st.fragment(run_every=JOBS_REFRESH_SECONDS)
+def live_jobs_panel():
+    """Polls the job file while jobs run; only this panel reruns, a match on the page is not touched."""
+    if not render_jobs():
+        st.rerun() # Finished: one full rerun shows the results and stops polling
+
+def publish_spectator_state():
+    """Sends the X01 scoreboard to anyone watching the current game."""
+    hub = get_broadcast_hub()
+    game_id = st.session_state.get("current_game_id")
+    if hub is not None and game_id and st.session_state.get("game_mode") != "Cricket":
+        hub.publish(game_id, st.session_state)
+# Resolve the catalog once per session (and again only when the language changes)
+if st.session_state.get("catalog_language") != st.session_state.get("language", "en"):
+    st.session_state.catalog_language = st.session_state.get("language", "en")
+    st.session_state.catalog = get_catalog(st.session_state.catalog_language)
+catalog = st.session_state.catalog
 
 # --- Login / Register Page ---
 if not st.session_state.logged_in:
@@ -224,48 +404,63 @@ if not st.session_state.logged_in:
 # --- Sidebar ---
 st.sidebar.markdown(f"👋 **{st.session_state.username}**!")
 st.sidebar.markdown("---")
-page_options = [t("homepage"), t("statistics"), t("game"), t("settings")]
-can_navigate_to_game = st.session_state.current_page == "Game" and not st.session_state.game_over
-try:
-    current_page_index = page_options.index(st.session_state.current_page)
-except ValueError:
-    current_page_index = 0
+PAGE_IDS = ["Homepage", "Statistics", "Game", "Practice", "Tournament", "Settings"] # Stable ids, labels come from t()
+if st.session_state.current_page not in PAGE_IDS:
     st.session_state.current_page = "Homepage"
 # Disable radio navigation while game is active and not over
 nav_disabled = st.session_state.current_page == "Game" and not st.session_state.game_over
-chosen_page = st.sidebar.radio(
-    t("navigation"),
-    page_options,
-    index=current_page_index,
-    key="nav_radio",
-    disabled=nav_disabled
-)
 
-# Handle navigation selection
-if chosen_page != st.session_state.current_page:
-    # Allow navigation away only if not in an active game
-    if not nav_disabled:
-        st.session_state.current_page = chosen_page
-        st.rerun()
+def handle_navigation():
+    """Switches page from the sidebar radio; the Game page is only reachable through Start Game."""
+    target_page = st.session_state.nav_radio
+    if target_page == "Game" and st.session_state.current_page != "Game":
+        st.session_state.nav_warning = "start_game_homepage"
     else:
-        # If disabled, reset the radio button visually if possible
-        # (May still show selection briefly due to Streamlit limitations)
-        st.sidebar.warning(t("finish_quit_game")
+        st.session_state.current_page = target_page
+
+# Keep the radio in sync when the page is changed by buttons (Start Game, Quit, ...)
+if st.session_state.get("nav_radio") != st.session_state.current_page:
+    st.session_state.nav_radio = st.session_state.current_page
+st.sidebar.radio(
+    t("navigation"),
+    PAGE_IDS,
+    format_func=lambda page_id: t(page_id.lower()),
+    key="nav_radio",
+    disabled=nav_disabled,
+    on_change=handle_navigation,
 )
 # Handle direct navigation attempt to Game page when not started
-elif chosen_page == "Game" and st.session_state.current_page != "Game":
-     st.sidebar.warning(t("start_game_homepage"))
-     time.sleep(1)
+if st.session_state.get("nav_warning"):
+    st.sidebar.warning(t(st.session_state.nav_warning))
+    st.session_state.nav_warning = None
 
 
 if st.session_state.current_page == "Game" and not st.session_state.game_over:
     st.sidebar.warning("🎯 Game in progress!")
+    if get_broadcast_hub() is not None and st.session_state.get("current_game_id") and st.session_state.game_mode != "Cricket":
+        st.sidebar.markdown(f"📺 [{t('spectator_link')}]({spectator_url(st.session_state.current_game_id)})")
     if st.sidebar.button("⚠️ Quit Current Game"):
         st.session_state.current_page = "Homepage"
         st.session_state.game_over = True
         st.session_state.current_turn_shots = []
         st.session_state.pending_modifier = None
+        quit_game = find_game(users, st.session_state.username, st.session_state.get("current_game_id"))
+        if quit_game is not None:
+            quit_game["abandoned"] = True # Not offered for resuming
+            save_users(users)
+        # A quit tournament match goes back to its board so it can be started again
+        tournament_ref = st.session_state.get("tournament_ref")
+        tournament = find_tournament(users, st.session_state.username, tournament_ref["id"]) if tournament_ref else None
+        if tournament is not None and tournament["matches"][tournament_ref["match"]]["status"] == "playing":
+            tournament["matches"][tournament_ref["match"]]["game_id"] = None
+            save_users(users)
+        st.session_state.tournament_ref = None
         st.rerun()
+with st.sidebar:
+    if account_jobs(active_only=True):
+        live_jobs_panel()
+    else:
+        render_jobs()
 st.sidebar.markdown("---")
 if st.sidebar.button(t("logout")):
         # Clear all session state keys upon logout
@@ -282,23 +477,48 @@ if st.session_state.current_page == "Homepage":
     st.title(f"🎯 {t('homepage')}")
     st.markdown(f"{t('configure_game')} **{st.session_state.username}**!")
     
-    game_mode_tabs = st.tabs([t("x01_setup"), t("cricket_soon")])
+    # --- Resume Match ---
+    # Live matches are saved every turn, so a refresh, logout or server restart can pick them up again
+    open_games = resumable_games(users.get(st.session_state.username, {}))
+    if open_games:
+        st.subheader(f"⏯️ {t('resume_match')}")
+        for open_game in open_games[:5]:
+            col_info, col_resume, col_discard = st.columns([4, 1, 1])
+            game_label = "Cricket" if open_game.get("mode") == "Cricket" else open_game["settings"]["starting_score"]
+            col_info.markdown(f"**{' vs '.join(open_game['players'])}** · {game_label} · "
+                              f"{len(open_game['turns'])} {t('turns')} · {open_game.get('started', '')}")
+            if col_resume.button(t("resume"), key=f"resume_{open_game['id']}", use_container_width=True):
+                resume_game(open_game)
+                st.rerun()
+            if col_discard.button(t("discard"), key=f"discard_{open_game['id']}", use_container_width=True):
+                open_game["abandoned"] = True
+                save_users(users)
+                st.rerun()
+
+    game_mode_tabs = st.tabs([t("x01_setup"), t("cricket")])
     with game_mode_tabs[0]:
         st.subheader(t("x01_options"))
 
         # --- Game Settings Columns (Multi-line) ---
         col1, col2, col3 = st.columns(3)
         with col1:
-            points_options = ["101", "201", "301", "401", "501"]
-            try:
-                default_points_index = points_options.index(str(st.session_state.get("game_mode", 501)))
-            except ValueError:
+            points_options = [str(score) for score in STANDARD_START_SCORES] + ["Custom"]
+            current_points = st.session_state.get("game_mode", 501)
+            if str(current_points) in points_options:
+                default_points_index = points_options.index(str(current_points))
+            elif isinstance(current_points, int):
+                default_points_index = points_options.index("Custom")
+            else:
                 default_points_index = points_options.index("501")
-            selected_points = st.selectbox(t("points"), points_options, index=default_points_index)
-            st.session_state.game_mode = int(selected_points)
+            selected_points = st.selectbox(t("points"), points_options, index=default_points_index, format_func=lambda o: t("custom") if o == "Custom" else o)
+            if selected_points == "Custom":
+                custom_default = current_points if is_valid_start_score(current_points) else 701
+                st.session_state.game_mode = int(st.number_input(t("custom_start_score"), min_value=2, max_value=MAX_START_SCORE, value=custom_default, step=1))
+            else:
+                st.session_state.game_mode = int(selected_points)
 
         with col2:
-            checkout_options = ["Straight Out", "Double Out"]
+            checkout_options = list(CHECK_OUT_MODES)
             try:
                 default_checkout_index = checkout_options.index(st.session_state.get("check_out_mode", "Double Out"))
             except ValueError:
@@ -326,12 +546,12 @@ if st.session_state.current_page == "Homepage":
             st.session_state.set_leg_rule = selected_set_leg
 
         with col5:
-            checkin_options = ["Straight In", "Double In"]
+            checkin_options = list(CHECK_IN_MODES)
             try:
                 default_checkin_index = checkin_options.index(st.session_state.get("check_in_mode", "Straight In"))
             except ValueError:
                 default_checkin_index = checkin_options.index("Straight In")
-            selected_checkin = st.selectbox(t("checkin"), checkin_options, index=default_checkin_index, disabled=True)
+            selected_checkin = st.selectbox(t("checkin"), checkin_options, index=default_checkin_index)
             st.session_state.check_in_mode = selected_checkin
 
         with col6:
@@ -362,6 +582,32 @@ if st.session_state.current_page == "Homepage":
         )
         st.session_state.players_selected_for_game = selected_players_list
 
+        # --- Head-to-Head ---
+        if len(selected_players_list) >= 2:
+            if head_to_head_stale(users[current_username_hp]):
+                submit_account_job("rebuild_head_to_head")
+                st.caption(t("head_to_head_building"))
+            else:
+                # Read straight from the index; no games are scanned
+                head_to_head_rows = []
+                for i, player in enumerate(selected_players_list):
+                    for opponent in selected_players_list[i + 1:]:
+                        record = head_to_head_record(users[current_username_hp], player, opponent)
+                        if record:
+                            opponent_record = head_to_head_record(users[current_username_hp], opponent, player)
+                            head_to_head_rows.append({
+                                "Match-up": f"{player} vs {opponent}",
+                                "Games": record["matches"],
+                                "Won": f"{record['wins']}-{record['losses']}",
+                                "Legs": f"{record['legs_won']}-{record['legs_lost']}",
+                                "Sets": f"{record['sets_won']}-{record['sets_lost']}",
+                                "Avg": f"{three_dart_average(record):.2f} - {three_dart_average(opponent_record):.2f}",
+                                "Last": record["last"],
+                            })
+                if head_to_head_rows:
+                    st.caption(f"⚔️ {t('head_to_head')}")
+                    st.dataframe(head_to_head_rows, hide_index=True, use_container_width=True)
+
         with st.expander("Add / Manage Players"):
             st.write("Add new players (including yourself) to track stats & set preferences.")
             new_player_name_from_input = st.text_input("New Player Name", key="new_player_name_input").strip()
@@ -381,6 +627,10 @@ if st.session_state.current_page == "Homepage":
                                 "num_busts": 0,
                                 "darts_thrown": 0,
                                 "preferred_doubles": [],
+                                "cricket_games_played": 0,
+                                "cricket_games_won": 0,
+                                "cricket_marks": 0,
+                                "cricket_darts": 0,
                                 "avatar": "🎯"  # Default Emoji
                             }
                             save_users(users)
@@ -401,38 +651,62 @@ if st.session_state.current_page == "Homepage":
             players_to_start = st.session_state.players_selected_for_game
             if not players_to_start:
                 st.warning("⚠️ Select players.")
-            elif not st.session_state.game_mode or st.session_state.game_mode not in [101, 201, 301, 401, 501]:
+            elif not is_valid_start_score(st.session_state.game_mode):
                 st.warning("⚠️ Select X01 mode.")
-            else: # Initialize Game State (Expanded)
+            else:
+                start_x01_game(players_to_start)
+                st.success(f"Starting {st.session_state.game_mode}...")
+                st.info(f"Playing {st.session_state.set_leg_rule} {st.session_state.sets_to_play} set(s)...")
+                time.sleep(1.5)
+                st.rerun()
+    with game_mode_tabs[1]:
+        st.subheader(t("cricket_options"))
+        cricket_variant = st.selectbox(t("variant"), CRICKET_VARIANTS, format_func=t, key="cricket_variant")
+        cricket_players = st.multiselect(
+            "Select players for game (incl. yourself if playing!)",
+            options=available_players,
+            default=[p for p in st.session_state.get("cricket_players", []) if p in available_players],
+            key="multiselect_cricket_players"
+        )
+        st.session_state.cricket_players = cricket_players
+
+        if st.button("🚀 Start Cricket", type="primary", use_container_width=True):
+            if not cricket_players:
+                st.warning("⚠️ Select players.")
+            else:
+                # The keypad, navigation lock and game-over screen read these shared keys
                 st.session_state.current_page = "Game"
-                st.session_state.starting_score = st.session_state.game_mode
-                st.session_state.player_scores = {p: st.session_state.starting_score for p in players_to_start}
-                st.session_state.player_legs_won = {p: 0 for p in players_to_start}
-                st.session_state.player_sets_won = {p: 0 for p in players_to_start}
-                st.session_state.player_darts_thrown = {p: 0 for p in players_to_start}
-                st.session_state.player_turn_history = {p: [] for p in players_to_start}
-                st.session_state.player_last_turn_scores = {p: [] for p in players_to_start}
+                st.session_state.game_mode = "Cricket"
+                st.session_state.players_selected_for_game = list(cricket_players)
+                st.session_state.cricket = new_cricket_state(cricket_players, cricket_variant)
+                st.session_state.player_profiles = player_profiles(users[st.session_state.username], cricket_players)
                 st.session_state.current_player_index = 0
                 st.session_state.current_turn_shots = []
-                st.session_state.current_leg = 1
-                st.session_state.current_set = 1
                 st.session_state.game_over = False
-                st.session_state.leg_over = False
-                st.session_state.set_over = False
                 st.session_state.winner = None
                 st.session_state.message = ""
                 st.session_state.pending_modifier = None
                 st.session_state.state_before_last_turn = None
-                st.success(f"Starting {st.session_state.game_mode}...")
-                st.info(f"Playing {st.session_state.set_leg_rule} {st.session_state.sets_to_play} set(s)...")
-                time.sleep(1.5)
+                game_record = {
+                    "id": str(int(time.time() * 1000)),
+                    "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "mode": "Cricket",
+                    "players": list(cricket_players),
+                    "settings": {"variant": cricket_variant},
+                    "turns": [],
+                    "finished": False,
+                    "winner": None,
+                }
+                users[current_username_hp].setdefault("games", []).append(game_record)
+                save_users(users)
+                st.session_state.current_game_id = game_record["id"]
                 st.rerun()
-    with game_mode_tabs[1]:
-        st.subheader("Cricket")
-        st.info("🏏 Planned.")
 
 # --- Statistics Tab Logic ---
 elif st.session_state.current_page == "Statistics":
+    # pandas and matplotlib are only needed here; importing them at the top slowed every cold start
+    import pandas as pd
+    import matplotlib.pyplot as plt
     st.title(f"📊 {t('personal_statistics')}")
     st.write(f"{t('stats_for_account')}: **{st.session_state.username}**")
 
@@ -444,50 +718,30 @@ elif st.session_state.current_page == "Statistics":
     if current_username_stats in users and "player_stats" in users.get(current_username_stats, {}):
         player_stats_data = users[current_username_stats]["player_stats"]
         if player_stats_data:
-            stats_options = [
-                t("games_played"), t("games_won"), t("legs_won"), t("sets_won"),
-                t("win_rate"), t("total_score"), t("avg_score_turn"),
-                t("avg_score_dart"), t("highest_score"), t("total_turns"),
-                t("darts_thrown"), t("busts")
-            ]
-            selected_stat = st.selectbox(t("select_statistic"), stats_options)
+            # Stable stat ids; the selectbox shows t(id) but the value never depends on the language
+            def ratio(numerator, denominator, factor=1):
+                return f"{(numerator / denominator * factor):.2f}" if denominator > 0 else "0.00"
+            stat_values = {
+                "games_played": lambda s: s.get("games_played", 0),
+                "games_won": lambda s: s.get("games_won", 0),
+                "legs_won": lambda s: s.get("legs_won", 0),
+                "sets_won": lambda s: s.get("sets_won", 0),
+                "win_rate": lambda s: ratio(s.get("games_won", 0), s.get("games_played", 0), 100),
+                "total_score": lambda s: s.get("total_score", 0),
+                "avg_score_turn": lambda s: ratio(s.get("total_score", 0), s.get("total_turns", 0)),
+                "avg_score_dart": lambda s: ratio(s.get("total_score", 0), s.get("darts_thrown", 0)),
+                "highest_score": lambda s: s.get("highest_score", 0),
+                "total_turns": lambda s: s.get("total_turns", 0),
+                "darts_thrown": lambda s: s.get("darts_thrown", 0),
+                "busts": lambda s: s.get("num_busts", 0),
+                "cricket_mpr": lambda s: ratio(s.get("cricket_marks", 0), s.get("cricket_darts", 0), 3),
+                "double_pct": lambda s: ratio(sum(s.get("double_hits", {}).values()), sum(s.get("double_attempts", {}).values()), 100),
+            }
+            selected_stat = st.selectbox(t("select_statistic"), list(stat_values), format_func=t)
 
             table_data = []
             for player, stats in player_stats_data.items():
-                row = {"Player": player}
-                games_played = stats.get("games_played", 0)
-                games_won = stats.get("games_won", 0)
-                legs_won = stats.get("legs_won", 0)
-                sets_won = stats.get("sets_won", 0)
-                total_score = stats.get("total_score", 0)
-                total_turns = stats.get("total_turns", 0)
-                darts_thrown = stats.get("darts_thrown", 0)
-
-                if selected_stat == t("games_played"):
-                    row["Value"] = games_played
-                elif selected_stat == t("games_won"):
-                    row["Value"] = games_won
-                elif selected_stat == t("legs_won"):
-                    row["Value"] = legs_won
-                elif selected_stat == t("sets_won"):
-                    row["Value"] = sets_won
-                elif selected_stat == t("win_rate"):
-                    row["Value"] = f"{(games_won / games_played * 100):.2f}" if games_played > 0 else "0.00"
-                elif selected_stat == t("total_score"):
-                    row["Value"] = total_score
-                elif selected_stat == t("avg_score_turn"):
-                    row["Value"] = f"{(total_score / total_turns):.2f}" if total_turns > 0 else "0.00"
-                elif selected_stat == t("avg_score_dart"):
-                    row["Value"] = f"{(total_score / darts_thrown):.2f}" if darts_thrown > 0 else "0.00"
-                elif selected_stat == t("highest_score"):
-                    row["Value"] = stats.get("highest_score", 0)
-                elif selected_stat == t("total_turns"):
-                    row["Value"] = total_turns
-                elif selected_stat == t("darts_thrown"):
-                    row["Value"] = darts_thrown
-                elif selected_stat == t("busts"):
-                    row["Value"] = stats.get("num_busts", 0)
-
+                row = {"Player": player, "Value": stat_values[selected_stat](stats)}
                 table_data.append(row)
 
             if table_data:
@@ -546,35 +800,386 @@ elif st.session_state.current_page == "Statistics":
                         ax4.bar(df.index, df['highest_score'], color='orange')
                         ax4.set_ylabel('Highest Score')
                         ax4.set_xlabel('Player')
-                        ax4.set_title('Highest Score in a Turn")
+                        ax4.set_title('Highest Score in a Turn')
                         st.pyplot(fig4)
                 except Exception as e:
                     st.error(f"{t('error_displaying_table')}: {e}")
             else:
                 st.info(t("no_data_for_statistic"))
 
+            # --- Form Trends ---
             st.markdown("---")
-            st.subheader(t("visualizations_placeholder"))
-            st.info(t("charts_coming_soon"))
+            st.subheader(f"📉 {t('form_trends')}")
+            account_trends = users[current_username_stats].get("trends")
+            if trends_stale(users[current_username_stats]):
+                submit_account_job("rebuild_trends")
+                st.info(t("trends_building"))
+            elif account_trends:
+                col_player, col_metric = st.columns(2)
+                with col_player:
+                    trend_player = st.selectbox(t("player"), list(player_stats_data), key="trend_player")
+                with col_metric:
+                    trend_metric = st.selectbox(t("metric"), list(TREND_METRICS), format_func=t, key="trend_metric")
+                col_resolution, col_period = st.columns(2)
+                with col_resolution:
+                    trend_resolution = st.radio(t("resolution"), TREND_RESOLUTIONS, index=1, format_func=t, horizontal=True, key="trend_resolution")
+                with col_period:
+                    trend_period = st.radio(t("period"), list(TREND_PERIODS), format_func=t, horizontal=True, key="trend_period")
+                since = datetime.date.today() - datetime.timedelta(days=TREND_PERIODS[trend_period]) if TREND_PERIODS[trend_period] else None
+                # Reads the player's cached buckets and draws at most a few thousand points, however long the history
+                trend_dates, trend_values = chart_points(account_trends, trend_player, trend_metric, trend_resolution, since)
+                if trend_dates:
+                    fig_trend, ax_trend = plt.subplots()
+                    ax_trend.plot(trend_dates, trend_values, marker="o" if len(trend_dates) < 50 else None)
+                    ax_trend.set_ylabel(t(trend_metric))
+                    fig_trend.autofmt_xdate()
+                    st.pyplot(fig_trend)
+                    plt.close(fig_trend)
+                else:
+                    st.info(t("no_data_for_statistic"))
+            else:
+                st.info(t("no_data_for_statistic"))
         else:
             st.info(t("no_player_stats_yet"))
     else:
         st.warning(t("could_not_load_stats"))
 
+    # --- Leaderboards ---
+    st.markdown("---")
+    st.subheader(f"🥇 {t('leaderboard')}")
+    col_metric, col_scope = st.columns(2)
+    with col_metric:
+        leaderboard_metric = st.selectbox(t("metric"), list(LEADERBOARD_METRICS), format_func=t, key="leaderboard_metric")
+    with col_scope:
+        leaderboard_scope = st.radio(t("scope"), ["account", "global"], format_func=t, horizontal=True, key="leaderboard_scope")
+    if leaderboard_scope == "global":
+        top_entries = [(f"{player} ({account})", value) for (account, player), value in get_leaderboards().top(leaderboard_metric, 10)]
+    else:
+        top_entries = get_leaderboards().top(leaderboard_metric, 10, current_username_stats)
+    if top_entries:
+        st.dataframe([{"#": i, "Player": player, "Value": value} for i, (player, value) in enumerate(top_entries, start=1)],
+                     hide_index=True, use_container_width=True)
+    else:
+        st.info(t("no_data_for_statistic"))
+
+    # --- Dart Heatmap ---
+    heatmap_players = list(users.get(current_username_stats, {}).get("player_stats", {}))
+    if heatmap_players:
+        st.markdown("---")
+        st.subheader(f"🎯 {t('dart_heatmap')}")
+        col_player, col_range = st.columns(2)
+        with col_player:
+            heatmap_player = st.selectbox(t("player"), heatmap_players, key="heatmap_player")
+        with col_range:
+            heatmap_range = st.radio(t("darts"), ["all_darts", "last_darts"], format_func=t, horizontal=True, key="heatmap_range")
+        if heatmap_range == "last_darts":
+            segment_hits = histogram_of(recent_codes(current_username_stats, heatmap_player, HEATMAP_RECENT_DARTS))
+        else:
+            segment_hits = users[current_username_stats]["player_stats"][heatmap_player].get("segment_hits") or [0] * SEGMENT_COUNT
+        darts_logged = sum(segment_hits)
+        if darts_logged:
+            col_board, col_target = st.columns(2)
+            with col_board:
+                fig_heat, ax_heat = plt.subplots(subplot_kw={"projection": "polar"})
+                draw_heatmap(ax_heat, segment_hits)
+                st.pyplot(fig_heat)
+                plt.close(fig_heat)
+                st.caption(f"{darts_logged} {t('darts')}")
+            with col_target:
+                # Where darts aimed at a bed tend to land: the bed against its neighbours
+                target = st.selectbox(t("target"), ["T20", "T19", "T18", "D20", "D16", "D25"], key="heatmap_target")
+                near = neighbours(segment_code(target))
+                near_total = sum(segment_hits[code] for code in near)
+                st.dataframe([{"Segment": segment_name(code), "Hits": segment_hits[code],
+                               "%": round(segment_hits[code] / near_total * 100, 1) if near_total else 0.0} for code in near],
+                             hide_index=True, use_container_width=True)
+        else:
+            st.info(t("no_data_for_statistic"))
+
+    # --- Checkout Doubles ---
+    if heatmap_players:
+        st.markdown("---")
+        st.subheader(f"✌️ {t('checkout_doubles')}")
+        doubles_player = st.selectbox(t("player"), heatmap_players, key="doubles_player")
+        double_rows = checkout_table_rows(users[current_username_stats]["player_stats"][doubles_player])
+        if double_rows:
+            st.dataframe([{"Double": double, "Darts": attempts, "Hits": hits, "%": pct} for double, attempts, hits, pct in double_rows],
+                         hide_index=True, use_container_width=True)
+        else:
+            st.info(t("no_data_for_statistic"))
+
+    # --- Ratings ---
+    account_stats = users.get(current_username_stats, {})
+    if ratings_stale(account_stats):
+        # Rating parameters changed since the last save; rebuilt off the script thread
+        submit_account_job("recompute_ratings")
+        st.info(t("ratings_recomputing"))
+    current_ratings = account_stats.get("ratings", {}).get("current", {})
+    if current_ratings:
+        st.markdown("---")
+        st.subheader(f"📈 {t('ratings')}")
+        rating_history = account_stats["ratings"]["history"]
+        rating_rows = [{
+            "Player": p,
+            "Rating": round(r),
+            "Games": len(rating_history.get(p, [])),
+            "Best": round(max(rating_history.get(p, [r * 10])) / 10),
+        } for p, r in sorted(current_ratings.items(), key=lambda item: -item[1])]
+        st.dataframe(pd.DataFrame(rating_rows).set_index("Player"), use_container_width=True)
+        if st.button(t("recompute_ratings")):
+            submit_account_job("recompute_ratings")
+            st.rerun() # The sidebar shows the progress
+
+    # --- Match Replay ---
+    recorded_games = [g for g in users.get(current_username_stats, {}).get("games", []) if is_replayable(g)]
+    if recorded_games:
+        st.markdown("---")
+        st.subheader("🔁 Match Replay")
+        game_labels = {g["id"]: f"{g.get('started', '')} | {' vs '.join(g['players'])} ({g['settings']['starting_score']})" for g in recorded_games}
+        replay_game_id = st.selectbox("Select game:", list(reversed(list(game_labels))), format_func=game_labels.get, key="replay_game_select")
+        replay_game = next(g for g in recorded_games if g["id"] == replay_game_id)
+        num_turns = len(replay_game["turns"])
+        replay_turn = 0
+        if num_turns > 0:
+            replay_turn = st.slider("Turn", 0, num_turns, num_turns, key=f"replay_turn_{replay_game_id}")
+
+        # Checkpoints are built once per game version, seeking then replays at most a few turns
+        checkpoint_cache = st.session_state.setdefault("replay_checkpoints", {})
+        cache_key = (replay_game_id, num_turns)
+        if cache_key not in checkpoint_cache:
+            checkpoint_cache[cache_key] = build_checkpoints(replay_game)
+        replay_state = state_at(replay_game, replay_turn, checkpoint_cache[cache_key])
+
+        st.caption(f"{t('set')} {replay_state['current_set']} | {t('leg')} {replay_state['current_leg']}")
+        replay_rows = [{
+            "Player": p,
+            "Score": replay_state["player_scores"][p],
+            "Legs": replay_state["player_legs_won"][p],
+            "Sets": replay_state["player_sets_won"][p],
+            "Darts": replay_state["player_darts_thrown"][p],
+        } for p in replay_game["players"]]
+        st.dataframe(pd.DataFrame(replay_rows).set_index("Player"), use_container_width=True)
+        if replay_state["game_over"]:
+            st.success(f"🏆 Winner: {replay_state['winner']}")
+        else:
+            next_player = replay_game["players"][replay_state["current_player_index"] % len(replay_game["players"])]
+            st.write(f"Next to throw: **{next_player}**")
+            replay_suggestion = suggestion_at(replay_state)
+            if replay_suggestion:
+                st.markdown(suggestion_html(replay_suggestion), unsafe_allow_html=True)
+
+# --- Tournament Page Logic ---
+elif st.session_state.current_page == "Tournament":
+    st.title(f"🏆 {t('tournament')}")
+    current_username_tm = st.session_state.username
+    account_tm = users.get(current_username_tm, {})
+    tournaments = account_tm.setdefault("tournaments", [])
+
+    with st.expander(t("new_tournament"), expanded=not tournaments):
+        tournament_name = st.text_input(t("name"), value=f"Tournament {len(tournaments) + 1}", key="tournament_name")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            tournament_format = st.selectbox(t("format"), TOURNAMENT_FORMATS, format_func=t, key="tournament_format")
+        with col2:
+            tournament_boards = st.number_input(t("boards"), min_value=1, max_value=32, value=2, step=1, key="tournament_boards")
+        with col3:
+            tournament_score = st.selectbox(t("points"), STANDARD_START_SCORES, index=len(STANDARD_START_SCORES) - 1, key="tournament_score")
+        tournament_players = st.multiselect(t("players"), sorted(account_tm.get("player_stats", {})), key="tournament_players")
+        if st.button(t("create_tournament"), type="primary"):
+            if len(tournament_players) < 2:
+                st.warning("⚠️ Select at least two players.")
+            else:
+                settings_tm = {
+                    "starting_score": tournament_score,
+                    "check_out_mode": st.session_state.check_out_mode,
+                    "check_in_mode": st.session_state.check_in_mode,
+                    "set_leg_rule": st.session_state.set_leg_rule,
+                    "sets_to_play": st.session_state.sets_to_play,
+                    "legs_to_play": st.session_state.legs_to_play,
+                }
+                tournaments.append(create_tournament(tournament_name, tournament_format, tournament_players, int(tournament_boards), settings_tm))
+                save_users(users)
+                st.rerun()
+
+    if tournaments:
+        tournament_labels = {tm["id"]: f"{tm['name']} ({t(tm['format'])})" for tm in tournaments}
+        selected_tournament_id = st.selectbox(t("tournament"), list(reversed(list(tournament_labels))), format_func=tournament_labels.get, key="tournament_select")
+        tournament = find_tournament(users, current_username_tm, selected_tournament_id)
+        matches_tm = tournament["matches"]
+        done_count = sum(1 for m in matches_tm if m["status"] in ("done", "bye"))
+        st.progress(done_count / len(matches_tm), text=f"{done_count}/{len(matches_tm)} {t('matches')}")
+        if tournament["finished"]:
+            st.success(f"🏆 {tournament['winner']}")
+
+        # --- Boards ---
+        st.subheader(f"🎯 {t('boards')}")
+        st.caption(f"{t('board_utilization')}: {board_utilization(tournament):.0%}")
+        board_cols = st.columns(min(len(tournament["boards"]), 4))
+        for board, match_id in enumerate(tournament["boards"]):
+            with board_cols[board % len(board_cols)]:
+                st.markdown(f"**{t('board')} {board + 1}**")
+                if match_id is None:
+                    st.caption(t("board_free"))
+                    continue
+                board_match = matches_tm[match_id]
+                st.write(" vs ".join(board_match["players"]))
+                # Each board is its own session: open the app on the board's device and press Play there
+                if board_match["game_id"] is None and st.button(f"▶️ {t('play')}", key=f"board_play_{tournament['id']}_{board}"):
+                    board_match["game_id"] = "starting"
+                    start_x01_game(board_match["players"], tournament["settings"], {"id": tournament["id"], "match": match_id, "board": board})
+                    board_match["game_id"] = st.session_state.current_game_id
+                    save_users(users)
+                    st.rerun()
+                elif board_match["game_id"] is not None:
+                    st.caption(t("in_progress"))
+                    board_game = find_game(users, current_username_tm, board_match["game_id"])
+                    if (board_game is not None and not board_game.get("finished")
+                            and board_game["id"] != st.session_state.get("current_game_id")
+                            and st.button(f"⏯️ {t('resume')}", key=f"board_resume_{tournament['id']}_{board}")):
+                        resume_game(board_game)
+                        st.rerun()
+
+        # --- Standings ---
+        st.subheader(f"📋 {t('standings')}")
+        st.dataframe([{
+            "Player": row["player"], "Played": row["played"], "Won": row["won"], "Lost": row["lost"], "Points": row["points"],
+        } for row in standings_table(tournament)], hide_index=True, use_container_width=True)
+
+        upcoming = [m for m in matches_tm if m["status"] in ("ready", "pending")]
+        if upcoming:
+            st.subheader(f"⏭️ {t('upcoming_matches')}")
+            st.dataframe([{
+                "Round": f"{m['bracket'] or ''}{m['round']}",
+                "Match": " vs ".join(p or "?" for p in m["players"]),
+                "Status": m["status"],
+            } for m in upcoming[:20]], hide_index=True, use_container_width=True)
+
+# --- Practice Page Logic ---
+elif st.session_state.current_page == "Practice":
+    st.title(f"🏋️ {t('practice')}")
+    current_username_pr = st.session_state.username
+    account_pr = users.get(current_username_pr, {})
+    practice_players = sorted(account_pr.get("player_stats", {}))
+    st.session_state.setdefault("practice_state", None)
+    st.session_state.setdefault("practice_modifier", None)
+
+    def finish_practice():
+        """Adds the session to the player's practice record; the only save of a session."""
+        state = st.session_state.practice_state
+        stats = account_pr.get("player_stats", {}).get(st.session_state.practice_for)
+        if stats is not None and state["darts"]:
+            add_session(stats, state)
+            save_users(users)
+        st.session_state.practice_result = (st.session_state.practice_for, state)
+        st.session_state.practice_state = None
+
+    def practice_dart(num_val):
+        shot, warning = keypad_shot(num_val, st.session_state.practice_modifier)
+        st.session_state.practice_modifier = None
+        if warning:
+            st.session_state.practice_warning = warning
+            return
+        state = st.session_state.practice_state
+        fields = apply_dart(state, shot)
+        if fields is None:
+            return
+        # One small append per dart instead of rewriting the user data
+        append_dart(stream_path(current_username_pr, st.session_state.practice_for), st.session_state.practice_session, state["drill"], *fields)
+        if state["done"]:
+            finish_practice()
+
+    def toggle_practice_modifier(modifier):
+        st.session_state.practice_modifier = None if st.session_state.practice_modifier == modifier else modifier
+
+    @st.fragment
+    def practice_panel():
+        """Target, running stats and keypad; a dart reruns only this panel."""
+        state = st.session_state.practice_state
+        if state is None: # Finished by the last dart; the page shows the result
+            st.rerun()
+        st.subheader(f"{st.session_state.practice_for} · {t(state['drill'])}")
+        if st.session_state.get("practice_warning"):
+            st.warning(st.session_state.practice_warning)
+            st.session_state.practice_warning = None
+        target_col, keypad_col = st.columns([2, 1.2])
+        with target_col:
+            if state["drill"] == "checkout_121":
+                st.markdown(f"## 🎯 {state['checkout']}")
+                st.caption(f"{t('left')}: {state['remaining']} · {t('dart')} {state['round_darts'] + 1} / {LADDER_DARTS} · "
+                           f"{state['attempts'] + 1} / {LADDER_ATTEMPTS}")
+            else:
+                st.markdown(f"## 🎯 {current_target(state)}")
+                st.caption(f"{state['target_index'] + 1} / {len(state['targets'])}")
+            metric_cols = st.columns(4)
+            metric_cols[0].metric(t("darts"), state["darts"])
+            metric_cols[1].metric(t("hit_rate"), f"{hit_rate(state)}%")
+            metric_cols[2].metric(t("score"), state["score"])
+            metric_cols[3].metric(t("best_streak"), state["best_streak"])
+            if state["target_darts"] and state["drill"] != "around_the_clock":
+                st.dataframe([{t("target"): target, t("darts"): darts, t("hits"): state["target_hits"].get(target, 0)}
+                              for target, darts in state["target_darts"].items()], hide_index=True, use_container_width=True)
+        with keypad_col:
+            cols_action = st.columns(3)
+            cols_action[0].button(f"🟡 {t('double')}", key="practice_btn_D", use_container_width=True,
+                                  type="primary" if st.session_state.practice_modifier == "D" else "secondary",
+                                  on_click=toggle_practice_modifier, args=("D",))
+            cols_action[1].button(f"🟠 {t('triple')}", key="practice_btn_T", use_container_width=True,
+                                  type="primary" if st.session_state.practice_modifier == "T" else "secondary",
+                                  on_click=toggle_practice_modifier, args=("T",))
+            cols_action[2].button(f"⏹️ {t('end_session')}", key="practice_btn_end", use_container_width=True, on_click=finish_practice)
+            render_number_pad(practice_dart, "practice_btn_")
+
+    if st.session_state.practice_state is not None:
+        practice_panel()
+    elif not practice_players:
+        st.info(t("no_player_stats_yet"))
+    else:
+        if st.session_state.get("practice_result"):
+            result_player, result_state = st.session_state.practice_result
+            st.success(f"{result_player} · {t(result_state['drill'])}: {t('score')} {result_state['score']} · "
+                       f"{result_state['darts']} {t('darts')} · {hit_rate(result_state)}%")
+        col_player, col_drill = st.columns(2)
+        with col_player:
+            practice_player = st.selectbox(t("player"), practice_players, key="practice_player")
+        with col_drill:
+            practice_drill = st.selectbox(t("drill"), DRILLS, format_func=t, key="practice_drill")
+        st.caption(t(f"{practice_drill}_help"))
+        if st.button(f"▶️ {t('start_practice')}", type="primary"):
+            profile = player_profiles(account_pr, [practice_player])[practice_player]
+            st.session_state.practice_state = new_drill(practice_drill, profile["preferred_doubles"])
+            st.session_state.practice_for = practice_player
+            st.session_state.practice_session = int(time.time())
+            st.session_state.practice_result = None
+            st.rerun()
+
+        # Best results per drill, from the sessions saved so far
+        practice_rows = [{"Player": player, t("drill"): t(drill), t("sessions"): record["sessions"], t("darts"): record["darts"],
+                          "%": round(record["hits"] / record["darts"] * 100, 1) if record["darts"] else 0.0, t("best"): record["best"]}
+                         for player in practice_players
+                         for drill, record in account_pr["player_stats"][player].get("practice", {}).items()]
+        if practice_rows:
+            st.markdown("---")
+            st.subheader(t("practice_records"))
+            st.dataframe(practice_rows, hide_index=True, use_container_width=True)
+
 # --- Settings Page Logic ---
-elif st.session_state.current_page == "⚙️ Settings":
+elif st.session_state.current_page == "Settings":
     st.title("⚙️ Settings & Player Management")
     st.write(f"Manage players and preferences for account: **{st.session_state.username}**")
     st.markdown("---")
     # 🌐 Language Settings
     with st.expander("🌐 Language Settings"):
+        language_options = available_languages()
+        current_language = st.session_state.get("language", "en")
         selected_lang = st.selectbox(
             "Select Language",
-            options=["en", "de"],
-            index=["en", "de"].index(st.session_state.get("language", "en")),
-            format_func=lambda x: "English" if x == "en" else "Deutsch",
+            options=language_options,
+            index=language_options.index(current_language) if current_language in language_options else 0,
+            format_func=lambda x: LANGUAGE_NAMES.get(x, x.upper()),
         )
-        st.session_state.language = selected_lang
+        if selected_lang != current_language:
+            st.session_state.language = selected_lang
+            st.rerun() # Recompile the catalog for the new language
         st.markdown(f"{t('selected_language')} **{selected_lang.upper()}**")
 
 
@@ -588,78 +1193,79 @@ elif st.session_state.current_page == "⚙️ Settings":
     player_stats_dict = users[current_username].setdefault("player_stats", {})
     players_list = sorted(list(player_stats_dict.keys()))
 
-    tab_prefs, tab_delete = st.tabs(["🎯 Set Preferences", "🗑️ Delete Player"])
+    tab_prefs, tab_delete, tab_maintenance = st.tabs(["🎯 Set Preferences", "🗑️ Delete Player", f"🛠️ {t('maintenance')}"])
 
     with tab_prefs:
-    st.subheader("Set Preferred Double Outs & Avatars")
-    st.write("Select preferred doubles and an emoji avatar for each player.")
-
-    if not players_list:
-        st.warning("No players added yet. Add players on the Homepage.")
-    else:
-        # Select Player to Edit
-        player_to_edit = st.selectbox(
-            "Select Player to Edit Preferences:",
-            players_list,
-            key="edit_prefs_player_select",
-            index=None,
-            placeholder="Choose player..."
-        )
-
-        # --- Initialize variable BEFORE potentially using it ---
-        current_preferences_formatted = []  # Default to empty list
+        st.subheader("Set Preferred Double Outs & Avatars")
+        st.write("Select preferred doubles and an emoji avatar for each player.")
 
-        # --- Emoji options ---
-        emoji_options = ["🎯", "🔥", "🎉", "💥", "👑", "⚡", "🥇", "😎"]
+        if not players_list:
+            st.warning("No players added yet. Add players on the Homepage.")
+        else:
+            # Select Player to Edit
+            player_to_edit = st.selectbox(
+                "Select Player to Edit Preferences:",
+                players_list,
+                key="edit_prefs_player_select",
+                index=None,
+                placeholder="Choose player..."
+            )
 
-        # --- Calculate actual prefs only if a player is selected ---
-        if player_to_edit:
-            # Load current preferences safely using .get()
-            current_prefs = player_stats_dict.get(player_to_edit, {}).get('preferred_doubles', [])
-            # Ensure loaded preferences are valid doubles before displaying
-            current_preferences_formatted = [pref for pref in current_prefs if pref in ALL_POSSIBLE_DOUBLES]
+            # --- Initialize variable BEFORE potentially using it ---
+            current_preferences_formatted = []  # Default to empty list
 
-            # Load current avatar emoji, default to 🎯
-            current_avatar = player_stats_dict[player_to_edit].get("avatar", "🎯")
+            # --- Emoji options ---
+            emoji_options = ["🎯", "🔥", "🎉", "💥", "👑", "⚡", "🥇", "😎"]
 
-            # Add Emoji selection dropdown
-            selected_avatar = st.selectbox(
-                f"Select avatar for **{player_to_edit}**:",
-                emoji_options,
-                index=emoji_options.index(current_avatar) if current_avatar in emoji_options else 0
+            # --- Calculate actual prefs only if a player is selected ---
+            if player_to_edit:
+                # Load current preferences safely using .get()
+                current_prefs = player_stats_dict.get(player_to_edit, {}).get('preferred_doubles', [])
+                # Ensure loaded preferences are valid doubles before displaying
+                current_preferences_formatted = [pref for pref in current_prefs if pref in ALL_POSSIBLE_DOUBLES]
+
+                # Load current avatar emoji, default to 🎯
+                current_avatar = player_stats_dict[player_to_edit].get("avatar", "🎯")
+
+                # Add Emoji selection dropdown
+                selected_avatar = st.selectbox(
+                    f"Select avatar for **{player_to_edit}**:",
+                    emoji_options,
+                    index=emoji_options.index(current_avatar) if current_avatar in emoji_options else 0
+                )
+                st.caption("Choose an emoji to represent this player in games and stats 📊🎯")
+
+            # --- Disable multiselect and button if no player is chosen ---
+            input_disabled = (player_to_edit is None)
+
+            # Display multiselect using the initialized/calculated preferences
+            selected_doubles = st.multiselect(
+                f"Select preferred doubles for **{player_to_edit or '...'}**:",  # Handle label if None
+                options=ALL_POSSIBLE_DOUBLES,
+                default=current_preferences_formatted,
+                key=f"pref_doubles_multiselect_{player_to_edit or 'none'}",  # Unique key part
+                disabled=input_disabled
             )
-            st.caption("Choose an emoji to represent this player in games and stats 📊🎯")
-
-        # --- Disable multiselect and button if no player is chosen ---
-        input_disabled = (player_to_edit is None)
-
-        # Display multiselect using the initialized/calculated preferences
-        selected_doubles = st.multiselect(
-            f"Select preferred doubles for **{player_to_edit or '...'}**:",  # Handle label if None
-            options=ALL_POSSIBLE_DOUBLES,
-            default=current_preferences_formatted,
-            key=f"pref_doubles_multiselect_{player_to_edit or 'none'}",  # Unique key part
-            disabled=input_disabled
-        )
 
-        # Display Save button, disable if needed
-        save_button_label = f"Save Preferences for {player_to_edit}" if player_to_edit else "Save Preferences"
-        if st.button(save_button_label, type="primary", key=f"save_prefs_{player_to_edit or 'none'}", disabled=input_disabled):
-            # Check again if player_to_edit is valid before saving
-            if player_to_edit:
-                # Ensure player still exists and stats dict is there before saving
-                if player_to_edit in users[current_username].get("player_stats", {}):
-                    # ✅ Save doubles
-                    users[current_username]["player_stats"][player_to_edit]['preferred_doubles'] = selected_doubles
-                    # ✅ Save avatar
-                    users[current_username]["player_stats"][player_to_edit]["avatar"] = selected_avatar
-                    save_users(users)
-                    st.success(f"Preferences saved for {player_to_edit}!")
-                    time.sleep(1)
-                    # No rerun usually needed here, state is saved
-                else:
-                    st.error("Player not found, could not save preferences (maybe deleted?).")
-            # else: Button should be disabled if player_to_edit is None
+            # Display Save button, disable if needed
+            save_button_label = f"Save Preferences for {player_to_edit}" if player_to_edit else "Save Preferences"
+            if st.button(save_button_label, type="primary", key=f"save_prefs_{player_to_edit or 'none'}", disabled=input_disabled):
+                # Check again if player_to_edit is valid before saving
+                if player_to_edit:
+                    # Ensure player still exists and stats dict is there before saving
+                    if player_to_edit in users[current_username].get("player_stats", {}):
+                        # ✅ Save doubles
+                        users[current_username]["player_stats"][player_to_edit]['preferred_doubles'] = selected_doubles
+                        # ✅ Save avatar
+                        users[current_username]["player_stats"][player_to_edit]["avatar"] = selected_avatar
+                        save_users(users)
+                        st.session_state.player_profiles = None # The scoreboard picks up the change
+                        st.success(f"Preferences saved for {player_to_edit}!")
+                        time.sleep(1)
+                        # No rerun usually needed here, state is saved
+                    else:
+                        st.error("Player not found, could not save preferences (maybe deleted?).")
+                # else: Button should be disabled if player_to_edit is None
 
 
     with tab_delete:
@@ -704,6 +1310,9 @@ elif st.session_state.current_page == "⚙️ Settings":
                                 # Check if player actually exists before deleting
                                 if player_name_confirmed in users[current_username]["player_stats"]:
                                     del users[current_username]["player_stats"][player_name_confirmed] # Delete player entry
+                                    update_leaderboards([player_name_confirmed])
+                                    delete_log(current_username, player_name_confirmed)
+                                    delete_stream(current_username, player_name_confirmed)
                                     # Filter logs
                                     if "checkout_log" in users[current_username]:
                                          users[current_username]["checkout_log"] = [
@@ -731,88 +1340,32 @@ elif st.session_state.current_page == "⚙️ Settings":
                     # If selection changed after clicking delete once - reset confirmation silently
                     st.session_state.confirm_delete_player = None
 
+    with tab_maintenance:
+        st.subheader(t("maintenance"))
+        st.write(t("maintenance_help"))
+        job_type = st.selectbox(t("job"), list(JOB_TYPES), format_func=t, key="maintenance_job_type")
+        job_params = {}
+        if job_type == "archive_checkout_log":
+            job_params["days"] = st.number_input(t("archive_older_than_days"), min_value=1, value=365, step=30)
+        if st.button(f"▶️ {t('run_job')}", key="maintenance_run_job"):
+            submit_account_job(job_type, **job_params)
+            st.rerun() # The sidebar shows the progress
+
     st.markdown("---")
 
 
 # --- Game Tab Logic ---
 elif st.session_state.current_page == "Game":
 
-    # --- Helper Functions (Fully Expanded) ---
-    def parse_score_input(score_str):
-        score_str = str(score_str).upper().strip()
-        is_double = False
-        is_triple = False
-        value = 0
-        is_valid = True
-        try:
-            if score_str.startswith("T"):
-                if len(score_str) > 1 and score_str[1:].isdigit():
-                    num = int(score_str[1:])
-                    if 1 <= num <= 20:
-                        value = num * 3
-                        is_triple = True
-                    else:
-                        is_valid = False
-                else:
-                    is_valid = False
-            elif score_str.startswith("D"):
-                 if len(score_str) > 1 and score_str[1:].isdigit():
-                    num = int(score_str[1:])
-                    if 1 <= num <= 20 or num == 25:
-                        value = num * 2
-                        is_double = True
-                    else:
-                        is_valid = False
-                 else:
-                    is_valid = False
-            elif score_str.isdigit():
-                num = int(score_str)
-                if 0 <= num <= 20 or num == 25:
-                    value = num
-                elif num == 50:
-                    st.toast("Use D25")
-                    is_valid = False
-                    value = 0
-                else:
-                    is_valid = False
-            else:
-                is_valid = False
-        except ValueError:
-            is_valid = False
-        return value, is_double, is_triple, is_valid
-
-    def get_throw_value(throw_str):
-        value, _, _, is_valid = parse_score_input(throw_str)
-        if is_valid:
-            return value
-        else:
-            return 0 # Return 0 for invalid format
-
-    def calculate_turn_total(shots_list):
-        total = 0
-        darts_thrown_turn = 0
-        last_dart_double_flag = False
-        parsed_shots_details = []
-        if not shots_list:
-            return 0, 0, False, []
-
-        for i, shot_str in enumerate(shots_list):
-            value, is_double, _, is_valid = parse_score_input(shot_str)
-            if not is_valid:
-                return None, 0, False, [] # Signal error if parse fails
-            total += value
-            darts_thrown_turn += 1
-            last_dart_double_flag = is_double
-            parsed_shots_details.append({"input": shot_str, "value": value, "is_double": is_double})
-
-        return total, darts_thrown_turn, last_dart_double_flag, parsed_shots_details
-
+    # --- Turn Processing (rules live in dart_engine) ---
     def run_turn_processing(player_name, shots_list):
         """Processes the end of a turn: updates scores, stats, logs, and determines next state."""
         global users
         current_time_str = time.strftime("%Y-%m-%d %H:%M:%S")
         current_player_index_before_turn = st.session_state.current_player_index
         score_before_turn = st.session_state.player_scores[player_name]
+        leg_before_turn = st.session_state.current_leg
+        set_before_turn = st.session_state.current_set
 
         # Store state BEFORE processing for potential UNDO
         st.session_state.state_before_last_turn = {
@@ -823,266 +1376,164 @@ elif st.session_state.current_page == "Game":
             "current_turn_shots_processed": list(shots_list),
             "legs_won_before": st.session_state.player_legs_won.get(player_name, 0),
             "sets_won_before": st.session_state.player_sets_won.get(player_name, 0),
+            "opened_before": st.session_state.get("player_opened", {}).get(player_name, True),
         }
 
-        calculated_score, darts_thrown_turn, last_dart_double, _ = calculate_turn_total(shots_list)
+        outcome = apply_turn(st.session_state, player_name, shots_list)
 
-        if calculated_score is None:
+        if outcome is None:
             st.error("Internal Error: Score calculation failed during turn processing.")
             st.session_state.state_before_last_turn = None # Invalidate undo state on error
             return # Stop processing this turn
 
-        new_score = score_before_turn - calculated_score
-        is_bust = False
-        is_win = False
-        valid_checkout_attempt = True
-        turn_result_for_log = "UNKNOWN"
+        calculated_score = outcome["calculated_score"]
+        turn_result_for_log = outcome["result"]
+        is_win = outcome["is_win"]
 
-        # --- Determine Turn Result (Expanded) ---J
-        # 1. Check Bust
-        if new_score < 0 or new_score == 1:
-            turn_result_for_log = "BUST"
+        # --- Turn Result Messages ---
+        if turn_result_for_log == "BUST":
             st.warning(f"❌ Bust! Score remains {score_before_turn}")
-            st.session_state.player_scores[player_name] = score_before_turn
             st.session_state.message = f"{player_name} Busted!"
-            st.session_state.player_turn_history.setdefault(player_name, []).append((calculated_score, darts_thrown_turn, turn_result_for_log))
-            st.session_state.player_last_turn_scores[player_name] = list(shots_list)
-            st.session_state.player_darts_thrown[player_name] = st.session_state.player_darts_thrown.get(player_name, 0) + darts_thrown_turn
-            is_bust = True
-
-        # 2. Check Win
-        elif new_score == 0:
-            # Check if checkout attempt is valid based on game rules
-            if st.session_state.check_out_mode == "Double Out" and not last_dart_double:
-                # Invalid Double Out -> Treat as Bust
-                turn_result_for_log = "BUST (Invalid Checkout)"
-                st.warning(f"❌ Invalid Checkout! Must finish on a Double. Score remains {score_before_turn}")
-                st.session_state.player_scores[player_name] = score_before_turn
-                st.session_state.message = f"{player_name} Invalid Checkout!"
-                st.session_state.player_turn_history.setdefault(player_name, []).append((calculated_score, darts_thrown_turn, turn_result_for_log))
-                st.session_state.player_last_turn_scores[player_name] = list(shots_list)
-                st.session_state.player_darts_thrown[player_name] = st.session_state.player_darts_thrown.get(player_name, 0) + darts_thrown_turn
-                is_bust = True # Treat as bust for turn advancement
-                valid_checkout_attempt = False # Mark attempt as invalid
-            else:
-                # Valid Win
-                turn_result_for_log = "WIN"
-                st.success(f"🎯 Game Shot! {player_name} wins Leg {st.session_state.current_leg}!")
-                st.session_state.player_scores[player_name] = 0 # Set score to 0
-                st.session_state.message = f"{player_name} won Leg {st.session_state.current_leg}!"
-                st.session_state.player_turn_history.setdefault(player_name, []).append((calculated_score, darts_thrown_turn, turn_result_for_log))
-                st.session_state.player_last_turn_scores[player_name] = list(shots_list)
-                st.session_state.player_darts_thrown[player_name] = st.session_state.player_darts_thrown.get(player_name, 0) + darts_thrown_turn
-                st.session_state.leg_over = True # Signal leg end
-                is_win = True # Mark turn as a winning turn
-                # Increment leg count in session state for immediate display/checks
-                st.session_state.player_legs_won[player_name] = st.session_state.player_legs_won.get(player_name, 0) + 1
-
-        # 3. Regular Score Update
+        elif turn_result_for_log == "BUST (Invalid Checkout)":
+            beds = " or ".join(CHECKOUT_BED_NAMES[kind] for kind in "SDT" if kind in CHECK_OUT_MODES[st.session_state.check_out_mode])
+            st.warning(f"❌ Invalid Checkout! Must finish on a {beds} ({st.session_state.check_out_mode}). Score remains {score_before_turn}")
+            st.session_state.message = f"{player_name} Invalid Checkout!"
+        elif is_win:
+            st.success(f"🎯 Game Shot! {player_name} wins Leg {leg_before_turn}!")
+            st.session_state.message = f"{player_name} won Leg {leg_before_turn}!"
         else:
-            turn_result_for_log = "OK"
-            st.session_state.player_scores[player_name] = new_score
             st.session_state.message = f"{player_name} scored {calculated_score}."
-            st.session_state.player_turn_history.setdefault(player_name, []).append((calculated_score, darts_thrown_turn, turn_result_for_log))
-            st.session_state.player_last_turn_scores[player_name] = list(shots_list)
-            st.session_state.player_darts_thrown[player_name] = st.session_state.player_darts_thrown.get(player_name, 0) + darts_thrown_turn
 
-        # --- Detailed Logging for Checkouts / Busts under 171 ---
-        is_finish_attempt_score = (2 <= score_before_turn <= 170 and score_before_turn not in BOGIE_NUMBERS_SET)
-        if is_finish_attempt_score and turn_result_for_log != "OK":
-            try:
-                log_entry = {
-                    "timestamp": current_time_str,
-                    "player": player_name,
-                    "score_before": score_before_turn,
-                    "shots": list(shots_list),
-                    "calculated_score": calculated_score,
-                    "result": turn_result_for_log,
-                    "last_dart_was_double": last_dart_double if turn_result_for_log == "WIN" else None,
-                    "last_dart_str": shots_list[-1] if shots_list else None,
-                    "game_mode": st.session_state.game_mode,
-                    "leg": st.session_state.current_leg,
-                    "set": st.session_state.current_set
-                }
-                current_username_log = st.session_state.username
-                # Safely append to log list, creating if necessary
-                log_list = users[current_username_log].setdefault("checkout_log", [])
-                log_list.append(log_entry)
-            except Exception as e:
-                st.error(f"Log Error: {e}")
+        # --- Detailed Logging for Checkouts / Busts on finishable scores ---
+        current_username = st.session_state.username
+        log_entry = checkout_log_entry(player_name, score_before_turn, shots_list, outcome, st.session_state.check_out_mode,
+                                       st.session_state.game_mode, leg_before_turn, set_before_turn, current_time_str)
+        if log_entry:
+            users[current_username].setdefault("checkout_log", []).append(log_entry)
 
         # --- Update Persistent Stats ---
-        current_username = st.session_state.username # Define for consistency
-        # Ensure player exists in stats before updating
-        if player_name in users.get(current_username, {}).get("player_stats", {}):
-            stats = users[current_username]["player_stats"][player_name]
-            # Use .get() with default 0 for safe incrementing
-            if is_bust and turn_result_for_log.startswith("BUST"):
-                 stats["num_busts"] = stats.get("num_busts", 0) + 1
-            # Legs/Sets won stats are updated during advancement checks below
-            if is_bust or is_win or turn_result_for_log == "OK": # If turn completed (even if bust)
-                stats["total_turns"] = stats.get("total_turns", 0) + 1
-                stats["darts_thrown"] = stats.get("darts_thrown", 0) + darts_thrown_turn
-                # Only add score if not a bust
-                if not is_bust and calculated_score is not None:
-                    stats["total_score"] = stats.get("total_score", 0) + calculated_score
-            # Update highest score if applicable
-            if calculated_score is not None and calculated_score > stats.get("highest_score", 0):
-                 stats["highest_score"] = calculated_score
-        # Save users data once after all potential updates for the turn
+        if st.session_state.get("visit_entered_as_total"):
+            outcome["double_attempts"] = [] # Made-up darts say nothing about the doubles thrown at
+        apply_turn_stats(users.get(current_username, {}), player_name, outcome, st.session_state.players_selected_for_game)
+        if outcome["advanced"]:
+            st.session_state.state_before_last_turn["double_attempts"] = outcome["double_attempts"]
+        update_leaderboards(st.session_state.players_selected_for_game if outcome["game_won"] else [player_name])
+        if outcome["advanced"] and not st.session_state.get("visit_entered_as_total"):
+            # Typed totals have made-up darts and stay out of the segment log
+            st.session_state.state_before_last_turn["logged_shots"] = list(record_darts(current_username, users[current_username], player_name, shots_list))
+
+        # --- Record Turn for Replay ---
+        game_record = find_game(users, current_username, st.session_state.get("current_game_id"))
+        if game_record is not None:
+            game_record["turns"].append([current_player_index_before_turn, list(shots_list)])
+            if st.session_state.get("visit_entered_as_total"):
+                # Darts stand in for a typed total; per-dart analyses skip these turns
+                game_record.setdefault("entered_totals", []).append(len(game_record["turns"]) - 1)
+            update_checkpoint(game_record, st.session_state)
+            if outcome["game_won"]:
+                finish_game(game_record, player_name)
+                update_ratings(users[current_username], game_record)
+                update_trends(users[current_username], game_record)
+                update_head_to_head(users[current_username], game_record)
+                tournament_ref = game_record.get("tournament")
+                if tournament_ref:
+                    tournament = find_tournament(users, current_username, tournament_ref["id"])
+                    try:
+                        record_result(tournament, tournament_ref["match"], player_name, game_record["id"])
+                    except (TypeError, ValueError) as e: # Tournament deleted or result already entered
+                        st.warning(f"Tournament result not recorded: {e}")
+        st.session_state.visit_entered_as_total = False
+        # Save users data once after all updates for the turn
         save_users(users)
-
-        # --- Post-Turn Advancement Logic (EXPANDED) ---
-        num_players_adv = len(st.session_state.players_selected_for_game)
-        # Turn advances if bust, win, or 3 darts thrown, EXCEPT on invalid checkout bust
-        should_advance_turn = (is_bust or is_win or (len(shots_list) == 3))
-        # Override advance if it was an invalid checkout bust
-        if not valid_checkout_attempt and new_score == 0:
-            should_advance_turn = False
-            st.warning("Correct score and try checkout again.") # Keep message
-
-        if should_advance_turn:
-            index_before_advance = st.session_state.current_player_index
-            # Final update to undo state's index before advancing
-            if st.session_state.state_before_last_turn:
-                st.session_state.state_before_last_turn["player_index"] = index_before_advance
-
-            # Clear the input buffer FIRST
-            st.session_state.current_turn_shots = []
-
-            # Check if the leg ended (implies a valid WIN occurred)
-            if st.session_state.leg_over:
-                legs_needed = math.ceil((st.session_state.legs_to_play + 1) / 2) if st.session_state.set_leg_rule == "Best of" else st.session_state.legs_to_play
-                # Check if this leg win results in winning the Set
-                if st.session_state.player_legs_won.get(player_name, 0) >= legs_needed:
-                    st.session_state.set_over = True
-                    st.session_state.player_sets_won[player_name] = st.session_state.player_sets_won.get(player_name, 0) + 1
-                    st.success(f"🎉 {player_name} wins Set {st.session_state.current_set}!")
-                    # Save set win stat persistently
-                    if player_name in users[current_username]["player_stats"]:
-                        users[current_username]["player_stats"][player_name]["sets_won"] = users[current_username]["player_stats"][player_name].get("sets_won",0)+1
-                        save_users(users) # Save after updating set stat
-
-                    # Check if this set win results in winning the Game
-                    sets_needed = math.ceil((st.session_state.sets_to_play + 1) / 2) if st.session_state.set_leg_rule == "Best of" else st.session_state.sets_to_play
-                    if st.session_state.player_sets_won.get(player_name, 0) >= sets_needed:
-                        st.session_state.game_over = True
-                        st.session_state.winner = player_name
-                        # Update final game stats for all players
-                        for p in st.session_state.players_selected_for_game:
-                             if p in users[current_username]["player_stats"]:
-                                 stats_p=users[current_username]["player_stats"][p]
-                                 stats_p["games_played"] = stats_p.get("games_played", 0) + 1
-                                 if p == player_name:
-                                     stats_p["games_won"] = stats_p.get("games_won", 0) + 1
-                        save_users(users) # Save final game stats
-                        st.session_state.state_before_last_turn = None # Cannot undo after game over
-                        # Don't advance player index or clear state here, game over screen handles it
-
-                    else: # Set over, but Game not over -> Start Next Set
-                        st.info("Prepare for next Set...")
-                        time.sleep(1.5)
-                        st.session_state.current_set += 1
-                        st.session_state.current_leg = 1
-                        st.session_state.player_scores = {p: st.session_state.starting_score for p in st.session_state.players_selected_for_game}
-                        st.session_state.player_legs_won = {p: 0 for p in st.session_state.players_selected_for_game}
-                        st.session_state.player_last_turn_scores = {p: [] for p in st.session_state.players_selected_for_game}
-                        st.session_state.leg_over = False
-                        st.session_state.set_over = False
-                        st.session_state.current_player_index = (index_before_advance + 1) % num_players_adv
-                        st.session_state.state_before_last_turn = None # Clear undo state on set transition
-
-                else: # Leg over, but Set not over -> Start Next Leg
-                    st.info("Prepare for next Leg...")
-                    time.sleep(1.5)
-                    st.session_state.current_leg += 1
-                    st.session_state.player_scores = {p: st.session_state.starting_score for p in st.session_state.players_selected_for_game}
-                    st.session_state.player_last_turn_scores = {p: [] for p in st.session_state.players_selected_for_game}
-                    st.session_state.leg_over = False
-                    # Alternate starting player
-                    st.session_state.current_player_index = (index_before_advance + 1) % num_players_adv
-                    st.session_state.state_before_last_turn = None # Clear undo state on leg transition
-
-            else: # Leg not over, just advance player
-                st.session_state.current_player_index = (index_before_advance + 1) % num_players_adv
-                # Keep undo state available when just switching players
+        if outcome["game_won"] and ratings_stale(users[current_username]):
+            # Rating parameters changed; the background recompute includes this game
+            submit_account_job("recompute_ratings")
+
+        # --- Post-Turn Advancement Messages ---
+        if outcome["advanced"]:
+            if outcome["set_won"]:
+                st.success(f"🎉 {player_name} wins Set {set_before_turn}!")
+            if outcome["game_won"]:
+                st.session_state.state_before_last_turn = None # Cannot undo after game over
+            elif outcome["next_set"]:
+                st.info("Prepare for next Set...")
+                time.sleep(1.5)
+                st.session_state.state_before_last_turn = None # Clear undo state on set transition
+            elif outcome["next_leg"]:
+                st.info("Prepare for next Leg...")
+                time.sleep(1.5)
+                st.session_state.state_before_last_turn = None # Clear undo state on leg transition
+            # Keep undo state available when just switching players
 
             # Rerun AFTER all advancement logic is complete
             st.rerun()
-        # else: Turn did not advance (e.g., invalid checkout), allow correction without rerun here
-
-
-    # --- Checkout Calculation Function ---
-    @st.cache_data(ttl=3600) # Cache results
-    def get_checkouts(target_score, darts_left, max_suggestions=5):
-        # ... (Definition unchanged - expanded) ...
-        if darts_left not in [1, 2, 3] or target_score < 2 or target_score > 170 or target_score in BOGIE_NUMBERS_SET:
-            return []
-        valid_paths = []
-        throws_priority = ( [f"T{i}" for i in range(20, 0, -1)] +
-                           [f"D{i}" for i in range(20, 0, -1)] + ["D25"] +
-                           [str(i) for i in range(20, 0, -1)] + ["25"] )
-        # --- 1 Dart Left ---
-        if darts_left == 1:
-            if (target_score <= 40 and target_score % 2 == 0) or target_score == 50:
-                double = f"D{target_score // 2}" if target_score != 50 else "D25"
-                return [[double]]
-            else:
-                return []
-        # --- 2 Darts Left ---
-        if darts_left >= 2:
-            for throw1 in throws_priority:
-                val1 = get_throw_value(throw1)
-                if 0 < val1 < target_score and (target_score - val1) >= 2:
-                    remaining_score1 = target_score - val1
-                    one_dart_finish_list = get_checkouts(remaining_score1, 1)
-                    if one_dart_finish_list:
-                         path = [throw1, one_dart_finish_list[0][0]]
-                         if path not in valid_paths:
-                             valid_paths.append(path)
-                             if len(valid_paths) >= max_suggestions:
-                                 break
-            if len(valid_paths) >= max_suggestions or darts_left == 2:
-                 return valid_paths[:max_suggestions]
-        # --- 3 Darts Left ---
-        if darts_left == 3:
-             for throw1 in throws_priority:
-                 val1 = get_throw_value(throw1)
-                 if 0 < val1 <= target_score - 4:
-                     remaining_score1 = target_score - val1
-                     two_dart_finishes = get_checkouts(remaining_score1, 2, max_suggestions=1)
-                     if two_dart_finishes:
-                         full_path = [throw1] + two_dart_finishes[0]
-                         if full_path not in valid_paths:
-                              valid_paths.append(full_path)
-                              if len(valid_paths) >= max_suggestions:
-                                  break
-                 if len(valid_paths) >= max_suggestions:
-                     break
-        return valid_paths[:max_suggestions]
-
-    # --- Setup Shot Calculation Function ---
-    def get_setup_shot(current_score):
-        # ... (Definition unchanged) ...
-        preferred_leaves = [32, 40, 16, 8, 36, 20, 4, 50, 24, 12, 6, 10, 18, 2, 28, 34];
-        for target_leave in preferred_leaves:
-            needed_score = current_score - target_leave
-            if 1 <= needed_score <= 20 or needed_score == 25:
-                if target_leave >= 2: return f"Setup: {needed_score} (leaves {target_leave})";
-        for single_hit in range(20, 0, -1):
-            if current_score > single_hit and (current_score - single_hit) > 1:
-                 return f"Setup: {single_hit} (leaves {current_score - single_hit})";
-        return None
+        elif turn_result_for_log == "BUST (Invalid Checkout)":
+            # Turn did not advance, allow correction without rerun here
+            st.warning("Correct score and try checkout again.")
 
-    def sort_checkouts_by_preference(paths, preferred_doubles):
-        # ... (Definition unchanged) ...
-        preferred_paths = []; other_paths = [];
-        for path in paths:
-            if path and path[-1].startswith("D") and path[-1] in preferred_doubles:
-                preferred_paths.append(path);
-            else:
-                other_paths.append(path);
-        return preferred_paths + other_paths;
+    def run_cricket_turn_processing(shots_list):
+        """Cricket counterpart of run_turn_processing: scores the visit, logs stats and records the turn."""
+        global users
+        cricket_state = st.session_state.cricket
+        player_index = cricket_state["current_player_index"]
+        st.session_state.state_before_last_turn = {
+            "cricket": copy_state(cricket_state),
+            "current_turn_shots_processed": list(shots_list),
+        }
+
+        outcome = apply_cricket_turn(cricket_state, shots_list)
+        if outcome is None:
+            st.error("Internal Error: Score calculation failed during turn processing.")
+            st.session_state.state_before_last_turn = None
+            return
+        player_name = outcome["player"]
+        st.session_state.current_player_index = cricket_state["current_player_index"]
+        st.session_state.current_turn_shots = []
+
+        # --- Update Persistent Stats ---
+        current_username = st.session_state.username
+        player_stats_all = users.get(current_username, {}).get("player_stats", {})
+        if player_name in player_stats_all:
+            stats = player_stats_all[player_name]
+            stats["cricket_marks"] = stats.get("cricket_marks", 0) + outcome["marks"]
+            stats["cricket_darts"] = stats.get("cricket_darts", 0) + outcome["darts"]
+            record_darts(current_username, users[current_username], player_name, shots_list[:outcome["darts"]])
+            st.session_state.state_before_last_turn["logged_shots"] = list(shots_list[:outcome["darts"]])
+        if outcome["is_win"]:
+            st.session_state.game_over = True
+            st.session_state.winner = player_name
+            st.session_state.state_before_last_turn = None # Cannot undo after game over
+            for p in cricket_state["players"]:
+                if p in player_stats_all:
+                    stats_p = player_stats_all[p]
+                    stats_p["games_played"] = stats_p.get("games_played", 0) + 1
+                    stats_p["cricket_games_played"] = stats_p.get("cricket_games_played", 0) + 1
+                    if p == player_name:
+                        stats_p["games_won"] = stats_p.get("games_won", 0) + 1
+                        stats_p["cricket_games_won"] = stats_p.get("cricket_games_won", 0) + 1
+            update_leaderboards(cricket_state["players"]) # Win rates changed
+
+        # --- Record Turn ---
+        game_record = find_game(users, current_username, st.session_state.get("current_game_id"))
+        if game_record is not None:
+            game_record["turns"].append([player_index, list(shots_list[:outcome["darts"]])])
+            update_checkpoint(game_record, cricket_state)
+            if outcome["is_win"]:
+                finish_game(game_record, player_name)
+                update_trends(users[current_username], game_record)
+                update_head_to_head(users[current_username], game_record)
+        save_users(users)
+
+        if outcome["marks"]:
+            st.session_state.message = f"{player_name}: {outcome['marks']} marks"
+        st.rerun()
+
+    def process_turn(player_name, shots_list):
+        """Hands a finished visit to the rules of the current game mode."""
+        if st.session_state.game_mode == "Cricket":
+            run_cricket_turn_processing(shots_list)
+        else:
+            run_turn_processing(player_name, shots_list)
 
     # --- Check Game State ---
     if st.session_state.game_over:
@@ -1092,6 +1543,23 @@ elif st.session_state.current_page == "Game":
         else:
             st.header("Match finished.")
         st.balloons()
+        publish_spectator_state() # Final score and winner
+        # Tournament boards: offer the match the scheduler put on this board next
+        tournament_ref = st.session_state.get("tournament_ref")
+        tournament = find_tournament(users, st.session_state.username, tournament_ref["id"]) if tournament_ref else None
+        if tournament is not None:
+            board = tournament_ref["board"]
+            next_match_id = tournament["boards"][board]
+            if tournament["finished"]:
+                st.success(f"🏆 {tournament['name']}: {tournament['winner']}")
+            elif next_match_id is not None and tournament["matches"][next_match_id]["game_id"] is None:
+                next_players = tournament["matches"][next_match_id]["players"]
+                if st.button(f"▶️ {t('board')} {board + 1}: {' vs '.join(next_players)}", type="primary", use_container_width=True):
+                    tournament["matches"][next_match_id]["game_id"] = "starting"
+                    start_x01_game(next_players, tournament["settings"], {"id": tournament["id"], "match": next_match_id, "board": board})
+                    tournament["matches"][next_match_id]["game_id"] = st.session_state.current_game_id
+                    save_users(users)
+                    st.rerun()
         if st.button("Play Again / New Game Setup", use_container_width=True):
             st.session_state.current_page = "Homepage"
             st.session_state.players_selected_for_game = []
@@ -1106,267 +1574,326 @@ elif st.session_state.current_page == "Game":
          st.stop()
 
     # --- Game Interface ---
-    st.title(f"🎯 {t('game_on')}: {st.session_state.game_mode} - {t('set')} {st.session_state.current_set}/{st.session_state.sets_to_play} | {t('leg')} {st.session_state.current_leg}/{st.session_state.legs_to_play}")
-    st.caption(f"{t('mode')}: {st.session_state.check_out_mode} | {t('rule')}: {st.session_state.set_leg_rule}")
-
-
-    # --- Main Two-Column Layout ---
-    left_col, right_col = st.columns([2, 1.2])
-
-    with left_col:
-        # --- Scoreboard Display ---
-        st.subheader("Scores")
-        num_players = len(st.session_state.players_selected_for_game)
-        if num_players > 0:
-            for i, player in enumerate(st.session_state.players_selected_for_game):
-                is_current_player = (i == st.session_state.current_player_index)
-                border_style = "border: 3px solid #FF4B4B; padding: 5px 8px; border-radius: 5px; background-color: #FFF0F0;" if is_current_player else "border: 1px solid #ccc; padding: 5px 8px; border-radius: 5px;"
-                with st.container():
-                    st.markdown(f"<div style='{border_style}'>", unsafe_allow_html=True)
-                    st.markdown(f"<h5 style='text-align: center; margin-bottom: 5px; margin-top: 0;'>{'▶️ ' if is_current_player else ''}{player}</h5>", unsafe_allow_html=True)
-                    col_score, col_stats = st.columns([2, 3])
-                    with col_score:
-                        actual_score = st.session_state.player_scores.get(player, st.session_state.starting_score)
-                        display_score_val, score_color = actual_score, "black"; is_potential_bust = False; partial_turn_score = 0;
-                        if is_current_player and st.session_state.current_turn_shots:
-                            partial_turn_score_calc, _, _, _ = calculate_turn_total(st.session_state.current_turn_shots)
-                            if partial_turn_score_calc is not None:
-                                partial_turn_score = partial_turn_score_calc
-                                temp_remaining_score = actual_score - partial_turn_score
-                                if temp_remaining_score < 0 or temp_remaining_score == 1:
-                                    display_score_val, score_color, is_potential_bust = "BUST", "red", True
-                                elif temp_remaining_score >= 0:
-                                    display_score_val = temp_remaining_score
-                        st.markdown(f"<h2 style='text-align: center; font-size: 3em; margin-bottom: 0; color: {score_color}; line-height: 1.1;'>{display_score_val}</h2>", unsafe_allow_html=True)
-                    with col_stats:
-                        darts = st.session_state.player_darts_thrown.get(player, 0)
-                        history = st.session_state.player_turn_history.get(player, [])
-                        total_score_thrown = sum(t[0] for t in history if len(t)>2 and t[2] != "BUST")
-                        avg_3_dart = (total_score_thrown / darts * 3) if darts > 0 else 0.00
-                        legs = st.session_state.player_legs_won.get(player, 0)
-                        sets = st.session_state.player_sets_won.get(player, 0)
-                        st.markdown(f"""<div style='text-align: left; font-size: 0.9em; padding-top: 15px;'>📊Avg: {avg_3_dart:.2f}<br>Legs: {legs} | Sets: {sets}</div>""", unsafe_allow_html=True)
-
-                    turn_total_display = ""
-                    if is_current_player and partial_turn_score > 0 and not is_potential_bust:
-                         turn_total_display = f"({partial_turn_score} thrown)"
-                    st.markdown(f"<p style='text-align: center; font-size: 1.1em; color: blue; margin-bottom: 2px; height: 1.3em;'>{turn_total_display or '&nbsp;'}</p>", unsafe_allow_html=True)
-                    last_shots = st.session_state.player_last_turn_scores.get(player, [])
-                    last_turn_str = " ".join(map(str, last_shots)) if last_shots else "-"
-                    last_turn_total, _, _, _ = calculate_turn_total(last_shots) if last_shots else (0,0,False, [])
-                    st.markdown(f"<p style='text-align: center; font-size: 0.8em; color: grey; margin-bottom: 2px;'>Last: {last_turn_str} ({last_turn_total or 0})</p>", unsafe_allow_html=True)
-
-                    # --- !! UPDATED HIERARCHICAL Checkout / Setup Suggestions Display !! ---
-                    suggestion_text = None
-                    if is_current_player and st.session_state.check_out_mode == "Double Out":
-                        score_at_turn_start_disp = st.session_state.player_scores.get(player, st.session_state.starting_score)
-                        current_turn_shots_list_disp = st.session_state.current_turn_shots
-                        score_thrown_this_turn_disp, darts_thrown_this_turn_disp, _, _ = calculate_turn_total(current_turn_shots_list_disp)
-
-                        if score_thrown_this_turn_disp is not None:
-                            score_remaining_now_disp = score_at_turn_start_disp - score_thrown_this_turn_disp
-                            darts_left_disp = 3 - darts_thrown_this_turn_disp
-
-                            if darts_left_disp > 0 and score_remaining_now_disp >= 2:
-                                found_suggestion = False
-                                # --- Check Hierarchy ---
-                                # 1. Check for 1-Dart Finish
-                                if darts_left_disp >= 1 and score_remaining_now_disp <= 50 and score_remaining_now_disp not in BOGIE_NUMBERS_SET:
-                                    checkouts_1 = get_checkouts(score_remaining_now_disp, 1)
-                                    if checkouts_1:
-                                        suggestion_text = f"<p style='text-align: center; font-size: 0.9em; color: #008000; font-weight: bold; margin-top: 5px;'>🎯 **Out: {checkouts_1[0][0]}** (1D)</p>"
-                                        found_suggestion = True
-
-                                # 2. Check for 2-Dart Finish
-                                if not found_suggestion and darts_left_disp >= 2 and score_remaining_now_disp <= 110 and score_remaining_now_disp not in BOGIE_NUMBERS_SET:
-                                    checkouts_2 = get_checkouts(score_remaining_now_disp, 2, max_suggestions=3)
-                                    if checkouts_2:
-                                        current_username_sugg = st.session_state.username
-                                        player_prefs_list = users.get(current_username_sugg, {}).get("player_stats", {}).get(player, {}).get('preferred_doubles', [])
-                                        preferred_doubles_set = set(player_prefs_list) if player_prefs_list else DEFAULT_PREFERRED_DOUBLES
-                                        sorted_suggestions = sort_checkouts_by_preference(checkouts_2, preferred_doubles_set)
-                                        display_text = " | ".join([" ".join(path) for path in sorted_suggestions[:2]])
-                                        suggestion_text = f"<p style='text-align: center; font-size: 0.9em; color: green; margin-top: 5px;'>🎯 **Out: {display_text}** (2D)</p>"
-                                        found_suggestion = True
-
-                                # 3. Check for 3-Dart Finish
-                                if not found_suggestion and darts_left_disp == 3 and score_remaining_now_disp <= 170 and score_remaining_now_disp not in BOGIE_NUMBERS_SET:
-                                    checkouts_3 = get_checkouts(score_remaining_now_disp, 3, max_suggestions=3)
-                                    if checkouts_3:
-                                        current_username_sugg = st.session_state.username
-                                        player_prefs_list = users.get(current_username_sugg, {}).get("player_stats", {}).get(player, {}).get('preferred_doubles', [])
-                                        preferred_doubles_set = set(player_prefs_list) if player_prefs_list else DEFAULT_PREFERRED_DOUBLES
-                                        sorted_suggestions = sort_checkouts_by_preference(checkouts_3, preferred_doubles_set)
-                                        display_text = " | ".join([" ".join(path) for path in sorted_suggestions[:2]])
-                                        suggestion_text = f"<p style='text-align: center; font-size: 0.9em; color: green; margin-top: 5px;'>🎯 **Out: {display_text}** (3D)</p>"
-                                        found_suggestion = True
-
-                                # 4. Suggest Setup Shot
-                                if not found_suggestion and darts_left_disp == 1 and score_remaining_now_disp > 1 and score_remaining_now_disp not in BOGIE_NUMBERS_SET:
-                                    setup_suggestion = get_setup_shot(score_remaining_now_disp)
-                                    if setup_suggestion:
-                                        suggestion_text = f"<p style='text-align: center; font-size: 0.9em; color: orange; margin-top: 5px;'>🔧 **{setup_suggestion}**</p>"
-                                        found_suggestion = True
-
-                                # 5. Handle Bogie Numbers
-                                if not found_suggestion and score_remaining_now_disp in BOGIE_NUMBERS_SET:
-                                     suggestion_text = "<p style='text-align: center; font-size: 0.8em; color: red; margin-top: 5px;'>No checkout</p>"
-                                     found_suggestion = True
-
-                    # Display the suggestion text or a placeholder
-                    if suggestion_text:
-                        st.markdown(suggestion_text, unsafe_allow_html=True)
-                    else:
-                        # Maintain space only if suggestions could potentially appear
-                        if is_current_player and st.session_state.check_out_mode == "Double Out" and score_at_turn_start_disp >= 2:
-                           st.markdown("<p style='height: 1.9em; margin-top: 5px; margin-bottom: 0;'></p>", unsafe_allow_html=True)
-
-                    st.markdown("</div>", unsafe_allow_html=True) # Close player div
-                st.markdown("<div style='margin-bottom: 8px;'></div>", unsafe_allow_html=True) # Space between players
-        else:
-            st.warning("No players in game.")
-
-    with right_col:
-        # --- Input Area (Expanded - No Semicolons) ---
-        if not st.session_state.game_over:
-            current_player_name = "N/A"
-            if st.session_state.players_selected_for_game:
-                # Ensure index is valid before accessing list
-                 if len(st.session_state.players_selected_for_game) > 0:
-                     current_player_index_safe = st.session_state.current_player_index % len(st.session_state.players_selected_for_game)
-                     current_player_name = st.session_state.players_selected_for_game[current_player_index_safe]
+    is_cricket = st.session_state.game_mode == "Cricket"
+    if is_cricket:
+        st.title(f"🎯 {t('game_on')}: Cricket")
+        st.caption(f"{t('variant')}: {t(st.session_state.cricket['variant'])}")
+    else:
+        st.title(f"🎯 {t('game_on')}: {st.session_state.game_mode} - {t('set')} {st.session_state.current_set}/{st.session_state.sets_to_play} | {t('leg')} {st.session_state.current_leg}/{st.session_state.legs_to_play}")
+        st.caption(f"{t('mode')}: {st.session_state.get('check_in_mode', 'Straight In')} / {st.session_state.check_out_mode} | {t('rule')}: {st.session_state.set_leg_rule}")
+
+    # Compact keypad buttons; injected on full reruns only, fragment reruns keep it
+    compact_button_style = """<style> div[data-testid*="stButton"] > button { margin: 1px 1px !important; padding: 1px 0px !important; height: 38px !important; font-size: 0.9em !important; min-width: 30px !important; } </style>"""
+    st.markdown(compact_button_style, unsafe_allow_html=True)
+
+    def get_current_player_name():
+        """Name of the player at the oche."""
+        players = st.session_state.players_selected_for_game
+        return players[st.session_state.current_player_index % len(players)]
+
+    def preview_turn(player, shots_list):
+        """score_turn for darts entered so far, with the player's check-in state; None on a parse error."""
+        return score_turn(
+            st.session_state.player_scores[player], shots_list, st.session_state.check_out_mode,
+            st.session_state.get("check_in_mode", "Straight In"), st.session_state.get("player_opened", {}).get(player, True),
+        )
 
-            st.markdown(f"**{t('enter_score_for')} {current_player_name}**")
+    # --- Scoreboard Cards ---
+    def render_player_card(player, is_current_player):
+        """Draws one player's score box; the current player also gets the live turn score."""
+        border_style = "border: 3px solid #FF4B4B; padding: 5px 8px; border-radius: 5px; background-color: #FFF0F0;" if is_current_player else "border: 1px solid #ccc; padding: 5px 8px; border-radius: 5px;"
+        with st.container():
+            st.markdown(f"<div style='{border_style}'>", unsafe_allow_html=True)
+            profile = get_player_profile(player)
+            st.markdown(f"<h5 style='text-align: center; margin-bottom: 5px; margin-top: 0;'>{'▶️ ' if is_current_player else ''}{profile['label']}</h5>", unsafe_allow_html=True)
+            col_score, col_stats = st.columns([2, 3])
+            with col_score:
+                actual_score = st.session_state.player_scores.get(player, st.session_state.starting_score)
+                display_score_val, score_color = actual_score, "black"; is_potential_bust = False; partial_turn_score = 0;
+                if is_current_player and st.session_state.current_turn_shots:
+                    partial_turn = preview_turn(player, st.session_state.current_turn_shots)
+                    if partial_turn is not None:
+                        partial_turn_score = partial_turn["calculated_score"]
+                        if partial_turn["result"] == "BUST":
+                            display_score_val, score_color, is_potential_bust = "BUST", "red", True
+                        else:
+                            display_score_val = partial_turn["new_score"]
+                st.markdown(f"<h2 style='text-align: center; font-size: 3em; margin-bottom: 0; color: {score_color}; line-height: 1.1;'>{display_score_val}</h2>", unsafe_allow_html=True)
+            with col_stats:
+                darts = st.session_state.player_darts_thrown.get(player, 0)
+                history = st.session_state.player_turn_history.get(player, [])
+                total_score_thrown = sum(t[0] for t in history if len(t)>2 and t[2] != "BUST")
+                avg_3_dart = (total_score_thrown / darts * 3) if darts > 0 else 0.00
+                legs = st.session_state.player_legs_won.get(player, 0)
+                sets = st.session_state.player_sets_won.get(player, 0)
+                rating_line = f"<br>Elo: {profile['rating']}" if profile["rating"] is not None else ""
+                st.markdown(f"""<div style='text-align: left; font-size: 0.9em; padding-top: 15px;'>📊Avg: {avg_3_dart:.2f}<br>Legs: {legs} | Sets: {sets}{rating_line}</div>""", unsafe_allow_html=True)
+
+            turn_total_display = ""
+            if is_current_player and partial_turn_score > 0 and not is_potential_bust:
+                 turn_total_display = f"({partial_turn_score} thrown)"
+            st.markdown(f"<p style='text-align: center; font-size: 1.1em; color: blue; margin-bottom: 2px; height: 1.3em;'>{turn_total_display or '&nbsp;'}</p>", unsafe_allow_html=True)
+            last_shots = st.session_state.player_last_turn_scores.get(player, [])
+            last_turn_str = " ".join(map(str, last_shots)) if last_shots else "-"
+            last_turn_total, _, _, _ = calculate_turn_total(last_shots) if last_shots else (0,0,False, [])
+            st.markdown(f"<p style='text-align: center; font-size: 0.8em; color: grey; margin-bottom: 2px;'>Last: {last_turn_str} ({last_turn_total or 0})</p>", unsafe_allow_html=True)
+
+            if is_current_player:
+                render_suggestions(player)
+
+            st.markdown("</div>", unsafe_allow_html=True) # Close player div
+        st.markdown("<div style='margin-bottom: 8px;'></div>", unsafe_allow_html=True) # Space between players
+
+    def render_suggestions(player):
+        """Hierarchical checkout / setup suggestion for the darts left in the current turn."""
+        suggestion_text = None
+        score_at_turn_start_disp = st.session_state.player_scores.get(player, st.session_state.starting_score)
+        turn_so_far = preview_turn(player, st.session_state.current_turn_shots)
+        # Nothing to suggest until the player has checked in (Double In)
+        if turn_so_far is not None and turn_so_far["opened"]:
+            darts_left_disp = 3 - turn_so_far["darts"]
+            suggestion = get_checkout_suggestion(turn_so_far["new_score"], darts_left_disp, get_player_profile(player)["preferred_doubles"],
+                                                 st.session_state.check_out_mode)
+            if suggestion:
+                suggestion_text = suggestion_html(suggestion)
+
+        # Display the suggestion text or a placeholder
+        if suggestion_text:
+            st.markdown(suggestion_text, unsafe_allow_html=True)
+        elif score_at_turn_start_disp >= 2:
+            # Maintain space only if suggestions could potentially appear
+            st.markdown("<p style='height: 1.9em; margin-top: 5px; margin-bottom: 0;'></p>", unsafe_allow_html=True)
+
+    # --- Cricket Board ---
+    def render_cricket_board():
+        """Marks and points of every player; the current visit is previewed on a copy of the state."""
+        cricket_state = st.session_state.cricket
+        board_state = cricket_state
+        if st.session_state.current_turn_shots:
+            board_state = copy_state(cricket_state)
+            apply_cricket_turn(board_state, st.session_state.current_turn_shots)
+        current_index = cricket_state["current_player_index"]
+        header = "".join(
+            f"<th style='padding: 2px 8px;'>{'▶️ ' if i == current_index else ''}{p}</th>"
+            for i, p in enumerate(cricket_state["players"])
+        )
+        rows = ""
+        for target in CRICKET_TARGETS:
+            label = "Bull" if target == 25 else str(target)
+            cells = "".join(
+                f"<td style='text-align: center; font-size: 1.3em;'>{MARK_SYMBOLS[marks_on(m, target)] or '&nbsp;'}</td>"
+                for m in board_state["marks"]
+            )
+            rows += f"<tr><td style='font-weight: bold; padding: 2px 8px;'>{label}</td>{cells}</tr>"
+        points = "".join(f"<td style='text-align: center; font-size: 1.5em; font-weight: bold;'>{p}</td>" for p in board_state["points"])
+        mpr = "".join(
+            f"<td style='text-align: center; font-size: 0.8em; color: grey;'>MPR {marks_per_round(m, d):.2f}</td>"
+            for m, d in zip(board_state["marks_scored"], board_state["darts_thrown"])
+        )
+        st.markdown(
+            f"<table style='width: 100%;'><tr><th></th>{header}</tr>{rows}"
+            f"<tr><td>{t('points')}</td>{points}</tr><tr><td></td>{mpr}</tr></table>",
+            unsafe_allow_html=True,
+        )
 
-            if "pending_modifier" not in st.session_state:
+    # --- Keypad ---
+    # Keypad buttons use on_click callbacks: the state is updated before the fragment
+    # reruns, so a dart costs one fragment run instead of a run plus st.rerun().
+    def toggle_modifier(modifier):
+        st.session_state.pending_modifier = None if st.session_state.pending_modifier == modifier else modifier
+
+    def remove_last_input():
+        if st.session_state.pending_modifier:
+            st.session_state.pending_modifier = None
+        elif st.session_state.current_turn_shots:
+            st.session_state.current_turn_shots.pop()
+
+    def enter_dart(num_val):
+        if len(st.session_state.current_turn_shots) >= 3:
+            return
+        final_shot_str, warning = keypad_shot(num_val, st.session_state.pending_modifier)
+        if warning:
+            st.session_state.keypad_warning = warning
+            return
+
+        st.session_state.current_turn_shots.append(final_shot_str)
+        st.session_state.pending_modifier = None
+        shots_so_far = st.session_state.current_turn_shots
+        if st.session_state.game_mode == "Cricket":
+            if len(shots_so_far) == 3 or cricket_turn_wins(st.session_state.cricket, shots_so_far):
+                st.session_state.turn_ready = True
+            return
+        turn_so_far = preview_turn(get_current_player_name(), shots_so_far)
+        if turn_so_far is None: # Check calculation success
+            st.session_state.keypad_warning = "Score calc error after input."
+            return
+        # Process turn if 3 darts OR a win that the check-in / check-out rules allow
+        if len(shots_so_far) == 3 or turn_so_far["result"] == "WIN":
+            st.session_state.turn_ready = True
+
+    def submit_fast_entry():
+        """Takes a whole visit from the fast-entry box and processes it like a completed keypad turn."""
+        text = st.session_state.get("fast_entry_text", "").strip()
+        st.session_state.fast_entry_text = ""
+        if not text:
+            return
+        player = get_current_player_name()
+        if st.session_state.game_mode == "Cricket":
+            shots, error = split_visit(text)
+            if shots and len(shots) < 3 and not cricket_turn_wins(st.session_state.cricket, shots):
+                shots, error = None, "Enter all three darts (0 for a miss)."
+        else:
+            shots, error = parse_visit(text, st.session_state.player_scores[player], st.session_state.check_out_mode,
+                                       st.session_state.get("check_in_mode", "Straight In"),
+                                       st.session_state.get("player_opened", {}).get(player, True))
+        if error:
+            st.session_state.keypad_warning = error
+            return
+        st.session_state.current_turn_shots = shots # Replaces darts entered on the keypad
+        st.session_state.pending_modifier = None
+        st.session_state.visit_entered_as_total = text.isdigit() and st.session_state.game_mode != "Cricket"
+        st.session_state.turn_ready = True
+
+    def render_keypad():
+        """Dart entry. Darts within a turn rerun only the live turn fragment; a finished turn reruns the page."""
+        current_player_name = get_current_player_name()
+        if st.session_state.get("turn_ready"):
+            st.session_state.turn_ready = False
+            process_turn(current_player_name, st.session_state.current_turn_shots)
+            # run_turn_processing reruns the whole page when the turn advances
+        if st.session_state.get("keypad_warning"):
+            st.warning(st.session_state.keypad_warning)
+            st.session_state.keypad_warning = None
+
+        st.markdown(f"**{t('enter_score_for')} {current_player_name}**")
+
+        if "pending_modifier" not in st.session_state:
+            st.session_state.pending_modifier = None
+        modifier_indicator = ""
+        if st.session_state.pending_modifier == "D":
+             modifier_indicator = " [**DBL**]"
+        elif st.session_state.pending_modifier == "T":
+             modifier_indicator = " [**TPL**]"
+        st.markdown(f"**Input:** `{ ' | '.join(st.session_state.current_turn_shots) }`{modifier_indicator}")
+        # One submission per visit instead of up to six keypad presses
+        st.text_input(t("fast_entry"), key="fast_entry_text", placeholder="T20 T19 D12 / 140", help=t("fast_entry_help"),
+                      on_change=submit_fast_entry)
+        num_darts_entered = len(st.session_state.current_turn_shots)
+        st.caption(f"{t('dart')} {num_darts_entered + 1} / 3")
+        input_disabled = num_darts_entered >= 3
+
+        st.markdown("<div style='margin-bottom: 2px;'></div>", unsafe_allow_html=True)
+        cols_action = st.columns(4)
+        double_btn_type = "primary" if st.session_state.pending_modifier == "D" else "secondary"
+        cols_action[0].button(f"🟡 {t('double')}", key="pad_btn_D", help=t('set_double'), use_container_width=True, type=double_btn_type, disabled=input_disabled,
+                              on_click=toggle_modifier, args=("D",))
+        triple_btn_type = "primary" if st.session_state.pending_modifier == "T" else "secondary"
+        cols_action[1].button(f"🟠 {t('triple')}", key="pad_btn_T", help=t('set_triple'), use_container_width=True, type=triple_btn_type, disabled=input_disabled,
+                              on_click=toggle_modifier, args=("T",))
+        cols_action[2].button(f"⬅️ {t('back')}", key="pad_btn_back", help=t('remove_last'), use_container_width=True,
+                              on_click=remove_last_input)
+        can_undo = st.session_state.get("state_before_last_turn") is not None
+        if cols_action[3].button(f"↩️ {t('undo')}", key="pad_btn_undo", help=t('undo_last_turn'), use_container_width=True, disabled=not can_undo):
+            if st.session_state.state_before_last_turn and "cricket" in st.session_state.state_before_last_turn:
+                state = st.session_state.state_before_last_turn
+                undo_index = state["cricket"]["current_player_index"]
+                undo_player_name = state["cricket"]["players"][undo_index]
+                # Take back the marks and darts the undone visit added to the stats
+                undo_stats = users[st.session_state.username]["player_stats"].get(undo_player_name)
+                if undo_stats is not None:
+                    cricket_now = st.session_state.cricket
+                    undo_stats["cricket_marks"] -= cricket_now["marks_scored"][undo_index] - state["cricket"]["marks_scored"][undo_index]
+                    undo_stats["cricket_darts"] -= cricket_now["darts_thrown"][undo_index] - state["cricket"]["darts_thrown"][undo_index]
+                remove_darts(st.session_state.username, users[st.session_state.username], undo_player_name, state.get("logged_shots", []))
+                game_record = find_game(users, st.session_state.username, st.session_state.get("current_game_id"))
+                if game_record is not None and game_record["turns"]:
+                    game_record["turns"].pop()
+                    drop_stale_checkpoint(game_record)
+                save_users(users)
+                st.session_state.cricket = state["cricket"]
+                st.session_state.current_player_index = undo_index
+                st.session_state.current_turn_shots = state["current_turn_shots_processed"]
                 st.session_state.pending_modifier = None
-            modifier_indicator = ""
-            if st.session_state.pending_modifier == "D":
-                 modifier_indicator = " [**DBL**]"
-            elif st.session_state.pending_modifier == "T":
-                 modifier_indicator = " [**TPL**]"
-            st.markdown(f"**Input:** `{ ' | '.join(st.session_state.current_turn_shots) }`{modifier_indicator}")
-            num_darts_entered = len(st.session_state.current_turn_shots)
-            st.caption(f"{t('dart')} {num_darts_entered + 1} / 3")
-            input_disabled = num_darts_entered >= 3
-
-            compact_button_style = """<style> div[data-testid*="stButton"] > button { margin: 1px 1px !important; padding: 1px 0px !important; height: 38px !important; font-size: 0.9em !important; min-width: 30px !important; } </style>"""
-            st.markdown(compact_button_style, unsafe_allow_html=True)
-
-            st.markdown("<div style='margin-bottom: 2px;'></div>", unsafe_allow_html=True)
-            cols_action = st.columns(4)
-            double_btn_type = "primary" if st.session_state.pending_modifier == "D" else "secondary"
-            if cols_action[0].button(f"🟡 {t('double')}", key="pad_btn_D", help=t('set_double'), use_container_width=True, type=double_btn_type, disabled=input_disabled):
-                st.session_state.pending_modifier = None if st.session_state.pending_modifier == "D" else "D"
+                st.session_state.message = f"Undid turn."
+                st.session_state.state_before_last_turn = None
                 st.rerun()
-            triple_btn_type = "primary" if st.session_state.pending_modifier == "T" else "secondary"
-            if cols_action[1].button(f"🟠 {t('triple')}", key="pad_btn_T", help=t('set_triple'), use_container_width=True, type=triple_btn_type, disabled=input_disabled):
+            elif st.session_state.state_before_last_turn:
+                state = st.session_state.state_before_last_turn
+                undo_player_name = state["player_name"]
+                undo_player_index = state["player_index"]
+                # Restore state values
+                st.session_state.current_player_index = undo_player_index
+                st.session_state.player_scores[undo_player_name] = state["score_before"]
+                st.session_state.player_darts_thrown[undo_player_name] = state["darts_thrown_player_before"]
+                # Simple history removal
+                if st.session_state.player_turn_history.get(undo_player_name):
+                     st.session_state.player_turn_history[undo_player_name].pop()
+                # Drop the recorded turn so replays match the scoreboard
+                game_record = find_game(users, st.session_state.username, st.session_state.get("current_game_id"))
+                if game_record is not None and game_record["turns"]:
+                    game_record["turns"].pop()
+                    if game_record.get("entered_totals") and game_record["entered_totals"][-1] == len(game_record["turns"]):
+                        game_record["entered_totals"].pop()
+                    drop_stale_checkpoint(game_record)
+                remove_darts(st.session_state.username, users[st.session_state.username], undo_player_name, state.get("logged_shots", []))
+                undo_stats = users[st.session_state.username]["player_stats"].get(undo_player_name)
+                if undo_stats is not None:
+                    add_double_attempts(undo_stats, state.get("double_attempts", []), -1)
+                save_users(users)
+                # Restore input buffer
+                st.session_state.current_turn_shots = state["current_turn_shots_processed"]
+                # Clear displays/flags
+                st.session_state.player_last_turn_scores[undo_player_name] = []
+                st.session_state.leg_over = False
+                st.session_state.set_over = False
+                st.session_state.game_over = False
+                st.session_state.winner = None
+                st.session_state.player_legs_won[undo_player_name] = state["legs_won_before"]
+                st.session_state.player_sets_won[undo_player_name] = state["sets_won_before"]
+                st.session_state.setdefault("player_opened", {})[undo_player_name] = state.get("opened_before", True)
+                st.session_state.pending_modifier = None
+                st.session_state.message = f"Undid turn."
+                st.session_state.state_before_last_turn = None # Consume undo state
+                st.rerun() # Other players and the header change too
+            else:
+                st.warning("Nothing to undo.")
 
-                st.session_state.pending_modifier = None if st.session_state.pending_modifier == "T" else "T"
-                st.rerun()
-            if cols_action[2].button(f"⬅️ {t('back')}", key="pad_btn_back", help=t('remove_last'), use_container_width=True):
-                if st.session_state.pending_modifier:
-                    st.session_state.pending_modifier = None
-                elif st.session_state.current_turn_shots:
-                    st.session_state.current_turn_shots.pop()
-                st.rerun()
-            can_undo = st.session_state.get("state_before_last_turn") is not None
-            if cols_action[3].button(f"↩️ {t('undo')}", key="pad_btn_undo", help=t('undo_last_turn'), use_container_width=True, disabled=not can_undo):
-                if st.session_state.state_before_last_turn:
-                    state = st.session_state.state_before_last_turn
-                    undo_player_name = state["player_name"]
-                    undo_player_index = state["player_index"]
-                    # Restore state values
-                    st.session_state.current_player_index = undo_player_index
-                    st.session_state.player_scores[undo_player_name] = state["score_before"]
-                    st.session_state.player_darts_thrown[undo_player_name] = state["darts_thrown_player_before"]
-                    # Simple history removal
-                    if st.session_state.player_turn_history.get(undo_player_name):
-                         st.session_state.player_turn_history[undo_player_name].pop()
-                    # Restore input buffer
-                    st.session_state.current_turn_shots = state["current_turn_shots_processed"]
-                    # Clear displays/flags
-                    st.session_state.player_last_turn_scores[undo_player_name] = []
-                    st.session_state.leg_over = False
-                    st.session_state.set_over = False
-                    st.session_state.game_over = False
-                    st.session_state.winner = None
-                    st.session_state.player_legs_won[undo_player_name] = state["legs_won_before"]
-                    st.session_state.player_sets_won[undo_player_name] = state["sets_won_before"]
-                    st.session_state.pending_modifier = None
-                    st.session_state.message = f"Undid turn."
-                    st.session_state.state_before_last_turn = None # Consume undo state
-                    st.rerun()
-                else:
-                    st.warning("Nothing to undo.")
-
-            st.markdown("<div style='margin-top: 3px;'></div>", unsafe_allow_html=True)
-            keypad_numbers = list(range(1, 21)) + [25, 0]
-            num_cols = 4
-            rows_of_numbers = [keypad_numbers[i:i + num_cols] for i in range(0, len(keypad_numbers), num_cols)]
-            for row in rows_of_numbers:
-                cols = st.columns(num_cols)
-                for i, num_val in enumerate(row):
-                     if i < len(cols):
-                        num_str = str(num_val)
-                        is_miss_button = (num_val == 0)
-                        button_text = t('miss') if is_miss_button else num_str
-                        if cols[i].button(button_text, key=f"pad_btn_{num_val}", use_container_width=True, disabled=input_disabled):
-                            if len(st.session_state.current_turn_shots) < 3:
-                                modifier = st.session_state.pending_modifier
-                                final_shot_str = num_str
-                                valid_combination = True
-                                if modifier == "T":
-                                    if num_val <= 0 or num_val > 20:
-                                        st.warning("T only 1-20")
-                                        valid_combination = False
-                                    else:
-                                        final_shot_str = "T" + num_str
-                                elif modifier == "D":
-                                    if num_val <= 0 or (num_val > 20 and num_val != 25):
-                                        st.warning("D only 1-20, 25")
-                                        valid_combination = False
-                                    else:
-                                        final_shot_str = "D" + num_str
-
-                                if valid_combination:
-                                    st.session_state.current_turn_shots.append(final_shot_str)
-                                    st.session_state.pending_modifier = None
-                                    shots_so_far = st.session_state.current_turn_shots
-                                    num_darts_now = len(shots_so_far)
-                                    # Need player name for score lookup and processing call
-                                    current_player_name_for_calc = "N/A"
-                                    if st.session_state.players_selected_for_game:
-                                        if len(st.session_state.players_selected_for_game) > 0: # Check list not empty
-                                            idx_safe = st.session_state.current_player_index % len(st.session_state.players_selected_for_game)
-                                            current_player_name_for_calc = st.session_state.players_selected_for_game[idx_safe]
-
-                                    if current_player_name_for_calc != "N/A":
-                                        current_score_value, _, _, _ = calculate_turn_total(shots_so_far)
-                                        if current_score_value is not None: # Check calculation success
-                                            potential_score_after_turn = st.session_state.player_scores[current_player_name_for_calc] - current_score_value
-                                            is_potential_win = (potential_score_after_turn == 0)
-                                            # Check checkout validity of THIS dart
-                                            _, last_dart_double_flag_check, _, _ = parse_score_input(final_shot_str)
-                                            is_valid_checkout = (st.session_state.check_out_mode != "Double Out" or last_dart_double_flag_check)
-
-                                            # Process turn if 3 darts OR valid win
-                                            if num_darts_now == 3 or (is_potential_win and is_valid_checkout):
-                                                run_turn_processing(current_player_name_for_calc, shots_so_far)
-                                                # run_turn_processing handles rerun
-                                            else:
-                                                st.rerun() # Rerun to update live score etc.
-                                        else:
-                                            st.error("Score calc error after input.") # Handle calculation error
-                                    else:
-                                         st.error("Current player error.") # Handle case player name unknown
-            st.markdown("---")
+        st.markdown("<div style='margin-top: 3px;'></div>", unsafe_allow_html=True)
+        render_number_pad(enter_dart, "pad_btn_", input_disabled)
+        st.markdown("---")
 
-        else: # If game is over
-            st.info(t('game_over_start_new'))
-        if st.session_state.message:
-            st.toast(st.session_state.message)
-            st.session_state.message = ""
+    # --- Fragments ---
+    @st.fragment
+    def live_turn_panel():
+        """Current player card, suggestions and keypad: the only things a dart changes."""
+        card_col, keypad_col = st.columns([2, 1.2])
+        with card_col:
+            st.subheader("Scores")
+            if is_cricket:
+                render_cricket_board() # One table for all players
+            else:
+                render_player_card(get_current_player_name(), True)
+        with keypad_col:
+            render_keypad()
+        publish_spectator_state() # Every dart; unchanged states send nothing
+
+    @st.fragment
+    def other_players_panel():
+        """Waiting players; their cards only change when a turn ends, which reruns the page."""
+        other_players = [p for p in st.session_state.players_selected_for_game if p != get_current_player_name()]
+        if other_players:
+            player_cols = st.columns(min(len(other_players), 4))
+            for i, player in enumerate(other_players):
+                with player_cols[i % len(player_cols)]:
+                    render_player_card(player, False)
+
+    live_turn_panel()
+    if not is_cricket:
+        other_players_panel()
+
+    if st.session_state.message:
+        st.toast(st.session_state.message)
+        st.session_state.message = ""
 
 # --- Fallback for Unknown Page State ---
 elif st.session_state.logged_in:
@@ -0,0 +1,599 @@
+"""Local JSON / WebSocket scoring API for electronic boards and tablets.
+
+Usage:
+    python api_server.py --port 8765 --data user_data.json
+
+Runs X01 matches with the same rules as the Game page (``dart_engine``) and
+records games, stats, checkout logs and ratings in the same user data file.
+Only the standard library is used: one asyncio event loop serves every match.
+Accounts are not kept in memory: each save reads the file again and replays
+the turns scored since the last save, so changes made in the app meanwhile
+(new players, other games) are kept.
+
+HTTP (JSON bodies and responses):
+    POST   /matches                  {"account", "password", "players", "starting_score", ...}
+                                     -> {"match_id", "token", "state"}
+    GET    /matches/<id>             -> {"state"}
+    POST   /matches/<id>/darts       {"dart": "T20"}      one dart, the turn is scored after 3 darts or a win
+    DELETE /matches/<id>/darts       removes the last dart of the current turn
+    POST   /matches/<id>/turns       {"darts": ["T20", "T20", "20"]} or {"visit": "140"} (darts or a total)
+    GET    /matches/<id>/suggestion  -> {"suggestion"}
+Every call except creating a match needs the match token, as an
+``X-Match-Token`` header or a ``?token=`` query parameter.
+
+WebSocket: ``GET /matches/<id>/ws?token=...`` upgrades the connection. Send
+the same requests as JSON text messages (``{"dart": "T20"}``,
+``{"darts": [...]}``, ``{"visit": "..."}``, ``{"undo_dart": true}``, ``{"get": "state"}``); every
+connected socket of the match receives the new state after each change.
+
+Spectators: ``/spectate/<id>`` is a read-only live page fed with deltas
+(see ``broadcast.py``); it needs no token.
+"""
+import argparse
+import asyncio
+import base64
+import copy
+import hashlib
+import json
+import os
+import secrets
+import struct
+import sys
+import time
+from urllib.parse import urlsplit, parse_qs
+
+from dart_engine import (
+    CHECK_IN_MODES, CHECK_OUT_MODES, DEFAULT_PREFERRED_DOUBLES,
+    is_valid_start_score, new_match_state, apply_turn, score_turn, get_checkout_suggestion, parse_visit,
+)
+from broadcast import BroadcastHub, serve_spectator, spectator_page_response
+from dart_log import DART_LOG_DIR, add_to_histogram, append_to_log, segment_codes
+from head_to_head import update_head_to_head
+from indexes import finish_game
+from ratings import update_ratings
+from shared_tables import TABLES_FILE, attach as attach_checkout_tables
+from trends import update_trends
+from user_store import LazyUsers, hash_password, apply_turn_stats, checkout_log_entry, player_profiles
+
+SAVE_DELAY = 0.5 # Seconds; changes within this window are written in one save
+SAVE_RETRIES = 5 # Attempts per save when the app keeps saving the same file
+MATCH_IDLE_TIMEOUT = 2 * 3600 # Seconds without requests after which an unwatched match is dropped
+SWEEP_INTERVAL = 60 # Seconds between checks for finished or idle matches
+MAX_BODY = 64 * 1024
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large"}
+
+
+class ApiError(Exception):
+    """An error answered with an HTTP status and a JSON message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def store_game(account, game):
+    """Puts a copy of a match's game record into the account, replacing an older copy. Returns the copy."""
+    game = copy.deepcopy(game)
+    games = account.setdefault("games", [])
+    for i in range(len(games) - 1, -1, -1): # A live game is near the end
+        if isinstance(games[i], dict) and games[i].get("id") == game["id"]:
+            games[i] = game
+            return game
+    games.append(game)
+    return game
+
+
+# --- Matches ---
+class ScoringService:
+    """All live matches of the process. Account changes wait in a queue until the next save."""
+
+    def __init__(self, data_path, hub=None):
+        self.data_path = data_path
+        self.matches = {}
+        self.hub = hub
+        self.log_dir = os.path.join(os.path.dirname(os.path.abspath(data_path)), DART_LOG_DIR)
+        self._pending = {} # account -> [update(account), ...] not saved yet
+        self._save_handle = None
+
+    def load_account(self, account_name):
+        """The account as it is in the data file right now, or None."""
+        users = LazyUsers(self.data_path)
+        return users[account_name] if isinstance(account_name, str) and account_name in users else None
+
+    def queue_update(self, account_name, update):
+        """Queues ``update(account)``; ``save_now`` applies the queue to a fresh read of the account."""
+        self._pending.setdefault(account_name, []).append(update)
+        self.schedule_save()
+
+    def create_match(self, request):
+        account_name = request.get("account")
+        account = self.load_account(account_name)
+        if account is None or account["password"] != hash_password(str(request.get("password", ""))):
+            raise ApiError(401, "invalid account or password")
+        players = request.get("players")
+        if not isinstance(players, list) or not players or not all(isinstance(p, str) and p for p in players):
+            raise ApiError(400, "players must be a non-empty list of names")
+        unknown = [p for p in players if p not in account.get("player_stats", {})]
+        if unknown:
+            raise ApiError(400, f"unknown players: {', '.join(unknown)}")
+        settings = {
+            "starting_score": request.get("starting_score", 501),
+            "check_out_mode": request.get("check_out_mode", "Double Out"),
+            "check_in_mode": request.get("check_in_mode", "Straight In"),
+            "set_leg_rule": request.get("set_leg_rule", "First to"),
+            "sets_to_play": request.get("sets_to_play", 1),
+            "legs_to_play": request.get("legs_to_play", 1),
+        }
+        if not is_valid_start_score(settings["starting_score"]):
+            raise ApiError(400, "invalid starting_score")
+        if settings["check_out_mode"] not in CHECK_OUT_MODES or settings["check_in_mode"] not in CHECK_IN_MODES:
+            raise ApiError(400, "invalid check-in or check-out mode")
+        if settings["set_leg_rule"] not in ("First to", "Best of"):
+            raise ApiError(400, "invalid set_leg_rule")
+        for key in ("sets_to_play", "legs_to_play"):
+            if not isinstance(settings[key], int) or settings[key] < 1:
+                raise ApiError(400, f"invalid {key}")
+
+        # Recorded like a game started from the Homepage, so replay and stats see it
+        game_record = {
+            "id": f"{int(time.time() * 1000)}-{secrets.token_hex(3)}",
+            "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "mode": "X01",
+            "players": list(players),
+            "settings": settings,
+            "turns": [],
+            "finished": False,
+            "winner": None,
+            "source": "api",
+        }
+        self.queue_update(account_name, lambda account: store_game(account, game_record))
+        match = {
+            "id": game_record["id"],
+            "account": account_name,
+            "token": secrets.token_urlsafe(16),
+            "state": new_match_state(players, settings["starting_score"], settings["check_out_mode"], settings["set_leg_rule"],
+                                     settings["sets_to_play"], settings["legs_to_play"], settings["check_in_mode"]),
+            "game": game_record,
+            "profiles": player_profiles(account, players),
+            "sockets": set(),
+            "last_active": time.monotonic(),
+        }
+        self.matches[match["id"]] = match
+        return match
+
+    def get_match(self, match_id, token):
+        match = self.matches.get(match_id)
+        if match is None:
+            raise ApiError(404, "no such match")
+        if not token or not secrets.compare_digest(token, match["token"]):
+            raise ApiError(401, "invalid match token")
+        match["last_active"] = time.monotonic()
+        return match
+
+    def evict_matches(self):
+        """Drops matches nobody is connected to: finished ones once saved, others after MATCH_IDLE_TIMEOUT.
+
+        An idle match is marked abandoned in the data file, like a game quit in the app.
+        """
+        now = time.monotonic()
+        for match in list(self.matches.values()):
+            if any(not writer.is_closing() for writer in match["sockets"]):
+                continue
+            if match["state"]["game_over"]:
+                if match["account"] in self._pending: # The finishing turn isn't saved yet
+                    continue
+            elif now - match["last_active"] > MATCH_IDLE_TIMEOUT:
+                game = match["game"]
+                game["abandoned"] = True
+                self.queue_update(match["account"], lambda account, game=game: store_game(account, game))
+            else:
+                continue
+            del self.matches[match["id"]]
+            if self.hub is not None:
+                self.hub.discard(match["id"])
+
+    # --- Scoring ---
+    def current_player(self, match):
+        players = match["state"]["players_selected_for_game"]
+        return players[match["state"]["current_player_index"] % len(players)]
+
+    def add_dart(self, match, dart):
+        """Buffers one dart and scores the turn after the third dart or a legal finish."""
+        state = match["state"]
+        if state["game_over"]:
+            raise ApiError(409, "match is over")
+        if len(state["current_turn_shots"]) >= 3:
+            raise ApiError(409, "turn already has 3 darts, remove one first")
+        player = self.current_player(match)
+        shots = state["current_turn_shots"] + [str(dart)]
+        preview = self._preview(state, player, shots)
+        if preview is None:
+            raise ApiError(400, f"invalid dart {dart!r}")
+        state["current_turn_shots"] = shots
+        if len(shots) == 3 or preview["result"] == "WIN":
+            return self.process_turn(match, list(shots))
+        return None
+
+    def remove_dart(self, match):
+        state = match["state"]
+        if not state["current_turn_shots"]:
+            raise ApiError(409, "no darts to remove")
+        state["current_turn_shots"].pop()
+
+    def add_turn(self, match, darts):
+        if match["state"]["game_over"]:
+            raise ApiError(409, "match is over")
+        if not isinstance(darts, list) or not 1 <= len(darts) <= 3:
+            raise ApiError(400, "darts must be a list of 1 to 3 darts")
+        darts = [str(d) for d in darts]
+        preview = self._preview(match["state"], self.current_player(match), darts)
+        if preview is None:
+            raise ApiError(400, "invalid dart in turn")
+        if len(darts) < 3 and preview["result"] == "OK":
+            # Would leave the visit open; single darts go through /darts
+            raise ApiError(400, "enter all three darts (0 for a miss)")
+        return self.process_turn(match, darts)
+
+    def add_visit(self, match, text):
+        """A whole visit typed as darts or as a total, validated with the Game page's fast-entry rules."""
+        if match["state"]["game_over"]:
+            raise ApiError(409, "match is over")
+        state = match["state"]
+        player = self.current_player(match)
+        darts, error = parse_visit(str(text), state["player_scores"][player], state["check_out_mode"],
+                                   state.get("check_in_mode", "Straight In"), state["player_opened"].get(player, True))
+        if error:
+            raise ApiError(400, error)
+        return self.process_turn(match, darts, entered_total=str(text).strip().isdigit())
+
+    def _preview(self, state, player, shots):
+        return score_turn(state["player_scores"][player], shots, state["check_out_mode"],
+                          state.get("check_in_mode", "Straight In"), state["player_opened"].get(player, True))
+
+    def process_turn(self, match, shots, entered_total=False):
+        """Scores a visit and records it the same way as the Game page's run_turn_processing."""
+        state = match["state"]
+        player = self.current_player(match)
+        player_index = state["current_player_index"]
+        score_before = state["player_scores"][player]
+        leg_before, set_before = state["current_leg"], state["current_set"]
+        outcome = apply_turn(state, player, shots)
+        if outcome is None:
+            raise ApiError(400, "invalid dart in turn")
+
+        log_entry = checkout_log_entry(player, score_before, shots, outcome, state["check_out_mode"],
+                                       state["starting_score"], leg_before, set_before, time.strftime("%Y-%m-%d %H:%M:%S"))
+        if entered_total:
+            outcome["double_attempts"] = [] # Made-up darts
+        game = match["game"]
+        game["turns"].append([player_index, list(shots)])
+        codes = b""
+        if entered_total:
+            game.setdefault("entered_totals", []).append(len(game["turns"]) - 1)
+        elif outcome["advanced"]:
+            codes = segment_codes(shots)
+            append_to_log(match["account"], player, codes, self.log_dir)
+        if outcome["game_won"]:
+            finish_game(game, player)
+        players = list(state["players_selected_for_game"])
+
+        def update(account):
+            if log_entry:
+                account.setdefault("checkout_log", []).append(log_entry)
+            apply_turn_stats(account, player, outcome, players)
+            if codes and player in account["player_stats"]:
+                add_to_histogram(account["player_stats"][player].setdefault("segment_hits", []), codes)
+            stored = store_game(account, game)
+            if outcome["game_won"]:
+                update_ratings(account, stored)
+                update_trends(account, stored)
+                update_head_to_head(account, stored)
+
+        self.queue_update(match["account"], update)
+        return dict(outcome, player=player)
+
+    def suggestion(self, match):
+        state = match["state"]
+        if state["game_over"]:
+            return None
+        player = self.current_player(match)
+        preview = self._preview(state, player, state["current_turn_shots"])
+        if preview is None or not preview["opened"]:
+            return None
+        prefs = match["profiles"][player]["preferred_doubles"] if player in match["profiles"] else DEFAULT_PREFERRED_DOUBLES
+        return get_checkout_suggestion(preview["new_score"], 3 - preview["darts"], set(prefs), state["check_out_mode"])
+
+    def match_view(self, match, last_turn=None):
+        """JSON-ready state of a match."""
+        view = {key: value for key, value in match["state"].items()}
+        view["match_id"] = match["id"]
+        view["current_player"] = None if view["game_over"] else self.current_player(match)
+        view["suggestion"] = self.suggestion(match)
+        if last_turn is not None:
+            view["last_turn"] = last_turn
+        return view
+
+    # --- Saving ---
+    def schedule_save(self):
+        """Coalesces saves: the file is written once, SAVE_DELAY after the first change."""
+        if self._save_handle is None:
+            self._save_handle = asyncio.get_running_loop().call_later(SAVE_DELAY, self.save_now)
+
+    def save_now(self):
+        """Reads the accounts again, applies the queued updates and saves, retrying if the app saved in between."""
+        self._save_handle = None
+        pending, self._pending = self._pending, {}
+        try:
+            for _ in range(SAVE_RETRIES):
+                users = LazyUsers(self.data_path)
+                for account_name, updates in pending.items():
+                    if account_name in users: # Not deleted in the app meanwhile
+                        for update in updates:
+                            update(users[account_name])
+                if users.save(only_if_unchanged=True):
+                    return True
+            raise OSError("the file kept changing")
+        except Exception as e: # Runs from call_later: nothing above would see it, and the turns must not be lost
+            print(f"Failed to save user data: {e!r}", file=sys.stderr)
+            for account_name, updates in pending.items(): # Keep them for the next attempt
+                self._pending[account_name] = updates + self._pending.get(account_name, [])
+            self.schedule_save()
+            return False
+
+    async def sweep(self):
+        """Evicts finished and idle matches every SWEEP_INTERVAL seconds."""
+        while True:
+            await asyncio.sleep(SWEEP_INTERVAL)
+            self.evict_matches()
+
+
+# --- HTTP ---
+async def read_request(reader):
+    """Reads one HTTP/1.1 request. Returns (method, path, query, headers, body) or None on EOF."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise ApiError(400, "malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0) or 0)
+    if length > MAX_BODY:
+        raise ApiError(413, "request body too large")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    return method.upper(), url.path, query, headers, body
+
+
+def http_response(status, payload, keep_alive=True):
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+def parse_json_body(body):
+    if not body:
+        return {}
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        raise ApiError(400, "body is not valid JSON")
+    if not isinstance(data, dict):
+        raise ApiError(400, "body must be a JSON object")
+    return data
+
+
+def route(service, method, path, query, headers, body):
+    """Handles one HTTP request. Returns (status, payload)."""
+    parts = [p for p in path.split("/") if p]
+    if parts == ["matches"]:
+        if method != "POST":
+            raise ApiError(405, "use POST to create a match")
+        match = service.create_match(parse_json_body(body))
+        return 201, {"match_id": match["id"], "token": match["token"], "state": service.match_view(match)}
+    if len(parts) < 2 or parts[0] != "matches":
+        raise ApiError(404, "not found")
+    match = service.get_match(parts[1], headers.get("x-match-token") or query.get("token"))
+    action = parts[2] if len(parts) > 2 else None
+    if action is None and method == "GET":
+        return 200, {"state": service.match_view(match)}
+    if action == "suggestion" and method == "GET":
+        return 200, {"suggestion": service.suggestion(match)}
+    if action == "darts" and method == "POST":
+        turn = service.add_dart(match, parse_json_body(body).get("dart"))
+        notify_sockets(service, match, turn)
+        return 200, {"state": service.match_view(match, turn)}
+    if action == "darts" and method == "DELETE":
+        service.remove_dart(match)
+        notify_sockets(service, match)
+        return 200, {"state": service.match_view(match)}
+    if action == "turns" and method == "POST":
+        request = parse_json_body(body)
+        turn = service.add_visit(match, request["visit"]) if "visit" in request else service.add_turn(match, request.get("darts"))
+        notify_sockets(service, match, turn)
+        return 200, {"state": service.match_view(match, turn)}
+    raise ApiError(405 if action in (None, "suggestion", "darts", "turns") else 404, "unsupported request")
+
+
+# --- WebSocket ---
+def websocket_frame(text):
+    """Encodes a server-to-client text frame (unmasked)."""
+    data = text.encode()
+    if len(data) < 126:
+        header = struct.pack("!BB", 0x81, len(data))
+    elif len(data) < 1 << 16:
+        header = struct.pack("!BBH", 0x81, 126, len(data))
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, len(data))
+    return header + data
+
+
+async def read_websocket_frame(reader):
+    """Returns (opcode, payload) of the next client frame."""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_BODY:
+        raise ApiError(413, "frame too large")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+def notify_sockets(service, match, turn=None):
+    """Pushes the new state to every WebSocket connected to the match and to its spectators."""
+    if service.hub is not None:
+        service.hub.publish(match["id"], match["state"])
+    if not match["sockets"]:
+        return
+    frame = websocket_frame(json.dumps({"state": service.match_view(match, turn)}))
+    for writer in list(match["sockets"]):
+        if writer.is_closing():
+            match["sockets"].discard(writer)
+        else:
+            writer.write(frame)
+
+
+def handle_websocket_message(service, match, message):
+    """Applies one WebSocket request. Returns the reply payload for the sender (None if broadcast covers it)."""
+    request = parse_json_body(message)
+    if "dart" in request:
+        notify_sockets(service, match, service.add_dart(match, request["dart"]))
+    elif "darts" in request:
+        notify_sockets(service, match, service.add_turn(match, request["darts"]))
+    elif "visit" in request:
+        notify_sockets(service, match, service.add_visit(match, request["visit"]))
+    elif request.get("undo_dart"):
+        service.remove_dart(match)
+        notify_sockets(service, match)
+    else:
+        return {"state": service.match_view(match)}
+    return None
+
+
+def websocket_handshake(headers, writer):
+    """Answers a WebSocket upgrade request."""
+    key = headers.get("sec-websocket-key")
+    if not key:
+        raise ApiError(400, "missing Sec-WebSocket-Key")
+    accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+    writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+
+
+async def serve_websocket(service, match, headers, reader, writer):
+    websocket_handshake(headers, writer)
+    writer.write(websocket_frame(json.dumps({"state": service.match_view(match)})))
+    match["sockets"].add(writer)
+    try:
+        while True:
+            opcode, payload = await read_websocket_frame(reader)
+            if opcode == 0x8: # Close
+                writer.write(b"\x88\x00")
+                break
+            if opcode == 0x9: # Ping
+                writer.write(struct.pack("!BB", 0x8A, len(payload)) + payload)
+                continue
+            if opcode != 0x1:
+                continue
+            try:
+                reply = handle_websocket_message(service, match, payload)
+            except ApiError as e:
+                reply = {"error": str(e), "status": e.status}
+            if reply is not None:
+                writer.write(websocket_frame(json.dumps(reply)))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        match["sockets"].discard(writer)
+
+
+# --- Server ---
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            request, headers = None, {}
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                parts = [p for p in path.split("/") if p]
+                if parts[:1] == ["spectate"] and len(parts) in (2, 3):
+                    # Read-only feed, open to anyone who knows the game id
+                    if len(parts) == 3 and parts[2] == "ws":
+                        await serve_spectator(service.hub, parts[1], headers, reader, writer)
+                    else:
+                        writer.write(spectator_page_response())
+                        await writer.drain()
+                    break
+                if headers.get("upgrade", "").lower() == "websocket" and path.endswith("/ws"):
+                    match = service.get_match(parts[1] if len(parts) == 3 else "", query.get("token"))
+                    await serve_websocket(service, match, headers, reader, writer)
+                    break
+                status, payload = route(service, method, path, query, headers, body)
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            keep_alive = headers.get("connection", "").lower() != "close" if request else False
+            writer.write(http_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def run_server(host, port, data_path):
+    attach_checkout_tables(os.path.join(os.path.dirname(os.path.abspath(data_path)), TABLES_FILE))
+    service = ScoringService(data_path, BroadcastHub(asyncio.get_running_loop()))
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    print(f"Scoring API on http://{host}:{port} (data: {data_path})")
+    sweeper = asyncio.ensure_future(service.sweep())
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        sweeper.cancel()
+        if service._save_handle is not None:
+            service._save_handle.cancel()
+            service.save_now() # Don't lose the last turns on shutdown
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON / WebSocket scoring API for Darts Counter.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", default="user_data.json", help="user data file shared with the app")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run_server(args.host, args.port, args.data))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Benchmark of the checkout engines, cold and warm.
+
+Usage:
+    python bench_checkouts.py                   # 5 warm runs, 20 us per suggestion budget
+    python bench_checkouts.py --runs 10 --budget 10
+
+A sweep asks ``get_checkout_suggestion`` for every score from 2 to 501, every
+number of darts left and every out rule. Each engine is timed
+    cold    the first sweep after its caches are dropped (building the tables
+            in process, or mapping the ``shared_tables`` file)
+    warm    the median of ``--runs`` further sweeps
+Before anything is timed every engine's suggestions are compared with the
+in-process tables; the script fails (exit code 1) when they differ or when a
+warm suggestion is over the budget. ``tests/test_checkouts.py`` checks the
+suggestions themselves against brute force.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import dart_engine
+import shared_tables
+from dart_engine import CHECK_OUT_MODES, bogie_numbers, checkout_table, get_checkout_suggestion, get_checkouts
+
+DEFAULT_BUDGET = 20.0 # Microseconds per warm suggestion
+SCORES = range(2, 502)
+
+
+def sweep():
+    """Every suggestion once; returns them in a fixed order."""
+    return [get_checkout_suggestion(score, darts_left, check_out_mode=mode)
+            for mode in CHECK_OUT_MODES for score in SCORES for darts_left in (1, 2, 3)]
+
+
+def all_checkouts():
+    return [get_checkouts(score, darts_left, check_out_mode=mode)
+            for mode in CHECK_OUT_MODES for score in SCORES for darts_left in (1, 2, 3)]
+
+
+def use_built():
+    dart_engine.shared_tables = None
+    checkout_table.cache_clear()
+    bogie_numbers.cache_clear()
+
+
+def use_shared(path):
+    def attach():
+        dart_engine.shared_tables = None
+        bogie_numbers.cache_clear()
+        shared_tables.attach(path)
+    return attach
+
+
+def time_engine(start, runs):
+    """(cold seconds, warm seconds per sweep) for an engine set up by ``start``."""
+    begin = time.perf_counter()
+    start()
+    sweep()
+    cold = time.perf_counter() - begin
+    warm = []
+    for _ in range(runs):
+        begin = time.perf_counter()
+        sweep()
+        warm.append(time.perf_counter() - begin)
+    return cold, statistics.median(warm)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the checkout engines and check they agree.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="warm budget per suggestion in microseconds")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, shared_tables.TABLES_FILE)
+        shared_tables.publish(path)
+        engines = {"built": use_built, "shared": use_shared(path)}
+
+        use_built()
+        reference = (all_checkouts(), sweep())
+        failed = False
+        for name, start in engines.items():
+            start()
+            if (all_checkouts(), sweep()) != reference:
+                print(f"FAIL: {name} suggestions differ from the built tables")
+                failed = True
+
+        calls = len(reference[1])
+        for name, start in engines.items():
+            cold, warm = time_engine(start, args.runs)
+            per_call = warm / calls * 1e6
+            print(f"{name:8} cold {cold * 1000:8.1f} ms   warm {warm * 1000:6.1f} ms / {calls} suggestions ({per_call:.1f} us each)")
+            if per_call > args.budget:
+                print(f"FAIL: {name} warm {per_call:.1f} us per suggestion is over the {args.budget:.1f} us budget")
+                failed = True
+        dart_engine.shared_tables = None
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Cold-start benchmark for the login page.
+
+Usage:
+    python bench_startup.py                 # 5 cold starts, 3.0 s budget
+    python bench_startup.py --runs 10 --budget 2.5
+
+Every run starts a fresh Python process that renders the login page with
+Streamlit's AppTest in an empty temp directory, the same work a new container
+does for its first request. The script fails (exit code 1) when the median
+exceeds the budget or when pandas / matplotlib were imported, since only the
+Statistics page may load them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ["pandas", "matplotlib"]
+DEFAULT_BUDGET = 3.0 # Seconds, median of the cold starts
+
+# Runs inside the fresh process; prints the timing and the heavy modules it found
+CHILD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1]).run(timeout=60)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "errors": [str(e.value) for e in at.exception],
+    "heavy": [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+
+def cold_start(app_path):
+    """Renders the login page once in a new interpreter. Returns the child's result dict."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        # An empty working directory so the run never touches a real user_data.json
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT, app_path] + HEAVY_MODULES,
+            cwd=work_dir, capture_output=True, text=True, check=True,
+        )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the login page cold start.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="median budget in seconds")
+    args = parser.parse_args(argv)
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Dartapp.py")
+    results = [cold_start(app_path) for _ in range(args.runs)]
+    times = [r["seconds"] for r in results]
+    median = statistics.median(times)
+    print(f"cold start: median {median:.3f}s, min {min(times):.3f}s, max {max(times):.3f}s "
+          f"({args.runs} runs, budget {args.budget:.2f}s)")
+
+    failed = False
+    errors = [e for r in results for e in r["errors"]]
+    if errors:
+        print(f"FAIL: login page raised: {errors[0]}")
+        failed = True
+    heavy = sorted({m for r in results for m in r["heavy"]})
+    if heavy:
+        print(f"FAIL: imported on the login page: {', '.join(heavy)}")
+        failed = True
+    if median > args.budget:
+        print(f"FAIL: median {median:.3f}s is over the {args.budget:.2f}s budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""Live spectator feed: scoring sessions publish, any number of viewers watch.
+
+Scoring code publishes the match state after every dart or turn with
+``hub.publish(game_id, state)``. The hub reduces it to a small spectator
+snapshot, waits ``COALESCE_WINDOW`` seconds so rapid updates collapse into
+one message, diffs against what viewers already have and serializes the
+delta once for all subscribers. A viewer costs one queue and one socket
+write per message, not another render of the scoreboard.
+
+Messages (JSON text over WebSocket):
+    {"seq": 1, "snapshot": {...}}          on connect and after a viewer fell behind
+    {"seq": 2, "delta": {"scores.A": 40, "turn": ["T20"]}}
+Delta keys are dotted paths into the snapshot; ``apply_delta`` (and the JS
+in the spectator page) applies them.
+
+Viewers open ``/spectate/<game_id>`` on the feed server, which is started by
+the app (``start_feed_thread``) or served by ``api_server.py``.
+"""
+import asyncio
+import json
+import threading
+
+COALESCE_WINDOW = 0.1 # Seconds
+SUBSCRIBER_QUEUE_SIZE = 32 # Messages a slow viewer may lag behind before it gets a fresh snapshot
+
+
+# --- Snapshots and deltas ---
+def spectator_snapshot(state):
+    """The read-only view of an X01 match state that spectators get."""
+    players = list(state["players_selected_for_game"])
+    current = None if state["game_over"] else players[state["current_player_index"] % len(players)]
+    return {
+        "players": players,
+        "scores": dict(state["player_scores"]),
+        "legs": dict(state["player_legs_won"]),
+        "sets": dict(state["player_sets_won"]),
+        "last": {p: list(v) for p, v in state["player_last_turn_scores"].items()},
+        "current": current,
+        "turn": list(state["current_turn_shots"]),
+        "leg": state["current_leg"],
+        "set": state["current_set"],
+        "winner": state["winner"],
+    }
+
+
+def diff_snapshots(old, new):
+    """Changed values as ``{dotted.path: value}``; nested dicts are compared key by key."""
+    delta = {}
+    for key, value in new.items():
+        old_value = old.get(key) if old else None
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            for sub_key, sub_value in value.items():
+                if old_value.get(sub_key) != sub_value:
+                    delta[f"{key}.{sub_key}"] = sub_value
+        elif old_value != value or (old is not None and key not in old):
+            delta[key] = value
+    return delta
+
+
+def apply_delta(snapshot, delta):
+    """Applies a delta from ``diff_snapshots`` to a snapshot in place."""
+    for path, value in delta.items():
+        key, _, sub_key = path.partition(".")
+        if sub_key:
+            snapshot.setdefault(key, {})[sub_key] = value
+        else:
+            snapshot[key] = value
+    return snapshot
+
+
+# --- Hub ---
+class BroadcastHub:
+    """Per-game pub/sub with coalescing. ``publish`` may be called from any thread."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.topics = {} # game id -> {"sent", "pending", "seq", "subscribers", "scheduled"}
+
+    def _topic(self, topic_id):
+        return self.topics.setdefault(topic_id, {"sent": None, "pending": None, "seq": 0, "subscribers": set(), "scheduled": False})
+
+    def publish(self, topic_id, state):
+        """Queues the new state of a game; viewers get the delta after the coalescing window."""
+        snapshot = spectator_snapshot(state) # Copied now, the caller keeps mutating its state
+        self.loop.call_soon_threadsafe(self._publish, topic_id, snapshot)
+
+    def _publish(self, topic_id, snapshot):
+        topic = self._topic(topic_id)
+        topic["pending"] = snapshot
+        if not topic["scheduled"]:
+            topic["scheduled"] = True
+            self.loop.call_later(COALESCE_WINDOW, self._flush, topic_id)
+
+    def _flush(self, topic_id):
+        topic = self.topics[topic_id]
+        topic["scheduled"] = False
+        snapshot, topic["pending"] = topic["pending"], None
+        if snapshot is None:
+            return
+        delta = diff_snapshots(topic["sent"], snapshot)
+        topic["sent"] = snapshot
+        if not delta or not topic["subscribers"]:
+            return
+        topic["seq"] += 1
+        message = json.dumps({"seq": topic["seq"], "delta": delta}) # Serialized once for every viewer
+        for queue in list(topic["subscribers"]):
+            if queue.full():
+                self._resync(topic, queue)
+            else:
+                queue.put_nowait(message)
+
+    def _resync(self, topic, queue):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(json.dumps({"seq": topic["seq"], "snapshot": topic["sent"]}))
+
+    def subscribe(self, topic_id):
+        """Adds a viewer (call on the hub's loop). Returns a queue that starts with the current snapshot."""
+        topic = self._topic(topic_id)
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        if topic["sent"] is not None:
+            queue.put_nowait(json.dumps({"seq": topic["seq"], "snapshot": topic["sent"]}))
+        topic["subscribers"].add(queue)
+        return queue
+
+    def unsubscribe(self, topic_id, queue):
+        topic = self.topics.get(topic_id)
+        if topic:
+            topic["subscribers"].discard(queue)
+
+    def discard(self, topic_id):
+        """Forgets a finished game's feed once nobody watches it and no delta is waiting (call on the hub's loop)."""
+        topic = self.topics.get(topic_id)
+        if topic and not topic["subscribers"] and not topic["scheduled"]:
+            del self.topics[topic_id]
+
+    def viewer_count(self, topic_id):
+        topic = self.topics.get(topic_id)
+        return len(topic["subscribers"]) if topic else 0
+
+
+# --- Spectator endpoints ---
+SPECTATOR_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Darts Counter - Live</title>
+<style>
+body { font-family: sans-serif; background: #111; color: #eee; margin: 2em; }
+table { border-collapse: collapse; width: 100%; font-size: 2em; }
+td, th { padding: 0.3em 0.6em; text-align: center; border-bottom: 1px solid #333; }
+tr.current { background: #4b1010; }
+.score { font-size: 1.8em; font-weight: bold; }
+#status { color: #888; }
+</style></head>
+<body><h1>🎯 Live</h1><p id="status">connecting...</p><table id="board"></table>
+<script>
+let snap = null;
+function row(tag, values, className) {
+  // Cells are set as text: player names come from users and must not be parsed as HTML
+  const tr = document.createElement("tr");
+  if (className) tr.className = className;
+  values.forEach((value, i) => {
+    const cell = document.createElement(tag);
+    cell.textContent = value;
+    if (tag === "td" && i === 1) cell.className = "score";
+    tr.appendChild(cell);
+  });
+  return tr;
+}
+function render() {
+  if (!snap) return;
+  const rows = [row("th", ["Player", "Score", "Sets", "Legs", "Darts"])];
+  for (const p of snap.players) {
+    const darts = p === snap.current ? snap.turn : (snap.last[p] || []);
+    rows.push(row("td", [p, snap.scores[p], snap.sets[p], snap.legs[p], darts.join(" ")], p === snap.current ? "current" : ""));
+  }
+  document.getElementById("board").replaceChildren(...rows);
+  document.getElementById("status").textContent = snap.winner ? `Winner: ${snap.winner}` : `Set ${snap.set} | Leg ${snap.leg}`;
+}
+function connect() {
+  const ws = new WebSocket(`ws://${location.host}${location.pathname}/ws`);
+  ws.onmessage = (event) => {
+    const msg = JSON.parse(event.data);
+    if (msg.snapshot) { snap = msg.snapshot; }
+    else if (snap) {
+      for (const [path, value] of Object.entries(msg.delta)) {
+        const [key, sub] = path.split(/\\.(.*)/s);
+        if (sub !== undefined) { snap[key][sub] = value; } else { snap[key] = value; }
+      }
+    }
+    render();
+  };
+  ws.onclose = () => { document.getElementById("status").textContent = "reconnecting..."; setTimeout(connect, 2000); };
+}
+connect();
+</script></body></html>
+"""
+
+
+async def serve_spectator(hub, topic_id, headers, reader, writer):
+    """Streams a game's feed to one viewer over an upgraded WebSocket connection."""
+    from api_server import websocket_handshake, websocket_frame # Shared protocol helpers
+
+    websocket_handshake(headers, writer)
+    queue = hub.subscribe(topic_id)
+    closed = asyncio.ensure_future(reader.read()) # Viewers only listen; EOF or any frame ends the stream
+    try:
+        while True:
+            next_message = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({next_message, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if closed in done:
+                next_message.cancel()
+                break
+            writer.write(websocket_frame(next_message.result()))
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        closed.cancel()
+        hub.unsubscribe(topic_id, queue)
+
+
+def spectator_page_response():
+    body = SPECTATOR_PAGE.encode()
+    return (b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+            + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+
+
+async def handle_feed_connection(hub, reader, writer):
+    """Connection handler for the standalone feed server (GET /spectate/<id> and /spectate/<id>/ws)."""
+    from api_server import read_request, http_response, ApiError
+
+    try:
+        request = await read_request(reader)
+        if request is None:
+            return
+        _, path, _, headers, _ = request
+        parts = [p for p in path.split("/") if p]
+        if len(parts) == 3 and parts[0] == "spectate" and parts[2] == "ws":
+            await serve_spectator(hub, parts[1], headers, reader, writer)
+        elif len(parts) == 2 and parts[0] == "spectate":
+            writer.write(spectator_page_response())
+        else:
+            writer.write(http_response(404, {"error": "not found"}, keep_alive=False))
+        await writer.drain()
+    except (ApiError, ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def start_feed_thread(host="0.0.0.0", port=8766):
+    """Runs a hub and its feed server on a daemon thread. Returns the hub; raises OSError if the port is taken."""
+    loop = asyncio.new_event_loop()
+    hub = BroadcastHub(loop)
+    server = loop.run_until_complete(asyncio.start_server(lambda r, w: handle_feed_connection(hub, r, w), host, port))
+    hub.server = server
+    threading.Thread(target=loop.run_forever, name="spectator-feed", daemon=True).start()
+    return hub
@@ -0,0 +1,160 @@
+"""Cricket scoring rules (standard and cut-throat), shared like dart_engine.
+
+Marks are packed into one int per player: two bits per target (15-20 and
+bull), so 0-3 marks each and ``ALL_CLOSED`` when every target is closed.
+``closed_count`` keeps how many players have closed each target, which makes
+"is this number dead?" a single lookup. Every dart is O(1) for the thrower;
+cut-throat points go to the opponents that are still open.
+
+Darts use the same notation as X01 (``T20``, ``D25``, ``17``, ``0``) and are
+parsed with ``dart_engine.parse_score_input``.
+"""
+from dart_engine import parse_score_input
+
+CRICKET_TARGETS = (15, 16, 17, 18, 19, 20, 25)
+TARGET_INDEX = {target: i for i, target in enumerate(CRICKET_TARGETS)}
+BITS_PER_TARGET = 2
+MARK_MASK = 0b11
+ALL_CLOSED = sum(3 << (BITS_PER_TARGET * i) for i in range(len(CRICKET_TARGETS)))
+CRICKET_VARIANTS = ["standard", "cut_throat"]
+MARK_SYMBOLS = ["", "/", "X", "Ⓧ"]
+
+
+# --- State ---
+def new_cricket_state(players, variant="standard"):
+    """Builds a fresh Cricket match state. Per-player values are lists in player order."""
+    players = list(players)
+    return {
+        "players": players,
+        "variant": variant,
+        "marks": [0] * len(players),
+        "points": [0] * len(players),
+        "closed_count": [0] * len(CRICKET_TARGETS),
+        "darts_thrown": [0] * len(players),
+        "marks_scored": [0] * len(players), # Marks that counted (closing or scoring), for MPR
+        "last_turn": [[] for _ in players],
+        "current_player_index": 0,
+        "game_over": False,
+        "winner": None,
+    }
+
+
+def copy_state(state):
+    """Copies a Cricket state; all per-player values are flat lists."""
+    copied = dict(state)
+    for key, value in state.items():
+        if isinstance(value, list):
+            copied[key] = [list(v) if isinstance(v, list) else v for v in value]
+    return copied
+
+
+def marks_on(packed_marks, target):
+    """Number of marks (0-3) a player has on a target."""
+    return (packed_marks >> (BITS_PER_TARGET * TARGET_INDEX[target])) & MARK_MASK
+
+
+# --- Darts ---
+def parse_cricket_dart(shot_str):
+    """Returns (target, hits) for a dart; target is None for misses and non-cricket numbers."""
+    value, is_double, is_triple, is_valid = parse_score_input(shot_str)
+    if not is_valid or value == 0:
+        return None, 0
+    hits = 3 if is_triple else 2 if is_double else 1
+    target = value // hits
+    if target not in TARGET_INDEX:
+        return None, 0
+    return target, hits
+
+
+def apply_dart(state, player_index, shot_str):
+    """Scores one dart for a player. Returns (marks_counted, points_scored)."""
+    target, hits = parse_cricket_dart(shot_str)
+    state["darts_thrown"][player_index] += 1
+    if target is None:
+        return 0, 0
+
+    num_players = len(state["players"])
+    index = TARGET_INDEX[target]
+    shift = BITS_PER_TARGET * index
+    packed = state["marks"][player_index]
+    marks_before = (packed >> shift) & MARK_MASK
+    if marks_before == 3 and state["closed_count"][index] == num_players:
+        return 0, 0 # Dead number, nobody can score on it
+
+    marks_after = min(3, marks_before + hits)
+    state["marks"][player_index] = packed + ((marks_after - marks_before) << shift)
+    if marks_before < 3 and marks_after == 3:
+        state["closed_count"][index] += 1
+    extra_hits = marks_before + hits - marks_after
+
+    points = 0
+    if extra_hits and state["closed_count"][index] < num_players:
+        points = extra_hits * target
+        if state["variant"] == "cut_throat":
+            for opponent in range(num_players):
+                if opponent != player_index and (state["marks"][opponent] >> shift) & MARK_MASK < 3:
+                    state["points"][opponent] += points
+        else:
+            state["points"][player_index] += points
+    counted = (marks_after - marks_before) + (extra_hits if points else 0)
+    state["marks_scored"][player_index] += counted
+    return counted, points
+
+
+def has_won(state, player_index):
+    """All targets closed and the best score (highest in standard, lowest in cut-throat)."""
+    if state["marks"][player_index] != ALL_CLOSED:
+        return False
+    own = state["points"][player_index]
+    others = [p for i, p in enumerate(state["points"]) if i != player_index]
+    if not others:
+        return True
+    if state["variant"] == "cut_throat":
+        return own <= min(others)
+    return own >= max(others)
+
+
+# --- Turns ---
+def apply_turn(state, shots_list):
+    """Processes one visit for the current player and advances to the next.
+
+    Darts after a winning dart are ignored. Returns the outcome or None on a parse error.
+    """
+    player_index = state["current_player_index"]
+    for shot_str in shots_list:
+        if not parse_score_input(shot_str)[3]:
+            return None
+
+    marks = 0
+    points = 0
+    darts = 0
+    is_win = False
+    for shot_str in shots_list:
+        counted, scored = apply_dart(state, player_index, shot_str)
+        marks += counted
+        points += scored
+        darts += 1
+        if has_won(state, player_index):
+            is_win = True
+            break
+
+    player_name = state["players"][player_index]
+    state["last_turn"][player_index] = list(shots_list[:darts])
+    if is_win:
+        state["game_over"] = True
+        state["winner"] = player_name
+    else:
+        state["current_player_index"] = (player_index + 1) % len(state["players"])
+    return {"player": player_name, "marks": marks, "points": points, "darts": darts, "is_win": is_win}
+
+
+def turn_wins(state, shots_list):
+    """Whether these darts would win the game for the current player (state is left untouched)."""
+    preview = copy_state(state)
+    outcome = apply_turn(preview, shots_list)
+    return bool(outcome and outcome["is_win"])
+
+
+def marks_per_round(marks, darts):
+    """Average marks per three darts."""
+    return marks / darts * 3 if darts else 0.0
@@ -0,0 +1,564 @@
+"""X01 scoring rules shared by the Streamlit app and the offline tools.
+
+Nothing in here touches Streamlit, so the same rules can be used for live
+scoring (``Dartapp.py``), match replay and batch jobs.
+"""
+import math
+from functools import lru_cache
+
+# --- Default Preferred Doubles & Constants ---
+DEFAULT_PREFERRED_DOUBLES = {"D18", "D4", "D13", "D6", "D10", "D15", "D2", "D17", "D3", "D20", "D16", "D8"}
+ALL_POSSIBLE_DOUBLES = sorted([f"D{i}" for i in range(1, 21)] + ["D25"], key=lambda x: int(x[1:]))
+BOGIE_NUMBERS_SET = {169, 168, 166, 165, 163, 162, 159} # Double Out; see bogie_numbers() for other rules
+STANDARD_START_SCORES = [101, 201, 301, 401, 501]
+MAX_START_SCORE = 9999
+
+# --- Rule Tables ---
+# Every valid dart maps to (value, kind) with kind "S", "D" or "T"; the rules below
+# are sets of kinds, so checking a dart against a rule is two dict lookups.
+DART_TABLE = {"0": (0, "S")}
+for _n in list(range(1, 21)) + [25]:
+    DART_TABLE[str(_n)] = (_n, "S")
+    DART_TABLE[f"D{_n}"] = (_n * 2, "D")
+    if _n != 25:
+        DART_TABLE[f"T{_n}"] = (_n * 3, "T")
+CHECK_IN_MODES = {"Straight In": frozenset("SDT"), "Double In": frozenset("D")}
+CHECK_OUT_MODES = {"Straight Out": frozenset("SDT"), "Double Out": frozenset("D"), "Master Out": frozenset("DT")}
+# Lowest score each out rule can finish; anything between 0 and this is a bust
+LOWEST_FINISH = {mode: min(v for v, kind in DART_TABLE.values() if kind in kinds and v > 0)
+                 for mode, kinds in CHECK_OUT_MODES.items()}
+
+
+def is_valid_start_score(score):
+    """Start scores are free (custom X01) as long as they can be finished."""
+    return isinstance(score, int) and 2 <= score <= MAX_START_SCORE
+
+
+# --- Dart Parsing ---
+def parse_score_input(score_str):
+    """Parses a dart like 'T20', 'D16', '25' or '0' into (value, is_double, is_triple, is_valid)."""
+    score_str = str(score_str).upper().strip()
+    is_double = False
+    is_triple = False
+    value = 0
+    is_valid = True
+    try:
+        if score_str.startswith("T"):
+            if len(score_str) > 1 and score_str[1:].isdigit():
+                num = int(score_str[1:])
+                if 1 <= num <= 20:
+                    value = num * 3
+                    is_triple = True
+                else:
+                    is_valid = False
+            else:
+                is_valid = False
+        elif score_str.startswith("D"):
+            if len(score_str) > 1 and score_str[1:].isdigit():
+                num = int(score_str[1:])
+                if 1 <= num <= 20 or num == 25:
+                    value = num * 2
+                    is_double = True
+                else:
+                    is_valid = False
+            else:
+                is_valid = False
+        elif score_str.isdigit():
+            num = int(score_str)
+            if 0 <= num <= 20 or num == 25:
+                value = num
+            else:
+                is_valid = False # 50 must be entered as D25
+        else:
+            is_valid = False
+    except ValueError:
+        is_valid = False
+    return value, is_double, is_triple, is_valid
+
+
+def dart_info(shot_str):
+    """(value, kind) of a dart from DART_TABLE, or None if it isn't a valid dart."""
+    info = DART_TABLE.get(str(shot_str).upper().strip())
+    if info is None:
+        value, is_double, is_triple, is_valid = parse_score_input(shot_str)
+        if not is_valid:
+            return None
+        info = (value, "T" if is_triple else "D" if is_double else "S")
+    return info
+
+
+def get_throw_value(throw_str):
+    """Returns the points of a single dart, 0 for an invalid format."""
+    value, _, _, is_valid = parse_score_input(throw_str)
+    if is_valid:
+        return value
+    else:
+        return 0
+
+
+def calculate_turn_total(shots_list):
+    """Sums a list of darts. Returns (total, darts, last_dart_double, details); total is None on a parse error."""
+    total = 0
+    darts_thrown_turn = 0
+    last_dart_double_flag = False
+    parsed_shots_details = []
+    if not shots_list:
+        return 0, 0, False, []
+
+    for shot_str in shots_list:
+        value, is_double, _, is_valid = parse_score_input(shot_str)
+        if not is_valid:
+            return None, 0, False, [] # Signal error if parse fails
+        total += value
+        darts_thrown_turn += 1
+        last_dart_double_flag = is_double
+        parsed_shots_details.append({"input": shot_str, "value": value, "is_double": is_double})
+
+    return total, darts_thrown_turn, last_dart_double_flag, parsed_shots_details
+
+
+# --- Turn Rules ---
+def score_turn(score_before, shots_list, check_out_mode, check_in_mode="Straight In", opened=True):
+    """Applies the check-in, bust and checkout rules to one visit without changing any state.
+
+    ``opened`` says whether the player has already checked in this leg; until then
+    darts only count from the first one allowed by ``check_in_mode``.
+    """
+    darts = [dart_info(shot) for shot in shots_list]
+    if None in darts:
+        return None
+
+    open_kinds = CHECK_IN_MODES[check_in_mode]
+    calculated_score = 0
+    for value, kind in darts:
+        if not opened and kind in open_kinds:
+            opened = True
+        if opened:
+            calculated_score += value
+    last_kind = darts[-1][1] if darts else None
+
+    new_score = score_before - calculated_score
+    if new_score < 0 or 0 < new_score < LOWEST_FINISH[check_out_mode]:
+        result = "BUST"
+    elif new_score == 0:
+        if last_kind not in CHECK_OUT_MODES[check_out_mode]:
+            result = "BUST (Invalid Checkout)" # Last dart not allowed by the out rule
+        else:
+            result = "WIN"
+    else:
+        result = "OK"
+
+    return {
+        "calculated_score": calculated_score,
+        "darts": len(darts),
+        "last_dart_double": last_kind == "D",
+        "new_score": new_score,
+        "opened": opened,
+        "result": result,
+    }
+
+
+def legs_needed(legs_to_play, set_leg_rule):
+    """Number of legs needed to win a set."""
+    return math.ceil((legs_to_play + 1) / 2) if set_leg_rule == "Best of" else legs_to_play
+
+
+def sets_needed(sets_to_play, set_leg_rule):
+    """Number of sets needed to win the game."""
+    return math.ceil((sets_to_play + 1) / 2) if set_leg_rule == "Best of" else sets_to_play
+
+
+def new_match_state(players, starting_score, check_out_mode="Double Out", set_leg_rule="First to", sets_to_play=1, legs_to_play=1,
+                    check_in_mode="Straight In"):
+    """Builds a fresh match state using the same keys as the app's session state."""
+    players = list(players)
+    return {
+        "players_selected_for_game": players,
+        "starting_score": starting_score,
+        "check_out_mode": check_out_mode,
+        "check_in_mode": check_in_mode,
+        "player_opened": new_opened_flags(players, check_in_mode),
+        "set_leg_rule": set_leg_rule,
+        "sets_to_play": sets_to_play,
+        "legs_to_play": legs_to_play,
+        "player_scores": {p: starting_score for p in players},
+        "player_legs_won": {p: 0 for p in players},
+        "player_sets_won": {p: 0 for p in players},
+        "player_darts_thrown": {p: 0 for p in players},
+        "player_turn_history": {p: [] for p in players},
+        "player_last_turn_scores": {p: [] for p in players},
+        "current_player_index": 0,
+        "current_turn_shots": [],
+        "current_leg": 1,
+        "current_set": 1,
+        "game_over": False,
+        "leg_over": False,
+        "set_over": False,
+        "winner": None,
+    }
+
+
+def new_opened_flags(players, check_in_mode):
+    """Per-player check-in flags at the start of a leg; Straight In players are in from the first dart."""
+    return {p: check_in_mode == "Straight In" for p in players}
+
+
+def apply_turn(state, player_name, shots_list):
+    """Processes one visit on a match state and advances legs, sets and the player.
+
+    ``state`` can be a plain dict from ``new_match_state`` or ``st.session_state``.
+    Returns the ``score_turn`` result extended with what happened, or None on a parse error.
+    """
+    score_before_turn = state["player_scores"][player_name]
+    check_in_mode = state.get("check_in_mode", "Straight In")
+    opened_flags = state.get("player_opened") or new_opened_flags(state["players_selected_for_game"], check_in_mode)
+    opened_before = opened_flags.get(player_name, True)
+    turn = score_turn(score_before_turn, shots_list, state["check_out_mode"], check_in_mode, opened_before)
+    if turn is None:
+        return None
+    if not turn["result"].startswith("BUST"):
+        opened_flags[player_name] = turn["opened"] # A bust throws the visit away, check-in included
+    state["player_opened"] = opened_flags
+
+    result = turn["result"]
+    is_bust = result.startswith("BUST")
+    is_win = result == "WIN"
+
+    # --- Score, History and Darts ---
+    if is_win:
+        state["player_scores"][player_name] = 0
+    elif is_bust:
+        state["player_scores"][player_name] = score_before_turn
+    else:
+        state["player_scores"][player_name] = turn["new_score"]
+    state["player_turn_history"].setdefault(player_name, []).append((turn["calculated_score"], turn["darts"], result))
+    state["player_last_turn_scores"][player_name] = list(shots_list)
+    state["player_darts_thrown"][player_name] = state["player_darts_thrown"].get(player_name, 0) + turn["darts"]
+    if is_win:
+        state["leg_over"] = True
+        state["player_legs_won"][player_name] = state["player_legs_won"].get(player_name, 0) + 1
+
+    # A visit that could have finished the leg, for checkout percentages
+    checkout_chance = opened_before and is_checkout_score(score_before_turn, state["check_out_mode"])
+    attempts = double_attempts(score_before_turn, shots_list, state["check_out_mode"], check_in_mode, opened_before)
+    outcome = dict(turn, is_bust=is_bust, is_win=is_win, checkout_chance=checkout_chance, double_attempts=attempts,
+                   advanced=False, set_won=False, game_won=False, next_leg=False, next_set=False)
+
+    # --- Advancement ---
+    # Turn advances if bust, win, or 3 darts thrown, EXCEPT on invalid checkout bust
+    should_advance_turn = is_bust or is_win or len(shots_list) == 3
+    if result == "BUST (Invalid Checkout)":
+        should_advance_turn = False
+    if not should_advance_turn:
+        return outcome
+
+    outcome["advanced"] = True
+    players = state["players_selected_for_game"]
+    num_players = len(players)
+    index_before_advance = state["current_player_index"]
+    state["current_turn_shots"] = []
+
+    if state["leg_over"]:
+        if state["player_legs_won"].get(player_name, 0) >= legs_needed(state["legs_to_play"], state["set_leg_rule"]):
+            state["set_over"] = True
+            state["player_sets_won"][player_name] = state["player_sets_won"].get(player_name, 0) + 1
+            outcome["set_won"] = True
+            if state["player_sets_won"][player_name] >= sets_needed(state["sets_to_play"], state["set_leg_rule"]):
+                state["game_over"] = True
+                state["winner"] = player_name
+                outcome["game_won"] = True
+            else: # Start next set
+                state["current_set"] += 1
+                state["current_leg"] = 1
+                state["player_scores"] = {p: state["starting_score"] for p in players}
+                state["player_legs_won"] = {p: 0 for p in players}
+                state["player_last_turn_scores"] = {p: [] for p in players}
+                state["player_opened"] = new_opened_flags(players, check_in_mode)
+                state["leg_over"] = False
+                state["set_over"] = False
+                state["current_player_index"] = (index_before_advance + 1) % num_players
+                outcome["next_set"] = True
+        else: # Start next leg, alternating the starting player
+            state["current_leg"] += 1
+            state["player_scores"] = {p: state["starting_score"] for p in players}
+            state["player_last_turn_scores"] = {p: [] for p in players}
+            state["player_opened"] = new_opened_flags(players, check_in_mode)
+            state["leg_over"] = False
+            state["current_player_index"] = (index_before_advance + 1) % num_players
+            outcome["next_leg"] = True
+    else:
+        state["current_player_index"] = (index_before_advance + 1) % num_players
+
+    return outcome
+
+
+# --- Checkout Calculation ---
+THROWS_PRIORITY = ([f"T{i}" for i in range(20, 0, -1)] +
+                   [f"D{i}" for i in range(20, 0, -1)] + ["D25"] +
+                   [str(i) for i in range(20, 0, -1)] + ["25"])
+
+
+# Score -> the double that finishes it with one dart (2-40 and the bull)
+DOUBLE_FINISHES = {value: dart for dart, (value, kind) in DART_TABLE.items() if kind == "D"}
+
+
+def double_attempts(score_before, shots_list, check_out_mode, check_in_mode="Straight In", opened=True):
+    """Darts of one visit thrown at a finishing double, as ``[(double, hit)]``.
+
+    A dart is an attempt when the score left before it is a one-dart double
+    finish: at 32, a single 16 and then D8 are two attempts, at D16 and D8.
+    Only counted under Double Out, where the double is the only way out.
+    """
+    if CHECK_OUT_MODES[check_out_mode] != {"D"}:
+        return []
+    open_kinds = CHECK_IN_MODES[check_in_mode]
+    remaining = score_before
+    attempts = []
+    for shot in shots_list:
+        info = dart_info(shot)
+        if info is None:
+            return []
+        value, kind = info
+        if opened and remaining in DOUBLE_FINISHES:
+            attempts.append((DOUBLE_FINISHES[remaining], kind == "D" and value == remaining))
+        if not opened and kind in open_kinds:
+            opened = True
+        if opened:
+            remaining -= value
+        if remaining < LOWEST_FINISH[check_out_mode]: # Finished or bust, the rest of the visit doesn't count
+            break
+    return attempts
+
+
+MAX_SUGGESTIONS = 5 # Finishes kept per (score, darts) in a checkout table
+MAX_TABLE_SCORE = 3 * max(v for v, _ in DART_TABLE.values()) # Highest three-dart score
+
+
+def _finishing_darts(check_out_mode):
+    """{score: dart} for one-dart finishes under an out rule, preferring the biggest bed (single, double, triple)."""
+    finishes = {}
+    for kind in ("S", "D", "T"):
+        if kind not in CHECK_OUT_MODES[check_out_mode]:
+            continue
+        for dart, (value, dart_kind) in DART_TABLE.items():
+            if dart_kind == kind and value > 0:
+                finishes.setdefault(value, dart)
+    return finishes
+
+
+@lru_cache(maxsize=None)
+def checkout_table(check_out_mode="Double Out"):
+    """Precomputes every finish for an out rule: ``{score: {darts_left: (path, ...)}}``.
+
+    Built once per rule; suggestions and the bogie list are lookups into it.
+    """
+    one_dart = _finishing_darts(check_out_mode)
+    lowest = LOWEST_FINISH[check_out_mode]
+    table = {}
+    for score in range(lowest, MAX_TABLE_SCORE + 1):
+        paths = {}
+        # --- 1 Dart Left ---
+        paths[1] = ((one_dart[score],),) if score in one_dart else ()
+        # --- 2 Darts Left ---
+        two_dart = []
+        for throw1 in THROWS_PRIORITY:
+            val1 = DART_TABLE[throw1][0]
+            if 0 < val1 < score and score - val1 >= lowest and table[score - val1][1]:
+                two_dart.append((throw1, table[score - val1][1][0][0]))
+                if len(two_dart) >= MAX_SUGGESTIONS:
+                    break
+        paths[2] = tuple(two_dart)
+        # --- 3 Darts Left ---
+        three_dart = list(two_dart)
+        if len(three_dart) < MAX_SUGGESTIONS:
+            for throw1 in THROWS_PRIORITY:
+                val1 = DART_TABLE[throw1][0]
+                if 0 < val1 <= score - 2 * lowest and table[score - val1][2]:
+                    full_path = (throw1,) + table[score - val1][2][0]
+                    if full_path not in three_dart:
+                        three_dart.append(full_path)
+                        if len(three_dart) >= MAX_SUGGESTIONS:
+                            break
+        paths[3] = tuple(three_dart)
+        table[score] = paths
+    return table
+
+
+# Set by shared_tables.attach(): the tables of a file mapped by every server process.
+# None means this process uses its own checkout_table().
+shared_tables = None
+
+
+def checkout_paths(score, check_out_mode="Double Out"):
+    """``{darts_left: (path, ...)}`` for a score, or None outside the table."""
+    if shared_tables is not None:
+        return shared_tables.paths(score, check_out_mode)
+    return checkout_table(check_out_mode).get(score)
+
+
+@lru_cache(maxsize=None)
+def bogie_numbers(check_out_mode="Double Out"):
+    """Scores up to the highest finish that have no three-dart checkout under an out rule."""
+    finishable = [score for score in range(MAX_TABLE_SCORE + 1) if is_checkout_score(score, check_out_mode)]
+    return frozenset(range(min(finishable), max(finishable))) - set(finishable)
+
+
+def is_checkout_score(score, check_out_mode="Double Out"):
+    """Whether a score can be finished in one visit under the out rule."""
+    paths = checkout_paths(score, check_out_mode)
+    return bool(paths and (paths[1] or paths[2] or paths[3]))
+
+
+def get_checkouts(target_score, darts_left, max_suggestions=5, check_out_mode="Double Out"):
+    """Returns up to ``max_suggestions`` finishes for the out rule, each a list of darts."""
+    paths = checkout_paths(target_score, check_out_mode)
+    if not paths or darts_left not in paths:
+        return []
+    return [list(path) for path in paths[darts_left][:max_suggestions]]
+
+
+SETUP_LEAVES = (32, 40, 16, 8, 36, 20, 4, 50, 24, 12, 6, 10, 18, 2, 28, 34) # Best leaves first
+
+
+def setup_single(current_score):
+    """The single (1-20 or 25) to throw with one dart left to leave a good double, or None."""
+    if shared_tables is not None and current_score <= MAX_TABLE_SCORE:
+        return shared_tables.setup(current_score)
+    for target_leave in SETUP_LEAVES:
+        needed_score = current_score - target_leave
+        if 1 <= needed_score <= 20 or needed_score == 25:
+            return needed_score
+    for single_hit in range(20, 0, -1):
+        if current_score > single_hit and (current_score - single_hit) > 1:
+            return single_hit
+    return None
+
+
+def get_setup_shot(current_score):
+    """Suggests a single-dart setup that leaves a good double."""
+    single = setup_single(current_score)
+    if single is None:
+        return None
+    return f"Setup: {single} (leaves {current_score - single})"
+
+
+def sort_checkouts_by_preference(paths, preferred_doubles):
+    """Moves finishes ending on one of the preferred doubles to the front."""
+    preferred_paths = []
+    other_paths = []
+    for path in paths:
+        if path and path[-1].startswith("D") and path[-1] in preferred_doubles:
+            preferred_paths.append(path)
+        else:
+            other_paths.append(path)
+    return preferred_paths + other_paths
+
+
+def get_checkout_suggestion(score_remaining, darts_left, preferred_doubles=None, check_out_mode="Double Out"):
+    """Picks the scoreboard suggestion: a 1/2/3-dart finish, a setup shot or a bogie warning.
+
+    Returns a dict with ``kind`` ("out", "setup" or "bogie"), ``darts`` and ``text``, or None.
+    """
+    if darts_left <= 0 or score_remaining < LOWEST_FINISH[check_out_mode]:
+        return None
+    if not preferred_doubles:
+        preferred_doubles = DEFAULT_PREFERRED_DOUBLES
+    paths = checkout_paths(score_remaining, check_out_mode) or {1: (), 2: (), 3: ()}
+
+    # 1. Check for 1-Dart Finish
+    if paths[1]:
+        return {"kind": "out", "darts": 1, "text": paths[1][0][0]}
+    # 2./3. Check for 2- and 3-Dart Finishes
+    for darts in (2, 3):
+        if darts_left >= darts and paths[darts]:
+            sorted_suggestions = sort_checkouts_by_preference([list(p) for p in paths[darts][:3]], preferred_doubles)
+            return {"kind": "out", "darts": darts, "text": " | ".join(" ".join(path) for path in sorted_suggestions[:2])}
+    is_bogie = score_remaining in bogie_numbers(check_out_mode)
+    # 4. Suggest Setup Shot
+    if darts_left == 1 and not is_bogie:
+        setup_suggestion = get_setup_shot(score_remaining)
+        if setup_suggestion:
+            return {"kind": "setup", "darts": 1, "text": setup_suggestion}
+    # 5. Handle Bogie Numbers
+    if is_bogie:
+        return {"kind": "bogie", "darts": darts_left, "text": "No checkout"}
+    return None
+
+
+# --- Whole-Visit Entry ---
+def _dart_for_value(value, kinds="STD"):
+    """Notation for a dart worth ``value``, trying the kinds in order (single, triple, double)."""
+    for kind in kinds:
+        for dart, (dart_value, dart_kind) in DART_TABLE.items():
+            if dart_kind == kind and dart_value == value:
+                return dart
+    return None
+
+
+@lru_cache(maxsize=None)
+def visit_table(first_double=False):
+    """``{total: (dart, dart, dart)}`` for every total one visit can score, biggest darts first.
+
+    With ``first_double`` the first dart is a double, for Double In players who
+    haven't checked in yet.
+    """
+    values = sorted({value for value, _ in DART_TABLE.values()}, reverse=True)
+    firsts = sorted({v for v, kind in DART_TABLE.values() if kind == "D"}, reverse=True) if first_double else values
+    table = {}
+    for a in firsts:
+        for b in values:
+            for c in values:
+                if c > b or (not first_double and b > a):
+                    continue
+                table.setdefault(a + b + c, (_dart_for_value(a, "D" if first_double else "STD"),
+                                             _dart_for_value(b), _dart_for_value(c)))
+    return table
+
+
+def split_visit(text):
+    """Splits typed darts ("T20 T19 D12", commas allowed). Returns (darts, error)."""
+    tokens = str(text).upper().replace(",", " ").split()
+    if not tokens:
+        return None, "Enter up to three darts or a visit total."
+    if len(tokens) > 3:
+        return None, "A visit has at most three darts."
+    invalid = [token for token in tokens if dart_info(token) is None]
+    if invalid:
+        return None, f"Not a dart: {invalid[0]}"
+    return tokens, None
+
+
+def parse_visit(text, score_before, check_out_mode="Double Out", check_in_mode="Straight In", opened=True):
+    """Turns a typed visit into darts, validated in one pass. Returns (darts, error).
+
+    ``text`` is either darts ("T20 T19 D12") or a plain visit total ("140").
+    A total is stored as three representative darts, or as a finish when it
+    equals the remaining score. Busts are valid visits; an entry that would
+    leave the visit open (fewer than three darts that don't finish, a checkout
+    on the wrong bed) is an error.
+    """
+    tokens = str(text).split()
+    if len(tokens) == 1 and tokens[0].isdigit():
+        total = int(tokens[0])
+        if total == 0:
+            return ["0", "0", "0"], None
+        if total == score_before:
+            for darts_left in (1, 2, 3): # Fewest darts first
+                for path in get_checkouts(total, darts_left, MAX_SUGGESTIONS, check_out_mode):
+                    if score_turn(score_before, path, check_out_mode, check_in_mode, opened)["result"] == "WIN":
+                        return path, None
+            return None, f"{total} can't be checked out under {check_out_mode}."
+        shots = visit_table(not opened and check_in_mode == "Double In").get(total)
+        if shots is None:
+            return None, f"{total} can't be scored with three darts."
+        return list(shots), None
+
+    shots, error = split_visit(text)
+    if error:
+        return None, error
+    turn = score_turn(score_before, shots, check_out_mode, check_in_mode, opened)
+    if turn["result"] == "BUST (Invalid Checkout)":
+        return None, f"Invalid checkout: the last dart must be allowed by {check_out_mode}."
+    if len(shots) < 3 and turn["result"] == "OK":
+        return None, "Enter all three darts (0 for a miss)."
+    return shots, None
@@ -0,0 +1,209 @@
+"""Per-dart segment log and hit histograms for heatmaps.
+
+Every dart is stored as a one-byte segment code:
+    0        miss
+    1-20     single 1-20
+    21-40    double 1-20
+    41-60    treble 1-20
+    61       single bull (25)
+    62       bull (D25)
+Each player has an append-only log file of codes (``dart_logs/<account>/<player>.seg``)
+and a histogram of hits per code, ``player_stats[player]["segment_hits"]``,
+that is updated with every visit. The heatmap reads the histogram, so it
+costs the same for 10 or 10^5 darts; "last N darts" views read the tail of
+the log file.
+
+Existing games can be replayed into the logs and histograms with
+    python dart_log.py user_data.json
+"""
+import os
+import sys
+from urllib.parse import quote
+
+from dart_engine import dart_info
+
+DART_LOG_DIR = "dart_logs"
+SEGMENT_COUNT = 63 # 62 board segments plus miss
+MISS, SINGLE_BULL, BULL = 0, 61, 62
+BOARD_ORDER = [20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5] # Clockwise from the top
+KIND_OFFSET = {"S": 0, "D": 20, "T": 40}
+
+
+# --- Segment codes ---
+def segment_code(shot_str):
+    """One-byte code of a dart like 'T20', or None if it isn't a valid dart."""
+    info = dart_info(shot_str)
+    if info is None:
+        return None
+    value, kind = info
+    if value == 0:
+        return MISS
+    if value in (25, 50):
+        return SINGLE_BULL if kind == "S" else BULL
+    return KIND_OFFSET[kind] + value // {"S": 1, "D": 2, "T": 3}[kind]
+
+
+def segment_name(code):
+    """Dart notation of a segment code ('0' for a miss)."""
+    if code == MISS:
+        return "0"
+    if code == SINGLE_BULL:
+        return "25"
+    if code == BULL:
+        return "D25"
+    kind, number = divmod(code - 1, 20)
+    return ("", "D", "T")[kind] + str(number + 1)
+
+
+def segment_codes(shots):
+    """Codes of the valid darts in a visit."""
+    return bytes(code for code in map(segment_code, shots) if code is not None)
+
+
+def neighbours(code):
+    """The segment itself, the other beds of its number and the same beds of the two adjacent numbers."""
+    if code in (MISS, SINGLE_BULL, BULL):
+        return [code] if code == MISS else [BULL, SINGLE_BULL]
+    kind, number = divmod(code - 1, 20)
+    position = BOARD_ORDER.index(number + 1)
+    around = [BOARD_ORDER[(position - 1) % 20], BOARD_ORDER[(position + 1) % 20]]
+    result = [code] + [k * 20 + number + 1 for k in range(3) if k != kind]
+    return result + [kind * 20 + n for n in around]
+
+
+# --- Histograms ---
+def add_to_histogram(histogram, codes, sign=1):
+    """Adds (or with ``sign=-1`` removes) darts from a histogram list in place."""
+    if len(histogram) < SEGMENT_COUNT:
+        histogram.extend([0] * (SEGMENT_COUNT - len(histogram)))
+    for code in codes:
+        histogram[code] += sign
+    return histogram
+
+
+def histogram_of(codes):
+    return add_to_histogram([], codes)
+
+
+# --- Log files ---
+def log_path(account_name, player, log_dir=DART_LOG_DIR):
+    return os.path.join(log_dir, quote(account_name, safe=""), quote(player, safe="") + ".seg")
+
+
+def record_darts(account_name, account, player, shots, log_dir=DART_LOG_DIR):
+    """Adds one visit's darts to the player's histogram and appends them to the log file."""
+    codes = segment_codes(shots)
+    stats = account.get("player_stats", {}).get(player)
+    if stats is None or not codes:
+        return codes
+    add_to_histogram(stats.setdefault("segment_hits", []), codes)
+    append_to_log(account_name, player, codes, log_dir)
+    return codes
+
+
+def append_to_log(account_name, player, codes, log_dir=DART_LOG_DIR):
+    """Appends segment codes to the player's log file (the histogram is left alone)."""
+    path = log_path(account_name, player, log_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(codes)
+
+
+def remove_darts(account_name, account, player, shots, log_dir=DART_LOG_DIR):
+    """Takes back the last visit recorded with ``record_darts`` (undo)."""
+    codes = segment_codes(shots)
+    stats = account.get("player_stats", {}).get(player)
+    if stats is None or not codes:
+        return
+    add_to_histogram(stats.setdefault("segment_hits", []), codes, -1)
+    path = log_path(account_name, player, log_dir)
+    if os.path.exists(path):
+        os.truncate(path, max(0, os.path.getsize(path) - len(codes)))
+
+
+def recent_codes(account_name, player, count, log_dir=DART_LOG_DIR):
+    """The player's last ``count`` darts as codes, read from the end of the log."""
+    path = log_path(account_name, player, log_dir)
+    if not os.path.exists(path):
+        return b""
+    with open(path, "rb") as f:
+        f.seek(max(0, os.path.getsize(path) - count))
+        return f.read()
+
+
+def delete_log(account_name, player, log_dir=DART_LOG_DIR):
+    path = log_path(account_name, player, log_dir)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# --- Heatmap ---
+# Ring radii in mm: (inner, outer) per bed, singles fill the two areas between
+RINGS = {"S": [(15.9, 99.0), (107.0, 162.0)], "T": [(99.0, 107.0)], "D": [(162.0, 170.0)]}
+
+
+def draw_heatmap(ax, histogram):
+    """Draws a board on a polar matplotlib axis, each bed shaded by its share of the histogram."""
+    import math
+    from matplotlib import colormaps
+
+    histogram = add_to_histogram(list(histogram), b"")
+    hits = max(histogram[1:]) or 1
+    colour = colormaps["YlOrRd"]
+    width = 2 * math.pi / 20
+    ax.set_theta_zero_location("N")
+    ax.set_theta_direction(-1)
+    for position, number in enumerate(BOARD_ORDER):
+        theta = position * width
+        for kind, rings in RINGS.items():
+            share = histogram[KIND_OFFSET[kind] + number] / hits
+            for inner, outer in rings:
+                ax.bar(theta, outer - inner, width=width, bottom=inner, color=colour(share), edgecolor="grey", linewidth=0.3)
+        ax.text(theta, 182, str(number), ha="center", va="center", fontsize=8)
+    ax.bar(0, 15.9 - 6.35, width=2 * math.pi, bottom=6.35, color=colour(histogram[SINGLE_BULL] / hits), edgecolor="grey", linewidth=0.3)
+    ax.bar(0, 6.35, width=2 * math.pi, bottom=0, color=colour(histogram[BULL] / hits), edgecolor="grey", linewidth=0.3)
+    ax.set_ylim(0, 190)
+    ax.set_axis_off()
+
+
+# --- Backfill ---
+def rebuild(users, log_dir=DART_LOG_DIR):
+    """Rewrites every player's log and histogram from the recorded games. Returns the number of darts."""
+    total = 0
+    for account_name in list(users):
+        account = users[account_name]
+        logs = {player: bytearray() for player in account.get("player_stats", {})}
+        for game in account.get("games", []):
+            if not isinstance(game, dict) or "turns" not in game:
+                continue
+            typed_totals = set(game.get("entered_totals", [])) # Not real darts
+            for turn_number, (player_index, shots) in enumerate(game["turns"]):
+                player = game["players"][player_index]
+                if player in logs and turn_number not in typed_totals:
+                    logs[player] += segment_codes(shots)
+        for player, codes in logs.items():
+            account["player_stats"][player]["segment_hits"] = histogram_of(codes)
+            path = log_path(account_name, player, log_dir)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(codes)
+            total += len(codes)
+    return total
+
+
+def main(argv=None):
+    from user_store import LazyUsers
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python dart_log.py USER_DATA_FILE", file=sys.stderr)
+        return 2
+    users = LazyUsers(argv[0])
+    darts = rebuild(users, os.path.join(os.path.dirname(os.path.abspath(argv[0])), DART_LOG_DIR))
+    users.save()
+    print(f"Rebuilt dart logs for {len(users)} accounts ({darts} darts)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""Bulk import / export of accounts, players, checkout logs and games.
+
+Usage:
+    python data_io.py export user_data.json backup.ndjson
+    python data_io.py export user_data.json players.csv --format csv --kind player
+    python data_io.py import backup.ndjson new_user_data.json
+    python data_io.py import legacy_sheets.csv new_user_data.json --format csv --kind player
+
+Files are processed one account at a time: native files are read through the
+offset index in user_store, NDJSON/CSV input is spooled per account to a temp
+directory first. Accounts are converted in a process pool (``--workers``).
+Every imported account is validated and gets the same defaults as load_users.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from user_store import (
+    LIST_ITEM_TYPES, PLAYER_STATS_DEFAULTS, apply_account_defaults, validate_account,
+    iter_account_texts, account_json, write_accounts,
+)
+
+RECORD_TYPES = ["account", "player", "checkout", "game"]
+CHECKOUT_COLUMNS = ["timestamp", "player", "score_before", "shots", "calculated_score", "result",
+                    "last_dart_was_double", "last_dart_str", "game_mode", "leg", "set"]
+CSV_COLUMNS = {
+    "account": ["username", "password"],
+    "player": ["username", "player"] + list(PLAYER_STATS_DEFAULTS) + ["avatar"],
+    "checkout": ["username"] + CHECKOUT_COLUMNS,
+    "game": ["username", "game"],
+}
+WINDOW_PER_WORKER = 4 # Accounts in flight per worker, bounds memory
+MAX_OPEN_SPOOL_FILES = 64
+
+
+# --- Records <-> Accounts ---
+def account_to_records(username, data):
+    """Splits one account into flat records (account, player, checkout, game)."""
+    account_record = {"type": "account", "username": username}
+    for key, value in data.items():
+        if key not in ("player_stats", "checkout_log", "games"):
+            account_record[key] = value
+    yield account_record
+    for player, stats in data.get("player_stats", {}).items():
+        yield dict({"type": "player", "username": username, "player": player}, **stats)
+    for entry in data.get("checkout_log", []):
+        yield dict({"type": "checkout", "username": username}, **entry)
+    for game in data.get("games", []):
+        yield {"type": "game", "username": username, "game": game}
+
+
+def records_to_account(records):
+    """Builds one account from its records. Returns (account, problems)."""
+    data = {}
+    problems = []
+    for record in records:
+        record = dict(record)
+        record_type = record.pop("type", None)
+        record.pop("username", None)
+        if record_type == "account":
+            data.update(record)
+        elif record_type == "player":
+            player = record.pop("player", None)
+            if not player:
+                problems.append("player record without a name")
+                continue
+            data.setdefault("player_stats", {})[player] = record
+        elif record_type == "checkout":
+            data.setdefault("checkout_log", []).append(record)
+        elif record_type == "game":
+            data.setdefault("games", []).append(record.get("game"))
+        else:
+            problems.append(f"unknown record type {record_type!r}")
+    return data, problems
+
+
+# --- CSV helpers ---
+def csv_row_to_record(kind, row):
+    """Turns a CSV row into a record, converting the columns that aren't plain strings."""
+    record = {"type": kind}
+    for key, value in row.items():
+        if value is None or value == "":
+            continue # Missing cells fall back to the load defaults
+        if kind == "player" and key in PLAYER_STATS_DEFAULTS:
+            if isinstance(PLAYER_STATS_DEFAULTS[key], list):
+                value = value.split()
+                if LIST_ITEM_TYPES.get(key) is int:
+                    try:
+                        value = [int(item) for item in value]
+                    except ValueError:
+                        pass # Left as strings so validation reports it
+            elif isinstance(PLAYER_STATS_DEFAULTS[key], dict):
+                value = json.loads(value)
+            else:
+                try:
+                    value = int(value)
+                except ValueError:
+                    pass # Left as a string so validation reports it
+        elif kind == "checkout" and key in ("score_before", "calculated_score", "game_mode", "leg", "set"):
+            try:
+                value = int(value)
+            except ValueError:
+                pass
+        elif kind == "checkout" and key == "shots":
+            value = value.split()
+        elif kind == "checkout" and key == "last_dart_was_double":
+            value = value.lower() == "true"
+        elif kind == "game" and key == "game":
+            value = json.loads(value)
+        record[key] = value
+    return record
+
+
+def record_to_csv_row(kind, record):
+    """Flattens a record into a CSV row for ``kind``."""
+    row = {}
+    for key in CSV_COLUMNS[kind]:
+        value = record.get(key, "")
+        if isinstance(value, list) and kind != "game":
+            value = " ".join(map(str, value))
+        elif isinstance(value, dict) or (kind == "game" and key == "game"):
+            value = json.dumps(value)
+        elif value is None:
+            value = ""
+        row[key] = value
+    return row
+
+
+# --- Reading input ---
+def iter_input_records(path, file_format, kind=None):
+    """Streams records from an NDJSON or CSV file, one line at a time."""
+    with open(path, newline="") as f:
+        if file_format == "ndjson":
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"line {line_number}: invalid JSON ({e}), skipped", file=sys.stderr)
+                    continue
+                if not isinstance(record, dict) or not record.get("username"):
+                    print(f"line {line_number}: record without username, skipped", file=sys.stderr)
+                    continue
+                yield record
+        else:
+            for line_number, row in enumerate(csv.DictReader(f), 2):
+                if not row.get("username"):
+                    print(f"line {line_number}: row without username, skipped", file=sys.stderr)
+                    continue
+                try:
+                    yield csv_row_to_record(kind, row)
+                except json.JSONDecodeError as e:
+                    print(f"line {line_number}: invalid JSON cell ({e}), skipped", file=sys.stderr)
+
+
+def spool_records(records, spool_dir):
+    """Writes records to one NDJSON file per account. Returns usernames in first-seen order."""
+    usernames = {}
+    open_files = {} # Small pool of append handles, oldest closed first
+    try:
+        for record in records:
+            username = record["username"]
+            if username not in usernames:
+                usernames[username] = os.path.join(spool_dir, hashlib.sha1(username.encode()).hexdigest() + ".ndjson")
+            f = open_files.pop(username, None)
+            if f is None:
+                if len(open_files) >= MAX_OPEN_SPOOL_FILES:
+                    oldest = next(iter(open_files))
+                    open_files.pop(oldest).close()
+                f = open(usernames[username], "a")
+            open_files[username] = f # Re-insert as most recently used
+            f.write(json.dumps(record) + "\n")
+    finally:
+        for f in open_files.values():
+            f.close()
+    return usernames
+
+
+# --- Workers (run in the process pool) ---
+def build_account_from_spool(job):
+    """Worker: reads one account's spool file and returns (username, account_text, problems)."""
+    username, spool_path = job
+    with open(spool_path) as f:
+        data, problems = records_to_account(json.loads(line) for line in f)
+    return finish_account(username, data, problems)
+
+
+def build_account_from_native(job):
+    """Worker: validates one account from a native file and returns (username, account_text, problems)."""
+    username, account_text = job
+    return finish_account(username, json.loads(account_text), [])
+
+
+def finish_account(username, data, problems):
+    """Validates an account and applies the load defaults. Invalid accounts come back without text."""
+    problems = problems + validate_account(data)
+    if problems:
+        return username, None, problems
+    apply_account_defaults(data)
+    return username, account_json(username, data), []
+
+
+def export_account(job):
+    """Worker: turns one native account into output lines (NDJSON) or CSV rows."""
+    username, account_text, file_format, kinds = job
+    data = json.loads(account_text)
+    out = []
+    for record in account_to_records(username, data):
+        if record["type"] not in kinds:
+            continue
+        if file_format == "ndjson":
+            out.append(json.dumps(record))
+        else:
+            out.append(record_to_csv_row(record["type"], record))
+    return out
+
+
+def run_jobs(worker, jobs, workers):
+    """Maps ``worker`` over ``jobs`` in order, keeping only a small window of accounts in flight."""
+    if workers <= 1:
+        for job in jobs:
+            yield worker(job)
+        return
+    window = workers * WINDOW_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for job in jobs:
+            pending.append(pool.submit(worker, job))
+            if len(pending) >= window:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+# --- Commands ---
+def export_data(source, target, file_format="ndjson", kind=None, workers=1):
+    """Exports a native user data file to NDJSON or CSV. Returns the number of records written."""
+    kinds = [kind] if kind else RECORD_TYPES
+    if file_format == "csv" and len(kinds) != 1:
+        raise ValueError("CSV export needs --kind (account, player, checkout or game)")
+    if file_format == "native":
+        shutil.copyfile(source, target)
+        return 0
+    jobs = ((username, text, file_format, kinds) for username, text in iter_account_texts(source))
+    count = 0
+    with open(target, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS[kinds[0]]) if file_format == "csv" else None
+        if writer:
+            writer.writeheader()
+        for lines in run_jobs(export_account, jobs, workers):
+            for line in lines:
+                if writer:
+                    writer.writerow(line)
+                else:
+                    f.write(line + "\n")
+            count += len(lines)
+    return count
+
+
+def import_data(source, target, file_format="ndjson", kind=None, workers=1):
+    """Imports NDJSON, CSV or native data into a new native file. Returns (accounts written, accounts rejected)."""
+    if file_format == "csv" and kind not in CSV_COLUMNS:
+        raise ValueError("CSV import needs --kind (account, player, checkout or game)")
+    spool_dir = None
+    try:
+        if file_format == "native":
+            worker, jobs = build_account_from_native, iter_account_texts(source)
+        else:
+            spool_dir = tempfile.mkdtemp(prefix="darts_import_")
+            usernames = spool_records(iter_input_records(source, file_format, kind), spool_dir)
+            worker, jobs = build_account_from_spool, iter(usernames.items())
+
+        rejected = []
+        def accepted_accounts():
+            for username, account_text, problems in run_jobs(worker, jobs, workers):
+                if problems:
+                    rejected.append(username)
+                    for problem in problems:
+                        print(f"{username}: {problem}", file=sys.stderr)
+                    continue
+                yield username, account_text
+
+        written = 0
+        def counted(accounts):
+            nonlocal written
+            for item in accounts:
+                written += 1
+                yield item
+        write_accounts(target, counted(accepted_accounts()))
+        return written, len(rejected)
+    finally:
+        if spool_dir:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import / export Darts Counter data.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("source")
+    parser.add_argument("target")
+    parser.add_argument("--format", choices=["ndjson", "csv", "native"], default="ndjson",
+                        help="format of the non-native side (default: ndjson)")
+    parser.add_argument("--kind", choices=RECORD_TYPES, help="record type for CSV files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="overwrite an existing target file")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.target) and not args.force:
+        parser.error(f"{args.target} exists, use --force to overwrite")
+    try:
+        if args.command == "export":
+            count = export_data(args.source, args.target, args.format, args.kind, args.workers)
+            print(f"Exported {count} records to {args.target}")
+        else:
+            written, rejected = import_data(args.source, args.target, args.format, args.kind, args.workers)
+            print(f"Imported {written} accounts into {args.target} ({rejected} rejected)")
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
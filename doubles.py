@@ -0,0 +1,64 @@
+"""Checkout percentage per double, counted per dart.
+
+A dart is an attempt at a double when the score before it can be finished
+with that double (``dart_engine.double_attempts``). Live scoring adds every
+visit's attempts to ``player_stats[player]["double_attempts"]`` and
+``["double_hits"]`` (two counters per double, O(1) per dart), so the checkout %
+of D16 is ``double_hits["D16"] / double_attempts["D16"]``.
+
+Counters for games played before they existed are rebuilt from the recorded
+games with
+    python doubles.py user_data.json
+Visits typed as a total are skipped: their darts are made up.
+"""
+import sys
+import time
+
+from replay import is_replayable, iter_states
+from user_store import add_double_attempts
+
+
+def rebuild_double_stats(account):
+    """Recounts every player's per-double attempts and hits from the account's games. Returns the darts counted."""
+    player_stats_all = account.get("player_stats", {})
+    for stats in player_stats_all.values():
+        stats["double_attempts"], stats["double_hits"] = {}, {}
+    darts = 0
+    for game in account.get("games", []):
+        if not is_replayable(game):
+            continue
+        typed_totals = set(game.get("entered_totals", []))
+        for turn_number, _, outcome in iter_states(game):
+            player = game["players"][game["turns"][turn_number - 1][0]]
+            if outcome is None or not outcome["advanced"] or turn_number - 1 in typed_totals or player not in player_stats_all:
+                continue
+            add_double_attempts(player_stats_all[player], outcome["double_attempts"])
+            darts += len(outcome["double_attempts"])
+    return darts
+
+
+def checkout_table_rows(stats):
+    """Rows of (double, attempts, hits, percentage) for the doubles a player has thrown at, most attempted first."""
+    attempts = stats.get("double_attempts", {})
+    hits = stats.get("double_hits", {})
+    rows = [(double, n, hits.get(double, 0), round(hits.get(double, 0) / n * 100, 1)) for double, n in attempts.items() if n]
+    return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+
+def main(argv=None):
+    from user_store import LazyUsers
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python doubles.py USER_DATA_FILE", file=sys.stderr)
+        return 2
+    users = LazyUsers(argv[0])
+    start = time.perf_counter()
+    darts = sum(rebuild_double_stats(users[username]) for username in users)
+    users.save()
+    print(f"Rebuilt double stats for {len(users)} accounts ({darts} darts at a double) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Head-to-head records between the players of an account.
+
+The index lives in ``users[account]["head_to_head"]``:
+    {"version": 1,
+     "records": {player: {opponent: {"matches", "wins", "losses", "legs_won",
+                                     "legs_lost", "sets_won", "sets_lost",
+                                     "points", "darts", "last": "WLW..."}}}}
+Every pair is stored from both sides, so the Homepage reads a record with two
+dict lookups. ``points`` / ``darts`` are the player's own scoring in games
+against the opponent (3-dart average = points / darts * 3); ``last`` holds
+the latest ``LAST_RESULTS`` results, newest last: W won, L lost, - someone
+else won a game with more players.
+
+``update_head_to_head`` is called once when a game ends (counted games are
+marked, see indexes.py). The index is rebuilt from the stored games with
+    python head_to_head.py user_data.json [--workers N]
+which replays the games in N processes.
+"""
+import argparse
+import sys
+import time
+
+from indexes import in_finish_order, index_stale, store_index, update_index
+from replay import is_replayable, iter_states
+
+HEAD_TO_HEAD_VERSION = 1
+LAST_RESULTS = 10
+RECORD_COUNTERS = ("matches", "wins", "losses", "legs_won", "legs_lost", "sets_won", "sets_lost", "points", "darts")
+
+
+def empty_head_to_head():
+    return {"version": HEAD_TO_HEAD_VERSION, "records": {}}
+
+
+def head_to_head_stale(account):
+    """Whether the account has finished games but no (current) head-to-head index yet."""
+    return index_stale(account, "head_to_head", HEAD_TO_HEAD_VERSION, is_counted)
+
+
+def is_counted(game):
+    """Finished games with a winner and at least two players."""
+    return (isinstance(game, dict) and game.get("finished") and game.get("winner") in game.get("players", [])
+            and len(game.get("players", [])) >= 2)
+
+
+# --- Per game ---
+def game_summary(game):
+    """(winner, {player: [legs, sets, points, darts]}) of one finished game.
+
+    Runs on its own so a rebuild can replay games in worker processes. Cricket
+    games have no replay; they count as one leg for the winner.
+    """
+    totals = {player: [0, 0, 0, 0] for player in game["players"]}
+    if is_replayable(game):
+        for turn_number, _, outcome in iter_states(game):
+            if outcome is None:
+                continue
+            values = totals[game["players"][game["turns"][turn_number - 1][0]]]
+            values[3] += outcome["darts"]
+            if not outcome["is_bust"]:
+                values[2] += outcome["calculated_score"]
+            if outcome["is_win"]:
+                values[0] += 1
+            if outcome["set_won"]:
+                values[1] += 1
+    else:
+        totals[game["winner"]][0] = 1
+    return game["winner"], totals
+
+
+def add_summary(index, summary):
+    winner, totals = summary
+    for player, (legs, sets, points, darts) in totals.items():
+        records = index["records"].setdefault(player, {})
+        for opponent, (opponent_legs, opponent_sets, _, _) in totals.items():
+            if opponent == player:
+                continue
+            record = records.setdefault(opponent, dict.fromkeys(RECORD_COUNTERS, 0) | {"last": ""})
+            result = "W" if player == winner else "L" if opponent == winner else "-"
+            record["matches"] += 1
+            record["wins"] += result == "W"
+            record["losses"] += result == "L"
+            record["legs_won"] += legs
+            record["legs_lost"] += opponent_legs
+            record["sets_won"] += sets
+            record["sets_lost"] += opponent_sets
+            record["points"] += points
+            record["darts"] += darts
+            record["last"] = (record["last"] + result)[-LAST_RESULTS:]
+
+
+def update_head_to_head(account, game):
+    """Adds one finished game to the account's index. Returns False if it wasn't added.
+
+    Accounts without an index are left to ``rebuild_head_to_head`` (the Homepage
+    queues it), which counts this game too.
+    """
+    return update_index(account, "head_to_head", HEAD_TO_HEAD_VERSION, is_counted,
+                        lambda index, game: add_summary(index, game_summary(game)), game)
+
+
+def rebuild_head_to_head(account, executor=None):
+    """Rebuilds the index from all stored games. Returns the number of games counted.
+
+    With an ``executor`` (e.g. a ProcessPoolExecutor) the games are replayed in
+    parallel; the results are merged in the order the games ended, as ``update_head_to_head``
+    added them, so ``last`` comes out the same.
+    """
+    games = in_finish_order(g for g in account.get("games", []) if is_counted(g))
+    summaries = executor.map(game_summary, games, chunksize=64) if executor is not None else map(game_summary, games)
+    index = empty_head_to_head()
+    for summary in summaries:
+        add_summary(index, summary)
+    return store_index(account, "head_to_head", index, games)
+
+
+# --- Reading ---
+def head_to_head_record(account, player, opponent):
+    """The record of ``player`` against ``opponent``, or None if they never met."""
+    return account.get("head_to_head", {}).get("records", {}).get(player, {}).get(opponent)
+
+
+def three_dart_average(record):
+    return round(record["points"] / record["darts"] * 3, 2) if record["darts"] else 0.0
+
+
+def main(argv=None):
+    from concurrent.futures import ProcessPoolExecutor
+    from user_store import LazyUsers
+
+    parser = argparse.ArgumentParser(description="Rebuild the head-to-head index of every account.")
+    parser.add_argument("data", help="user data file")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    users = LazyUsers(args.data)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers) as executor:
+        games = sum(rebuild_head_to_head(users[username], executor) for username in users)
+    users.save()
+    print(f"Rebuilt head-to-head records for {len(users)} accounts ({games} games) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Translation catalogs for the app.
+
+``TRANSLATIONS`` holds the built-in texts as key -> {language: text}. Extra
+languages (or overrides) can be dropped into ``locales/<language>.json`` as a
+flat key -> text object; a file is only read when that language is compiled.
+``compile_catalog`` flattens everything for one language into a plain dict,
+falling back to English and then to the key itself.
+"""
+import json
+import os
+import re
+
+FALLBACK_LANGUAGE = "en"
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+LANGUAGE_NAMES = {"en": "English", "de": "Deutsch"}
+
+# Define translation dictionary for app text
+TRANSLATIONS = {
+    "welcome": {"de": "Willkommen bei Darts Counter", "en": "Welcome to Darts Counter"},
+    "login": {"de": "Anmelden", "en": "Login"},
+    "register": {"de": "Registrieren", "en": "Register"},
+    "username": {"de": "Benutzername", "en": "Username"},
+    "password": {"de": "Passwort", "en": "Password"},
+    "start_game": {"de": "Spiel starten", "en": "Start Game"},
+    "logout": {"de": "Abmelden", "en": "Logout"},
+    "players": {"de": "Spieler", "en": "Players"},
+    "score": {"de": "Punktestand", "en": "Score"},
+    "statistics": {"de": "Statistiken", "en": "Statistics"},
+    "settings": {"de": "Einstellungen", "en": "Settings"},
+    "game": {"de": "Spiel", "en": "Game"},
+    "homepage": {"de": "Startseite", "en": "Homepage"},
+    "practice": {"de": "Training", "en": "Practice"},
+    "select_language": {"de": "Sprache wählen", "en": "Select Language"},
+    "selected_language": {"de": "Gewählte Sprache:", "en": "Selected Language:"},
+    "players_selected": {"de": "Spieler ausgewählt", "en": "Players selected"},
+    "start_game_button": {"de": "🎯 Spiel starten", "en": "🎯 Start Game"},
+    "configure_game": {"de": "Spiel konfigurieren,", "en": "Configure game,"},
+    "invalid_login": {"de": "Ungültiger Benutzername oder Passwort.", "en": "Invalid username or password."},
+    "empty_credentials": {"de": "Bitte Benutzername und Passwort eingeben.", "en": "Please enter a username and password."},
+    "user_exists": {"de": "Benutzername existiert bereits.", "en": "Username already exists."},
+    "registration_success": {"de": "Registrierung erfolgreich! Bitte anmelden.", "en": "Registration successful! Please log in."},
+    "navigation": {"de": "Navigation", "en": "Navigation"},
+    "finish_quit_game": {"de": "Spiel zuerst beenden oder abbrechen.", "en": "Finish or quit the current game first."},
+    "start_game_homepage": {"de": "Spiel auf der Startseite starten.", "en": "Start a game from the Homepage."},
+
+    # Homepage
+    "resume_match": {"de": "Spiel fortsetzen", "en": "Resume Match"},
+    "resume": {"de": "Fortsetzen", "en": "Resume"},
+    "discard": {"de": "Verwerfen", "en": "Discard"},
+    "turns": {"de": "Aufnahmen", "en": "turns"},
+    "x01_setup": {"de": "X01 Einstellungen", "en": "X01 Setup"},
+    "cricket": {"de": "Cricket", "en": "Cricket"},
+    "cricket_options": {"de": "Cricket Optionen", "en": "Cricket Options"},
+    "variant": {"de": "Variante", "en": "Variant"},
+    "standard": {"de": "Standard", "en": "Standard"},
+    "cut_throat": {"de": "Cut-Throat", "en": "Cut-Throat"},
+    "x01_options": {"de": "X01 Optionen", "en": "X01 Options"},
+    "points": {"de": "Punkte", "en": "Points"},
+    "checkout": {"de": "Check-out", "en": "Check-out"},
+    "checkin": {"de": "Check-in", "en": "Check-in"},
+    "custom": {"de": "Eigene", "en": "Custom"},
+    "custom_start_score": {"de": "Startpunkte", "en": "Start Score"},
+    "sets": {"de": "Sätze", "en": "Sets"},
+    "set_leg_rule": {"de": "Satz/Leg-Regel", "en": "Set/Leg Rule"},
+    "legs_set": {"de": "Legs pro Satz", "en": "Legs per Set"},
+
+    # Game Page
+    "game_on": {"de": "Spiel läuft", "en": "Game On"},
+    "set": {"de": "Satz", "en": "Set"},
+    "leg": {"de": "Leg", "en": "Leg"},
+    "mode": {"de": "Modus", "en": "Mode"},
+    "rule": {"de": "Regel", "en": "Rule"},
+    "enter_score_for": {"de": "Punkte eingeben für:", "en": "Enter score for:"},
+    "fast_entry": {"de": "Schnelleingabe (Darts oder Summe, Enter)", "en": "Fast entry (darts or total, Enter)"},
+    "fast_entry_help": {"de": "\"T20 T19 D12\" oder die Aufnahme als Zahl, z.B. \"140\"", "en": "\"T20 T19 D12\" or the visit total, e.g. \"140\""},
+    "dart": {"de": "Dart", "en": "Dart"},
+    "double": {"de": "Doppel", "en": "Double"},
+    "triple": {"de": "Triple", "en": "Triple"},
+    "back": {"de": "Zurück", "en": "Back"},
+    "undo": {"de": "Rückgängig", "en": "Undo"},
+    "miss": {"de": "Fehler", "en": "Miss"},
+    "remove_last": {"de": "Letzten entfernen", "en": "Remove last"},
+    "set_double": {"de": "Doppel setzen", "en": "Set Double"},
+    "set_triple": {"de": "Triple setzen", "en": "Set Triple"},
+    "undo_last_turn": {"de": "Letzten Wurf rückgängig", "en": "Undo last turn"},
+    "game_over_start_new": {"de": "Spiel vorbei. Neues Spiel starten.", "en": "Game over. Start new game."},
+    "invalid_page_state": {"de": "Ungültiger Seitenstatus.", "en": "Invalid page state."},
+    "spectator_link": {"de": "Live-Ansicht für Zuschauer", "en": "Live view for spectators"},
+
+    # Statistics Page
+    "personal_statistics": {"de": "Persönliche Statistiken", "en": "Personal Statistics"},
+    "games_played": {"de": "Gespielte Spiele", "en": "Games Played"},
+    "games_won": {"de": "Gewonnene Spiele", "en": "Games Won"},
+    "legs_won": {"de": "Gewonnene Legs", "en": "Legs Won"},
+    "sets_won": {"de": "Gewonnene Sätze", "en": "Sets Won"},
+    "win_rate": {"de": "Siegquote (%)", "en": "Win Rate (%)"},
+    "total_score": {"de": "Gesamtpunkte", "en": "Total Score"},
+    "avg_score_turn": {"de": "Ø Punkte pro Aufnahme", "en": "Avg Score per Turn"},
+    "avg_score_dart": {"de": "Ø Punkte pro Dart", "en": "Avg Score per Dart"},
+    "highest_score": {"de": "Höchste Aufnahme", "en": "Highest Score"},
+    "total_turns": {"de": "Aufnahmen gesamt", "en": "Total Turns"},
+    "darts_thrown": {"de": "Geworfene Darts", "en": "Darts Thrown"},
+    "busts": {"de": "Überworfen", "en": "Busts"},
+    "ratings": {"de": "Elo-Wertung", "en": "Ratings"},
+    "recompute_ratings": {"de": "Wertung neu berechnen", "en": "Recompute Ratings"},
+    "cricket_mpr": {"de": "Cricket Marks pro Runde", "en": "Cricket Marks per Round"},
+    "leaderboard": {"de": "Bestenliste", "en": "Leaderboard"},
+    "metric": {"de": "Kennzahl", "en": "Metric"},
+    "scope": {"de": "Bereich", "en": "Scope"},
+    "account": {"de": "Dieses Konto", "en": "This account"},
+    "global": {"de": "Alle Konten", "en": "All accounts"},
+    "three_dart_avg": {"de": "3-Dart-Durchschnitt", "en": "3-Dart Average"},
+    "checkout_pct": {"de": "Checkout-Quote (%)", "en": "Checkout %"},
+    "count_180": {"de": "180er", "en": "180s"},
+    "highest_finish": {"de": "Höchstes Finish", "en": "Highest Finish"},
+    "double_pct": {"de": "Doppelquote (%)", "en": "Double Hit Rate (%)"},
+    "checkout_doubles": {"de": "Checkout-Doppel", "en": "Checkout Doubles"},
+    "jobs": {"de": "Hintergrundaufgaben", "en": "Background jobs"},
+    "job": {"de": "Aufgabe", "en": "Job"},
+    "run_job": {"de": "Starten", "en": "Run"},
+    "maintenance": {"de": "Wartung", "en": "Maintenance"},
+    "maintenance_help": {"de": "Aufgaben laufen im Hintergrund für dieses Konto; der Fortschritt steht in der Seitenleiste.",
+                         "en": "Jobs run in the background for this account; progress is shown in the sidebar."},
+    "archive_older_than_days": {"de": "Checkout-Log-Einträge archivieren, älter als (Tage)", "en": "Archive checkout log entries older than (days)"},
+    "rebuild_double_stats": {"de": "Doppelquoten neu berechnen", "en": "Rebuild double stats"},
+    "rebuild_trends": {"de": "Formkurven neu aufbauen", "en": "Rebuild form trends"},
+    "rebuild_head_to_head": {"de": "Direktvergleiche neu aufbauen", "en": "Rebuild head-to-head records"},
+    "rebuild_dart_logs": {"de": "Dart-Logs neu aufbauen", "en": "Rebuild dart logs"},
+    "archive_checkout_log": {"de": "Checkout-Log archivieren", "en": "Archive checkout log"},
+    "migrate_accounts": {"de": "Daten migrieren", "en": "Migrate data"},
+    "job_queued": {"de": "wartet", "en": "queued"},
+    "job_running": {"de": "läuft", "en": "running"},
+    "job_done": {"de": "fertig", "en": "done"},
+    "job_failed": {"de": "fehlgeschlagen", "en": "failed"},
+    "job_cancelled": {"de": "abgebrochen", "en": "cancelled"},
+    "ratings_recomputing": {"de": "Wertungen werden im Hintergrund neu berechnet.", "en": "Ratings are being recomputed in the background."},
+    "dart_heatmap": {"de": "Treffer-Heatmap", "en": "Dart Heatmap"},
+    "player": {"de": "Spieler", "en": "Player"},
+    "darts": {"de": "Darts", "en": "Darts"},
+    "all_darts": {"de": "Alle", "en": "All"},
+    "last_darts": {"de": "Letzte 1000", "en": "Last 1000"},
+    "target": {"de": "Ziel", "en": "Target"},
+    "error_displaying_table": {"de": "Fehler beim Anzeigen der Tabelle", "en": "Error displaying table"},
+    "no_data_for_statistic": {"de": "Keine Daten für diese Statistik.", "en": "No data for this statistic."},
+    "no_player_stats_yet": {"de": "Noch keine Spielerstatistiken vorhanden.", "en": "No player stats recorded yet."},
+    "could_not_load_stats": {"de": "Statistiken konnten nicht geladen werden.", "en": "Could not load statistics."},
+    "select_statistic": {"de": "Statistik auswählen:", "en": "Select Statistic:"},
+    "stats_for_account": {"de": "Statistiken für Konto:", "en": "Stats for account:"},
+    "no_data_selected_stat": {"de": "Keine Daten für gewählte Statistik.", "en": "No data for selected statistic."},
+    "head_to_head": {"de": "Direktvergleich", "en": "Head-to-Head"},
+    "head_to_head_building": {"de": "Direktvergleiche werden im Hintergrund aufgebaut.", "en": "Head-to-head records are being built in the background."},
+    "form_trends": {"de": "Formkurve", "en": "Form Trends"},
+    "resolution": {"de": "Auflösung", "en": "Resolution"},
+    "day": {"de": "Tag", "en": "Day"},
+    "week": {"de": "Woche", "en": "Week"},
+    "season": {"de": "Saison", "en": "Season"},
+    "period": {"de": "Zeitraum", "en": "Period"},
+    "all_time": {"de": "Gesamt", "en": "All time"},
+    "last_year": {"de": "Letztes Jahr", "en": "Last year"},
+    "last_90_days": {"de": "Letzte 90 Tage", "en": "Last 90 days"},
+    "trends_building": {"de": "Formkurven werden im Hintergrund aufgebaut.", "en": "Form trends are being built in the background."},
+
+    # Practice Page
+    "drill": {"de": "Übung", "en": "Drill"},
+    "around_the_clock": {"de": "Around the Clock", "en": "Around the Clock"},
+    "bobs_27": {"de": "Bob's 27", "en": "Bob's 27"},
+    "doubles_practice": {"de": "Doppeltraining", "en": "Doubles Practice"},
+    "checkout_121": {"de": "121-Checkout-Leiter", "en": "121 Checkout Ladder"},
+    "around_the_clock_help": {"de": "Triff 1 bis 20 und dann Bull der Reihe nach; jedes Feld der Zahl zählt. Wertung: benötigte Darts.",
+                              "en": "Hit 1 to 20 and then the bull in order; any bed of the number counts. Score: darts needed."},
+    "bobs_27_help": {"de": "Start mit 27 Punkten, je drei Darts auf D1 bis D20 und Bull. Treffer zählen den Wert des Doppels, eine Runde ohne Treffer zieht ihn ab. Bei 0 ist Schluss.",
+                     "en": "Start on 27, three darts at each of D1 to D20 and the bull. Hits add the double's value, a round without a hit takes it off. It ends at 0."},
+    "doubles_practice_help": {"de": "Drei Darts auf jedes bevorzugte Doppel, dreimal reihum. Wertung: Trefferquote.",
+                              "en": "Three darts at each preferred double, three times round. Score: hit rate."},
+    "checkout_121_help": {"de": "Neun Darts, um 121 mit Double Out zu checken. Geschafft: nächstes Ziel +1, sonst -1 (nicht unter 121). Zehn Versuche; Wertung: höchster Checkout.",
+                          "en": "Nine darts to check out 121 (Double Out). Made it: next target +1, otherwise -1 (not below 121). Ten attempts; score: highest checkout."},
+    "start_practice": {"de": "Training starten", "en": "Start Practice"},
+    "end_session": {"de": "Beenden", "en": "End"},
+    "left": {"de": "Rest", "en": "Left"},
+    "hits": {"de": "Treffer", "en": "Hits"},
+    "hit_rate": {"de": "Trefferquote", "en": "Hit Rate"},
+    "best_streak": {"de": "Beste Serie", "en": "Best Streak"},
+    "practice_records": {"de": "Trainingsbestwerte", "en": "Practice Records"},
+    "sessions": {"de": "Einheiten", "en": "Sessions"},
+    "best": {"de": "Bestwert", "en": "Best"},
+
+    # Tournament Page
+    "tournament": {"de": "Turnier", "en": "Tournament"},
+    "new_tournament": {"de": "Neues Turnier", "en": "New Tournament"},
+    "create_tournament": {"de": "Turnier erstellen", "en": "Create Tournament"},
+    "name": {"de": "Name", "en": "Name"},
+    "format": {"de": "Format", "en": "Format"},
+    "round_robin": {"de": "Jeder gegen jeden", "en": "Round Robin"},
+    "league": {"de": "Liga (Hin- und Rückspiel)", "en": "League (home and away)"},
+    "single_elimination": {"de": "K.-o.-System", "en": "Single Elimination"},
+    "double_elimination": {"de": "Doppel-K.-o.", "en": "Double Elimination"},
+    "boards": {"de": "Boards", "en": "Boards"},
+    "board": {"de": "Board", "en": "Board"},
+    "board_free": {"de": "Frei", "en": "Free"},
+    "board_utilization": {"de": "Auslastung", "en": "Utilization"},
+    "play": {"de": "Spielen", "en": "Play"},
+    "in_progress": {"de": "Läuft", "en": "In progress"},
+    "matches": {"de": "Spiele", "en": "matches"},
+    "standings": {"de": "Tabelle", "en": "Standings"},
+    "upcoming_matches": {"de": "Nächste Spiele", "en": "Upcoming Matches"},
+
+    # Settings Page
+    "settings_title": {"de": "⚙️ Einstellungen & Spieler-Verwaltung", "en": "⚙️ Settings & Player Management"},
+    "manage_players_prefs": {"de": "Verwalte Spieler und Einstellungen für Konto:", "en": "Manage players and preferences for account:"},
+    "set_preferences": {"de": "🎯 Einstellungen festlegen", "en": "🎯 Set Preferences"},
+    "delete_player": {"de": "🗑️ Spieler löschen", "en": "🗑️ Delete Player"},
+    "set_preferred_double_outs": {"de": "Bevorzugte Doppel für Checkouts festlegen", "en": "Set Preferred Double Outs"},
+    "select_player_edit_prefs": {"de": "Wähle Spieler für Einstellungen:", "en": "Select Player to Edit Preferences:"},
+    "save_preferences": {"de": "Einstellungen speichern", "en": "Save Preferences"},
+    "delete_player_data": {"de": "Spielerdaten löschen", "en": "Delete Player Data"},
+    "delete_warning": {"de": "⚠️ Löschen entfernt alle Statistiken und Checkout-Logs dauerhaft!", "en": "⚠️ Deleting removes all stats and checkout logs permanently!"},
+    "no_players_added": {"de": "Noch keine Spieler hinzugefügt.", "en": "No players added yet."},
+    "player_deleted_success": {"de": "Spieler erfolgreich gelöscht.", "en": "Player deleted successfully."},
+    "confirm_deletion": {"de": "Bestätigung für Löschen von", "en": "Confirm Deletion of"},
+    "yes_delete": {"de": "✔️ Ja, Spieler löschen", "en": "✔️ Yes, DELETE Player Data"},
+    "cancel": {"de": "❌ Abbrechen", "en": "❌ Cancel"},
+    "add_players_homepage": {"de": "Spieler auf der Startseite hinzufügen.", "en": "Add players on the Homepage."},
+    "no_players_delete": {"de": "Keine Spieler zum Löschen vorhanden.", "en": "No players to delete."},
+    "language_settings": {"de": "🌐 Spracheinstellungen", "en": "🌐 Language Settings"},
+}
+
+def load_external_catalog(lang):
+    """Reads ``locales/<lang>.json`` if it exists, otherwise returns an empty dict."""
+    path = os.path.join(LOCALES_DIR, f"{lang}.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def available_languages():
+    """Languages from the built-in table plus any catalog files in ``locales/``."""
+    languages = {lang for texts in TRANSLATIONS.values() for lang in texts}
+    if os.path.isdir(LOCALES_DIR):
+        languages.update(name[:-5] for name in os.listdir(LOCALES_DIR) if name.endswith(".json"))
+    return sorted(languages, key=lambda lang: (lang != FALLBACK_LANGUAGE, lang))
+
+
+def compile_catalog(lang):
+    """Flattens all texts for one language into ``{key: text}`` with the English fallback applied."""
+    catalog = {key: texts.get(FALLBACK_LANGUAGE, key) for key, texts in TRANSLATIONS.items()}
+    if lang != FALLBACK_LANGUAGE:
+        catalog.update(load_external_catalog(FALLBACK_LANGUAGE))
+    for key, texts in TRANSLATIONS.items():
+        if lang in texts:
+            catalog[key] = texts[lang]
+    catalog.update(load_external_catalog(lang))
+    return catalog
+
+
+# --- Missing key detection ---
+_T_CALL_RE = re.compile(r"""\bt\(\s*["']([A-Za-z0-9_]+)["']\s*\)""")
+
+
+def find_used_keys(source_path):
+    """Keys passed as literals to ``t(...)`` in a source file."""
+    with open(source_path, encoding="utf-8") as f:
+        return set(_T_CALL_RE.findall(f.read()))
+
+
+def find_missing_translations(used_keys, languages):
+    """Returns ``{language: [keys]}`` for used keys without a text in that language."""
+    missing = {}
+    for lang in languages:
+        catalog_keys = set(load_external_catalog(lang))
+        missing_keys = sorted(key for key in used_keys
+                              if lang not in TRANSLATIONS.get(key, {}) and key not in catalog_keys)
+        if missing_keys:
+            missing[lang] = missing_keys
+    return missing
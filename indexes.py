@@ -0,0 +1,74 @@
+"""Bookkeeping for the per-account indexes built from the stored games.
+
+Ratings, form trends and head-to-head records each add a game once, when it
+ends. Instead of every index keeping a list of the game ids it has counted
+(which grows with the history and is rewritten on every save), the game
+record itself notes the indexes it was added to:
+    game["counted_in"] = ["ratings", "trends", ...]
+so "already counted?" is one short list lookup, however many games there are.
+
+Trends and head-to-head share the rest of the scaffold too: an index lives in
+``account[name]`` with a ``"version"``, is added to with ``update_index`` when
+a game ends and rebuilt from all games (by a background job) when it is
+missing or has an older version.
+
+Games are added as they end, which is not the order they started in once
+several boards play at the same time, so ``finish_game`` stamps the end
+time and rebuilds replay the games in that order (``in_finish_order``).
+"""
+import datetime
+
+COUNTED_KEY = "counted_in"
+
+
+def finish_game(game, winner):
+    """Marks a game record as finished; ``ended`` has milliseconds so games on other boards sort correctly."""
+    game["finished"] = True
+    game["winner"] = winner
+    game["ended"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def in_finish_order(games):
+    """Games sorted by when they ended; older records without ``ended`` count from their start."""
+    return sorted(games, key=lambda game: game.get("ended") or game.get("started") or "")
+
+
+def counted_in(game, name):
+    """Whether ``game`` was already added to the index ``name``."""
+    return name in game.get(COUNTED_KEY, ())
+
+
+def mark_counted(game, name):
+    if not counted_in(game, name):
+        game.setdefault(COUNTED_KEY, []).append(name)
+
+
+def index_stale(account, name, version, counts):
+    """Whether the account has games ``counts`` accepts but no index ``name`` of the current version."""
+    index = account.get(name)
+    if index is not None:
+        return index.get("version") != version
+    return any(counts(g) for g in account.get("games", []))
+
+
+def update_index(account, name, version, counts, add, game):
+    """Adds one finished game with ``add(index, game)``. Returns False if it wasn't added.
+
+    Accounts without a current index are left to the rebuild, which counts
+    this game too.
+    """
+    index = account.get(name)
+    if index is None or index.get("version") != version or not counts(game) or counted_in(game, name):
+        return False
+    index.pop("games", None) # Id list kept by older versions
+    add(index, game)
+    mark_counted(game, name)
+    return True
+
+
+def store_index(account, name, index, games):
+    """Puts a rebuilt index into the account and marks the games it counted. Returns their number."""
+    for game in games:
+        mark_counted(game, name)
+    account[name] = index
+    return len(games)
@@ -0,0 +1,389 @@
+"""Background jobs: maintenance and analytics off the Streamlit script thread.
+
+``JobManager`` runs CPU-bound jobs (recomputes) in worker processes, at most
+``cpu_workers`` at a time, and I/O-bound ones (log files, archiving,
+rewrites) in a thread pool, so a long recompute never holds up a rerun of a
+live match. Jobs are kept in
+``jobs.json`` next to the user data: what is queued survives a restart, and
+every worker process reports progress and sees cancellation through it.
+
+A job walks the accounts in small batches. Each batch is read fresh, updated
+and saved with ``LazyUsers.save(only_if_unchanged=True)``. If a live session
+saved in between, the batch is redone, so a job never overwrites a turn.
+
+Several server processes can share one ``jobs.json``. Each active job has an
+owner (the manager that runs it) that refreshes a heartbeat every
+``HEARTBEAT_INTERVAL``; a manager only takes over jobs whose owner stopped,
+and a runner whose job was taken over stops at its next progress report.
+
+Run a job in the foreground (e.g. from cron) with
+    python jobs.py user_data.json recompute_ratings
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from user_store import LazyUsers, file_lock
+
+JOBS_FILE = "jobs.json"
+PROGRESS_INTERVAL = 0.5 # Seconds between progress writes (and cancel checks) of a running job
+ACCOUNTS_PER_SAVE = 20
+SAVE_RETRIES = 5 # Attempts per batch when live sessions keep saving
+KEEP_FINISHED = 20 # Finished jobs kept in the file for the sidebar
+ACTIVE = ("queued", "running")
+HEARTBEAT_INTERVAL = 5 # Seconds between heartbeats of a manager's active jobs
+OWNER_TIMEOUT = 30 # Seconds without a heartbeat after which a job's owner counts as gone
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLost(Exception):
+    """The job was taken over by another manager (or removed); the runner stops without touching it."""
+
+
+# --- Job store (shared by the app and the workers) ---
+def read_jobs(jobs_path):
+    try:
+        with open(jobs_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _write_jobs(jobs_path, jobs):
+    tmp_path = f"{jobs_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(jobs, f, indent=1)
+    os.replace(tmp_path, jobs_path)
+
+
+def update_job(jobs_path, job_id, owner_id=None, **changes):
+    """Changes one job's fields in the file. Returns the job as it is now, or None if it is gone.
+
+    With ``owner_id`` the job is only changed (and returned) while that manager owns it.
+    """
+    with file_lock(jobs_path):
+        jobs = read_jobs(jobs_path)
+        for job in jobs:
+            if job["id"] == job_id:
+                if owner_id is not None and (job.get("owner") or {}).get("id") != owner_id:
+                    return None
+                job.update(changes)
+                _write_jobs(jobs_path, jobs)
+                return job
+    return None
+
+
+class Progress:
+    """Handed to a job function: ``progress(done, total, message)`` reports and raises JobCancelled on request."""
+
+    def __init__(self, jobs_path, job_id, owner_id=None):
+        self.jobs_path = jobs_path
+        self.job_id = job_id
+        self.owner_id = owner_id
+        self.last_write = 0.0
+
+    def __call__(self, done, total, message=""):
+        now = time.monotonic()
+        if now - self.last_write < PROGRESS_INTERVAL and done < total:
+            return
+        self.last_write = now
+        job = update_job(self.jobs_path, self.job_id, self.owner_id, progress=[done, total], message=message)
+        if job is None:
+            raise JobLost()
+        if job.get("cancel_requested") and done < total: # Finished work is kept
+            raise JobCancelled()
+
+
+# --- Jobs ---
+def for_each_account(data_path, progress, update, account_name=None, after_save=None):
+    """Calls ``update(name, account)`` for every account (or one) and saves them without losing live turns.
+
+    Accounts are saved in batches of ``ACCOUNTS_PER_SAVE``: every save rewrites the whole file.
+    A batch may be updated several times before it is saved; ``after_save({name: update's
+    result})`` runs once per batch, with the results of the attempt that was saved.
+    """
+    names = [account_name] if account_name else list(LazyUsers(data_path))
+    for start in range(0, len(names), ACCOUNTS_PER_SAVE):
+        batch = names[start:start + ACCOUNTS_PER_SAVE]
+        progress(start, len(names), batch[0])
+        for _ in range(SAVE_RETRIES):
+            users = LazyUsers(data_path)
+            results = {name: update(name, users[name]) for name in batch if name in users}
+            if users.save(only_if_unchanged=True):
+                if after_save is not None:
+                    after_save(results)
+                break
+        else:
+            raise RuntimeError(f"{batch[0]}: the data kept changing, try again later")
+    progress(len(names), len(names))
+    return f"{len(names)} accounts"
+
+
+def recompute_ratings_job(data_path, params, progress):
+    from ratings import recompute_ratings
+
+    return for_each_account(data_path, progress, lambda name, account: recompute_ratings(account), params.get("account"))
+
+
+def rebuild_double_stats_job(data_path, params, progress):
+    from doubles import rebuild_double_stats
+
+    return for_each_account(data_path, progress, lambda name, account: rebuild_double_stats(account), params.get("account"))
+
+
+def rebuild_trends_job(data_path, params, progress):
+    from trends import rebuild_trends
+
+    return for_each_account(data_path, progress, lambda name, account: rebuild_trends(account), params.get("account"))
+
+
+def rebuild_head_to_head_job(data_path, params, progress):
+    from head_to_head import rebuild_head_to_head
+
+    return for_each_account(data_path, progress, lambda name, account: rebuild_head_to_head(account), params.get("account"))
+
+
+def rebuild_dart_logs_job(data_path, params, progress):
+    from dart_log import DART_LOG_DIR, rebuild
+
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(data_path)), DART_LOG_DIR)
+    return for_each_account(data_path, progress, lambda name, account: rebuild({name: account}, log_dir), params.get("account"))
+
+
+def archive_checkout_log_job(data_path, params, progress):
+    """Moves checkout-log entries older than ``days`` to ``archive/<account>.checkout_log.jsonl``."""
+    from urllib.parse import quote
+
+    cutoff = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - params.get("days", 365) * 86400))
+    archive_dir = os.path.join(os.path.dirname(os.path.abspath(data_path)), "archive")
+    moved = [0]
+
+    def archive(name, account):
+        old = [e for e in account.get("checkout_log", []) if e.get("timestamp", "") < cutoff]
+        account["checkout_log"] = [e for e in account.get("checkout_log", []) if e.get("timestamp", "") >= cutoff]
+        return old
+
+    def write_archive(results):
+        # Only the attempt that was saved is written, so a retried batch isn't archived twice
+        for name, old in results.items():
+            if not old:
+                continue
+            os.makedirs(archive_dir, exist_ok=True)
+            with open(os.path.join(archive_dir, quote(name, safe="") + ".checkout_log.jsonl"), "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(e) + "\n" for e in old)
+            moved[0] += len(old)
+
+    accounts = for_each_account(data_path, progress, archive, params.get("account"), write_archive)
+    return f"{accounts}, {moved[0]} entries archived"
+
+
+def migrate_accounts_job(data_path, params, progress):
+    """Rewrites every account with the current defaults filled in (LazyUsers adds them on load)."""
+    from user_store import validate_account
+
+    problems = []
+    accounts = for_each_account(data_path, progress,
+                                lambda name, account: problems.extend(f"{name}: {p}" for p in validate_account(account)),
+                                params.get("account"))
+    return f"{accounts}" + (f", problems: {'; '.join(problems[:5])}" if problems else "")
+
+
+# Job type -> (function, pool); "cpu" jobs run in worker processes, "io" jobs in threads
+JOB_TYPES = {
+    "recompute_ratings": (recompute_ratings_job, "cpu"),
+    "rebuild_double_stats": (rebuild_double_stats_job, "cpu"),
+    "rebuild_trends": (rebuild_trends_job, "cpu"),
+    "rebuild_head_to_head": (rebuild_head_to_head_job, "cpu"),
+    "rebuild_dart_logs": (rebuild_dart_logs_job, "io"),
+    "archive_checkout_log": (archive_checkout_log_job, "io"),
+    "migrate_accounts": (migrate_accounts_job, "io"),
+}
+
+
+def run_job(jobs_path, data_path, job_id, job_type, params, owner_id=None):
+    """Runs one job to the end and records how it ended (in a worker process or thread).
+
+    With ``owner_id`` nothing is run or recorded once another manager took the job over.
+    """
+    job = update_job(jobs_path, job_id, owner_id, status="running", started=time.strftime("%Y-%m-%d %H:%M:%S"))
+    if job is None:
+        return
+    if job.get("cancel_requested"):
+        update_job(jobs_path, job_id, owner_id, status="cancelled", finished=time.strftime("%Y-%m-%d %H:%M:%S"))
+        return
+    try:
+        message = JOB_TYPES[job_type][0](data_path, params, Progress(jobs_path, job_id, owner_id))
+        update_job(jobs_path, job_id, owner_id, status="done", message=message or "")
+    except JobLost:
+        return
+    except JobCancelled:
+        update_job(jobs_path, job_id, owner_id, status="cancelled")
+    except Exception as e: # Reported in the sidebar; the pool keeps running
+        update_job(jobs_path, job_id, owner_id, status="failed", message=f"{type(e).__name__}: {e}")
+    update_job(jobs_path, job_id, owner_id, finished=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def run_job_process(jobs_path, data_path, job_id, job_type, params, owner_id=None):
+    """Runs a CPU-bound job in a fresh interpreter and waits for it (called on a CPU pool thread).
+
+    A new ``python jobs.py`` process rather than multiprocessing: fork would copy
+    the threaded server's locks, and spawn re-imports the main module, which
+    under Streamlit is the app script.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--run-job", job_id, "--jobs", jobs_path, data_path]
+    if owner_id is not None:
+        command += ["--owner", owner_id]
+    child = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if child.returncode != 0:
+        error = child.stderr.strip().splitlines()[-1:] or [f"exit code {child.returncode}"]
+        update_job(jobs_path, job_id, owner_id, status="failed", message=error[0], finished=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0) # Signal 0 only checks that the process exists
+    except ProcessLookupError:
+        return False
+    except PermissionError: # Exists, but belongs to someone else
+        return True
+    return True
+
+
+def owner_gone(job, now=None):
+    """Whether nobody runs an active job any more: no owner, an exited owner process or a stale heartbeat."""
+    owner = job.get("owner")
+    if not owner:
+        return True # Queued by a version without owners
+    # os.kill(pid, 0) would terminate the process on Windows; there the heartbeat decides
+    if os.name != "nt" and owner.get("host") == socket.gethostname() and not process_alive(owner.get("pid", 0)):
+        return True
+    return (now if now is not None else time.time()) - job.get("heartbeat", 0) > OWNER_TIMEOUT
+
+
+# --- Manager (one per server process) ---
+class JobManager:
+    """Queues jobs, hands them to the pools and answers the sidebar's questions."""
+
+    def __init__(self, data_path, jobs_path=None, cpu_workers=1, io_workers=2):
+        self.data_path = os.path.abspath(data_path)
+        self.jobs_path = jobs_path or os.path.join(os.path.dirname(self.data_path), JOBS_FILE)
+        # A CPU pool thread only waits for its job process; cpu_workers bounds the processes
+        self.pools = {
+            "cpu": ThreadPoolExecutor(cpu_workers, thread_name_prefix="cpu-job"),
+            "io": ThreadPoolExecutor(io_workers, thread_name_prefix="io-job"),
+        }
+        self.futures = {}
+        self.owner = {"id": uuid.uuid4().hex[:12], "pid": os.getpid(), "host": socket.gethostname()}
+        self._stopped = threading.Event()
+        self._heartbeat()
+        threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(HEARTBEAT_INTERVAL):
+            self._heartbeat()
+
+    def _heartbeat(self):
+        """Refreshes the heartbeat of this manager's active jobs and takes over those whose owner is gone.
+
+        Jobs that were queued or running when their server stopped start again (they are all safe to rerun).
+        """
+        now = time.time()
+        adopted = []
+        with file_lock(self.jobs_path):
+            jobs = read_jobs(self.jobs_path)
+            active = [job for job in jobs if job["status"] in ACTIVE]
+            if not active:
+                return
+            for job in active:
+                if (job.get("owner") or {}).get("id") == self.owner["id"]:
+                    job["heartbeat"] = now
+                elif owner_gone(job, now):
+                    job.update(status="queued", progress=[0, 0], owner=self.owner, heartbeat=now)
+                    adopted.append(job)
+            _write_jobs(self.jobs_path, jobs)
+        for job in adopted:
+            self._dispatch(job)
+
+    def submit(self, job_type, params=None, account=None):
+        """Queues a job; ``account`` is who asked for it (the sidebar shows an account its own jobs)."""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"unknown job type {job_type!r}")
+        job = {"id": uuid.uuid4().hex[:12], "type": job_type, "params": params or {}, "account": account,
+               "status": "queued", "progress": [0, 0], "message": "", "cancel_requested": False,
+               "created": time.strftime("%Y-%m-%d %H:%M:%S"), "started": None, "finished": None,
+               "owner": self.owner, "heartbeat": time.time()}
+        with file_lock(self.jobs_path):
+            jobs = read_jobs(self.jobs_path)
+            finished = [j for j in jobs if j["status"] not in ACTIVE]
+            jobs = [j for j in jobs if j["status"] in ACTIVE or j in finished[-KEEP_FINISHED:]] + [job]
+            _write_jobs(self.jobs_path, jobs)
+        self._dispatch(job)
+        return job["id"]
+
+    def _dispatch(self, job):
+        kind = JOB_TYPES[job["type"]][1]
+        future = self.pools[kind].submit(run_job_process if kind == "cpu" else run_job,
+                                         self.jobs_path, self.data_path, job["id"], job["type"], job["params"], self.owner["id"])
+        self.futures[job["id"]] = future
+        future.add_done_callback(lambda f, job_id=job["id"]: self._done(job_id, f))
+
+    def _done(self, job_id, future):
+        self.futures.pop(job_id, None)
+        if not future.cancelled() and future.exception() is not None: # The job runner itself failed
+            update_job(self.jobs_path, job_id, self.owner["id"], status="failed", message=str(future.exception()),
+                       finished=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+    def cancel(self, job_id):
+        """Cancels a queued job at once; a running one stops at its next progress report."""
+        future = self.futures.get(job_id)
+        if future is not None and future.cancel():
+            update_job(self.jobs_path, job_id, status="cancelled", cancel_requested=True,
+                       finished=time.strftime("%Y-%m-%d %H:%M:%S"))
+        else:
+            update_job(self.jobs_path, job_id, cancel_requested=True)
+
+    def jobs(self, account=None):
+        """Jobs in the file, newest first, optionally only those an account asked for."""
+        return [j for j in reversed(read_jobs(self.jobs_path)) if account is None or j.get("account") == account]
+
+    def shutdown(self):
+        self._stopped.set()
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a maintenance job in the foreground.")
+    parser.add_argument("data", help="user data file")
+    parser.add_argument("job_type", nargs="?", choices=list(JOB_TYPES))
+    parser.add_argument("account", nargs="?", help="only this account (default: all)")
+    parser.add_argument("--run-job", help=argparse.SUPPRESS) # Internal: a JobManager's CPU job
+    parser.add_argument("--jobs", help=argparse.SUPPRESS)
+    parser.add_argument("--owner", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_job:
+        job = next((j for j in read_jobs(args.jobs) if j["id"] == args.run_job), None)
+        if job is not None:
+            run_job(args.jobs, args.data, job["id"], job["type"], job["params"], args.owner)
+        return 0
+    if args.job_type is None:
+        parser.error("job_type is required")
+    params = {"account": args.account} if args.account else {}
+    progress = lambda done, total, message="": print(f"\r{done}/{total} {message:<30}", end="", flush=True)
+    print("\n" + (JOB_TYPES[args.job_type][0](args.data, params, progress) or "done"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
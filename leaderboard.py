@@ -0,0 +1,116 @@
+"""Materialized leaderboards, kept sorted and updated per finished turn.
+
+Each metric has a ``Leaderboard``: a list of ``(-value, key)`` kept sorted with
+bisect plus a dict of every key's current value. Updating one player removes
+its old entry and inserts the new one (two binary searches and a memmove), so a
+turn never rescans the other players, and ``top(k)`` is a slice of the first
+``k`` entries.
+
+``Leaderboards`` holds one set of boards per account and one global set whose
+keys are ``(account, player)``. It is built once from the user data and then
+fed by ``update_player`` after every processed turn:
+    python leaderboard.py user_data.json three_dart_avg 10
+"""
+import sys
+import threading
+from bisect import bisect_left, insort
+
+# Metric id -> value from a player's lifetime stats (None = not ranked yet)
+METRICS = {
+    "three_dart_avg": lambda s: round(s["total_score"] / s["darts_thrown"] * 3, 2) if s.get("darts_thrown") else None,
+    "checkout_pct": lambda s: round(s["checkouts_hit"] / s["checkout_chances"] * 100, 2) if s.get("checkout_chances") else None,
+    "count_180": lambda s: s.get("count_180", 0) or None,
+    "highest_finish": lambda s: s.get("highest_finish", 0) or None,
+    "win_rate": lambda s: round(s["games_won"] / s["games_played"] * 100, 2) if s.get("games_played") else None,
+}
+
+
+class Leaderboard:
+    """One metric, sorted best first (ties by key)."""
+
+    def __init__(self):
+        self.entries = [] # (-value, key), ascending
+        self.values = {} # key -> value
+
+    def update(self, key, value):
+        """Sets a key's value; None removes it from the board."""
+        old = self.values.get(key)
+        if old == value:
+            return
+        if old is not None:
+            del self.entries[bisect_left(self.entries, (-old, key))]
+            del self.values[key]
+        if value is not None:
+            insort(self.entries, (-value, key))
+            self.values[key] = value
+
+    def top(self, k):
+        """The best ``k`` entries as [(key, value)]."""
+        return [(key, -negated) for negated, key in self.entries[:k]]
+
+    def rank(self, key):
+        """1-based position of a key, or None if it is not ranked."""
+        if key not in self.values:
+            return None
+        return bisect_left(self.entries, (-self.values[key], key)) + 1
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class Leaderboards:
+    """Per-account and global boards for every metric. Safe to share between sessions."""
+
+    def __init__(self):
+        self.accounts = {} # account -> {metric: Leaderboard}
+        self.overall = {metric: Leaderboard() for metric in METRICS}
+        self.lock = threading.Lock()
+
+    def load(self, users):
+        """Fills the boards from every account's player stats (done once per process)."""
+        for account_name in list(users):
+            account = users[account_name]
+            for player, stats in account.get("player_stats", {}).items():
+                self.update_player(account_name, player, stats)
+        return self
+
+    def update_player(self, account_name, player, stats):
+        """Re-ranks one player after their stats changed; ``stats=None`` removes them."""
+        with self.lock:
+            boards = self.accounts.setdefault(account_name, {metric: Leaderboard() for metric in METRICS})
+            for metric, value_of in METRICS.items():
+                value = value_of(stats) if stats is not None else None
+                boards[metric].update(player, value)
+                self.overall[metric].update((account_name, player), value)
+
+    def remove_account(self, account_name):
+        with self.lock:
+            for metric, board in self.accounts.pop(account_name, {}).items():
+                for player in list(board.values):
+                    self.overall[metric].update((account_name, player), None)
+
+    def top(self, metric, k=10, account_name=None):
+        """Best ``k`` of an account (players as keys) or of all accounts ((account, player) keys)."""
+        with self.lock:
+            if account_name is None:
+                return self.overall[metric].top(k)
+            board = self.accounts.get(account_name, {}).get(metric)
+            return board.top(k) if board else []
+
+
+def main(argv=None):
+    from user_store import LazyUsers
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) not in (2, 3) or argv[1] not in METRICS:
+        print(f"usage: python leaderboard.py USER_DATA_FILE {{{','.join(METRICS)}}} [K]", file=sys.stderr)
+        return 2
+    boards = Leaderboards().load(LazyUsers(argv[0]))
+    k = int(argv[2]) if len(argv) == 3 else 10
+    for position, ((account_name, player), value) in enumerate(boards.top(argv[1], k), start=1):
+        print(f"{position:>3}. {player} ({account_name}): {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
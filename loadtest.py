@@ -0,0 +1,288 @@
+"""Load test: many simulated scoring sessions against one app process.
+
+Usage:
+    python loadtest.py                          # 8 sessions, 60 darts each
+    python loadtest.py --sessions 32 --darts 120 --interval 1.5 --json
+
+Each session drives its own Streamlit AppTest in a separate process
+(AppTest keeps one runtime per interpreter): it registers an account, adds
+two players, starts a 501 match and presses keypad buttons with
+``--interval`` seconds (+-50%) of think time between presses, starting a new
+match when one ends. All sessions share one ``user_data.json`` in a temp
+directory, like the sessions of one server.
+
+Reported: latency percentiles of the keypad press that completes a dart and
+of the press that ends a turn (turn processing and save), darts per second,
+CPU seconds per dart, peak memory per session and the writes of
+user_data.json. CPU per dart over the cores of a server gives the dart rate
+one server can sustain. AppTest reruns the whole script for every press,
+where a browser only reruns the keypad fragment within a turn, so dart
+latencies are an upper bound.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import user_store
+from dart_engine import calculate_turn_total, get_checkouts
+
+try:
+    import resource # CPU and peak memory; not available on Windows
+except ImportError:
+    resource = None
+
+DART_CHOICES = ["T20", "20", "20", "5", "1", "T19", "19", "3", "T5", "0"]
+CHECKOUT_HIT_RATE = 0.4
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def latency_summary(values):
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50), "p90": percentile(values, 90), "p99": percentile(values, 99),
+        "max": max(values), "mean": statistics.fmean(values),
+    }
+
+
+# --- Simulated player ---
+def choose_dart(score, darts_left, rng):
+    """A plausible dart: the checkout route when one exists (hit 40% of the time), else scoring darts."""
+    routes = get_checkouts(score, darts_left, 1)
+    if routes and rng.random() < CHECKOUT_HIT_RATE:
+        return routes[0][0]
+    return rng.choice(DART_CHOICES)
+
+
+class Session:
+    """One browser tab: an AppTest, its account and the timings it collected."""
+
+    def __init__(self, app_path, username, darts, interval, seed):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(app_path, default_timeout=120)
+        self.username = username
+        self.darts = darts
+        self.interval = interval
+        self.rng = random.Random(seed)
+        self.dart_latencies = []
+        self.turn_latencies = []
+        self.games_started = 0
+        self.errors = []
+        self.started = self.finished = None # Wall clock of the first and last dart
+
+    def press(self, key_or_label):
+        for button in self.at.button:
+            if button.key == key_or_label or button.label == key_or_label:
+                start = time.perf_counter()
+                button.click().run()
+                elapsed = time.perf_counter() - start
+                if self.at.exception:
+                    raise RuntimeError(self.at.exception[0].value)
+                return elapsed
+        raise RuntimeError(f"no button {key_or_label!r} on page {self.at.session_state.current_page}")
+
+    def think(self):
+        time.sleep(self.interval * self.rng.uniform(0.5, 1.5))
+
+    def setup(self):
+        self.at.run()
+        self.at.text_input(key="reg_user").input(self.username)
+        self.at.text_input(key="reg_pass").input("load")
+        self.press("Register")
+        self.at.text_input(key="login_user").input(self.username)
+        self.at.text_input(key="login_pass").input("load")
+        self.press("Login")
+        for player in ("P1", "P2"):
+            self.at.text_input(key="new_player_name_input").input(player)
+            self.press("➕ Add Player")
+
+    def start_game(self):
+        self.at.multiselect(key="multiselect_players").set_value(["P1", "P2"]).run()
+        self.press("🚀 Start Game")
+        self.games_started += 1
+
+    def throw(self):
+        state = self.at.session_state
+        players = state.players_selected_for_game
+        player = players[state.current_player_index % len(players)]
+        if len(state.current_turn_shots) == 3:
+            # An invalid checkout keeps the visit open for correction; the scorer takes the last dart back
+            self.press("pad_btn_back")
+            self.think()
+        shots = list(state.current_turn_shots)
+        dart = choose_dart(state.player_scores[player] - (calculate_turn_total(shots)[0] or 0), 3 - len(shots), self.rng)
+        if dart[0] in "DT":
+            self.press(f"pad_btn_{dart[0]}")
+            self.think()
+            dart = dart[1:]
+        elapsed = self.press(f"pad_btn_{dart}")
+        self.dart_latencies.append(elapsed)
+        if not self.at.session_state.current_turn_shots: # The visit was processed and saved
+            self.turn_latencies.append(elapsed)
+
+    def run(self):
+        try:
+            self.setup()
+            self.start_game()
+            self.started = time.time()
+            for _ in range(self.darts):
+                if self.at.session_state.game_over:
+                    self.press("Play Again / New Game Setup")
+                    self.start_game()
+                self.think()
+                self.throw()
+        except Exception as e: # Reported, the other sessions keep going
+            self.errors.append(f"{self.username}: {e}")
+        self.finished = time.time()
+
+
+# --- Measurements ---
+def cpu_and_memory():
+    if resource is None:
+        return None, None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024) # MiB
+    return usage.ru_utime + usage.ru_stime, peak
+
+
+def count_saves():
+    """Wraps user_store.write_accounts to count the saves of user_data.json and their cost."""
+    io = {"saves": 0, "bytes_written": 0, "seconds": 0.0}
+    lock = threading.Lock()
+    write_accounts = user_store.write_accounts
+
+    def counted(path, accounts):
+        start = time.perf_counter()
+        write_accounts(path, accounts)
+        elapsed = time.perf_counter() - start
+        with lock:
+            io["saves"] += 1
+            io["bytes_written"] += os.path.getsize(path)
+            io["seconds"] += elapsed
+
+    user_store.write_accounts = counted
+    return io
+
+
+def run_session(username, darts, interval, seed):
+    """Runs one session in this process (the working directory holds user_data.json) and returns its results."""
+    io = count_saves()
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Dartapp.py")
+    session = Session(app_path, username, darts, interval, seed)
+    cpu_before, _ = cpu_and_memory()
+    session.run()
+    cpu_after, peak_memory = cpu_and_memory()
+    return {
+        "dart_latencies": session.dart_latencies,
+        "turn_latencies": session.turn_latencies,
+        "games_started": session.games_started,
+        "started": session.started,
+        "finished": session.finished,
+        "cpu_seconds": cpu_after - cpu_before if cpu_before is not None else None,
+        "peak_memory_mib": peak_memory,
+        "user_data": io,
+        "errors": session.errors,
+    }
+
+
+def run_load_test(sessions, darts, interval, seed=0):
+    """Starts the sessions as child processes in a temp directory and returns the combined report."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        data_path = os.path.join(work_dir, "user_data.json")
+        with open(data_path, "w") as f:
+            f.write("{}") # Sessions register into one shared file
+        children = [
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), "--session", f"load{i}", "--darts", str(darts),
+                              "--interval", str(interval), "--seed", str(seed + i)],
+                             cwd=work_dir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            for i in range(sessions)
+        ]
+        results = []
+        for i, child in enumerate(children):
+            out, _ = child.communicate()
+            try:
+                results.append(json.loads(out.strip().splitlines()[-1]))
+            except (IndexError, ValueError):
+                results.append({"errors": [f"load{i}: session process exited with {child.returncode}"]})
+        file_size = os.path.getsize(data_path)
+
+    finished = [r for r in results if r.get("started")]
+    wall = max(r["finished"] for r in finished) - min(r["started"] for r in finished) if finished else 0.0
+    dart_latencies = [x for r in finished for x in r["dart_latencies"]]
+    cpu = [r["cpu_seconds"] for r in finished if r["cpu_seconds"] is not None]
+    return {
+        "sessions": sessions,
+        "wall_seconds": wall,
+        "darts": len(dart_latencies),
+        "darts_per_second": len(dart_latencies) / wall if wall else 0.0,
+        "games_started": sum(r["games_started"] for r in finished),
+        "dart_latency": latency_summary(dart_latencies),
+        "turn_latency": latency_summary([x for r in finished for x in r["turn_latencies"]]),
+        "cpu_seconds": sum(cpu) if cpu else None,
+        "cpu_ms_per_dart": sum(cpu) / len(dart_latencies) * 1000 if cpu and dart_latencies else None,
+        "peak_memory_mib": max((r["peak_memory_mib"] for r in finished if r["peak_memory_mib"]), default=None),
+        "user_data": {
+            "saves": sum(r["user_data"]["saves"] for r in finished),
+            "bytes_written": sum(r["user_data"]["bytes_written"] for r in finished),
+            "seconds": sum(r["user_data"]["seconds"] for r in finished),
+            "file_bytes": file_size,
+        },
+        "errors": [e for r in results for e in r["errors"]],
+    }
+
+
+def print_report(report):
+    print(f"{report['sessions']} sessions, {report['darts']} darts in {report['wall_seconds']:.1f}s "
+          f"({report['darts_per_second']:.2f} darts/s, {report['games_started']} games)")
+    for name in ("dart_latency", "turn_latency"):
+        summary = report[name]
+        if summary:
+            print(f"{name.replace('_', ' ')}: p50 {summary['p50'] * 1000:.0f} ms, p90 {summary['p90'] * 1000:.0f} ms, "
+                  f"p99 {summary['p99'] * 1000:.0f} ms, max {summary['max'] * 1000:.0f} ms ({summary['count']})")
+    if report["cpu_ms_per_dart"] is not None:
+        print(f"cpu: {report['cpu_seconds']:.1f}s, {report['cpu_ms_per_dart']:.0f} ms per dart, "
+              f"peak memory {report['peak_memory_mib']:.0f} MiB per session")
+    io = report["user_data"]
+    print(f"user_data.json: {io['saves']} saves, {io['bytes_written'] / 1e6:.1f} MB written in {io['seconds']:.2f}s, "
+          f"final size {io['file_bytes'] / 1e3:.1f} kB")
+    for error in report["errors"]:
+        print(f"ERROR {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent scoring sessions and report capacity numbers.")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent simulated boards")
+    parser.add_argument("--darts", type=int, default=60, help="darts per session")
+    parser.add_argument("--interval", type=float, default=1.5, help="mean seconds between keypad presses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--session", help=argparse.SUPPRESS) # Internal: run one session as this account
+    args = parser.parse_args(argv)
+
+    if args.session:
+        print(json.dumps(run_session(args.session, args.darts, args.interval, args.seed)))
+        return 0
+    report = run_load_test(args.sessions, args.darts, args.interval, args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""Practice drills: Around the Clock, Bob's 27, doubles practice and the 121 checkout ladder.
+
+A drill is a small dict of counters; ``apply_dart`` moves it on by one dart
+and keeps the running stats (darts, hits, score, streaks) up to date in O(1).
+Nothing is saved per dart: every dart is appended to the player's practice
+stream, a file of fixed-size binary records
+(``practice_logs/<account>/<player>.prc``), and only the result of a
+finished session goes into ``player_stats[player]["practice"]``:
+    {drill: {"sessions": n, "darts": n, "hits": n, "best": score}}
+
+Stream record (little endian, ``RECORD.size`` bytes):
+    session   uint32  start time of the session (epoch seconds)
+    drill     uint8   index into DRILLS
+    target    uint16  segment code aimed at (dart_log codes) or, on the ladder, the checkout
+    dart      uint8   segment code hit
+    hit       uint8   1 if the dart counted as a hit
+"""
+import os
+import struct
+from urllib.parse import quote
+
+from dart_engine import CHECK_OUT_MODES, dart_info
+from dart_log import BULL, SINGLE_BULL, segment_code
+
+PRACTICE_LOG_DIR = "practice_logs"
+RECORD = struct.Struct("<IBHBB")
+DRILLS = ("around_the_clock", "bobs_27", "doubles_practice", "checkout_121")
+LOWER_IS_BETTER = {"around_the_clock"} # Scored in darts; the others in points, % or the highest checkout
+CLOCK_TARGETS = tuple(range(1, 21)) + (25,)
+BOBS_START = 27
+DOUBLES_ROUNDS = 3 # Times round the preferred doubles
+DARTS_PER_DOUBLE = 3
+LADDER_START = 121
+LADDER_DARTS = 9 # Three visits per checkout
+LADDER_ATTEMPTS = 10
+
+
+# --- Drills ---
+def new_drill(drill, preferred_doubles=()):
+    """State of a drill before the first dart; doubles practice goes round ``preferred_doubles``."""
+    if drill == "around_the_clock":
+        targets = [str(n) for n in CLOCK_TARGETS]
+    elif drill == "bobs_27":
+        targets = [f"D{n}" for n in CLOCK_TARGETS]
+    elif drill == "doubles_practice":
+        doubles = sorted(preferred_doubles or ["D20", "D16", "D8"], key=lambda d: int(d[1:]))
+        targets = doubles * DOUBLES_ROUNDS
+    elif drill == "checkout_121":
+        targets = []
+    else:
+        raise ValueError(f"unknown drill {drill!r}")
+    return {
+        "drill": drill,
+        "targets": targets,
+        "target_index": 0,
+        "round_darts": 0, # Darts at the current target (or ladder checkout)
+        "round_hits": 0,
+        "darts": 0,
+        "hits": 0,
+        "streak": 0,
+        "best_streak": 0,
+        "score": BOBS_START if drill == "bobs_27" else 0,
+        "checkout": LADDER_START,
+        "remaining": LADDER_START,
+        "visit_start": LADDER_START,
+        "attempts": 0,
+        "target_hits": {}, # Target -> hits, for the per-double table
+        "target_darts": {},
+        "done": False,
+    }
+
+
+def current_target(state):
+    """What to throw at next: a dart like 'D16', a number, or the checkout left on the ladder."""
+    if state["drill"] == "checkout_121":
+        return str(state["remaining"])
+    return state["targets"][state["target_index"]]
+
+
+def target_code(state):
+    """The stream's target field for the current target."""
+    if state["drill"] == "checkout_121":
+        return state["checkout"]
+    target = current_target(state)
+    return SINGLE_BULL if target == "25" else segment_code(target)
+
+
+def _is_hit(state, shot):
+    target = current_target(state)
+    if state["drill"] == "around_the_clock":
+        code = segment_code(shot)
+        if target == "25":
+            return code in (SINGLE_BULL, BULL)
+        return code not in (0, SINGLE_BULL, BULL) and (code - 1) % 20 + 1 == int(target)
+    return segment_code(shot) == segment_code(target)
+
+
+def _next_target(state):
+    state["target_index"] += 1
+    state["round_darts"] = state["round_hits"] = 0
+    if state["target_index"] >= len(state["targets"]):
+        state["done"] = True
+
+
+def _ladder_dart(state, value, kind):
+    """Scores a dart on the checkout ladder. Returns whether it finished the checkout."""
+    lowest = 2 # Double Out
+    remaining = state["remaining"] - value
+    finished = remaining == 0 and kind in CHECK_OUT_MODES["Double Out"]
+    if finished:
+        state["remaining"] = 0
+    elif remaining < lowest:
+        state["remaining"] = state["visit_start"] # Bust: the visit is thrown away and ends
+        state["round_darts"] += -state["round_darts"] % 3
+    else:
+        state["remaining"] = remaining
+    if not finished and state["round_darts"] % 3 == 0:
+        state["visit_start"] = state["remaining"]
+    return finished
+
+
+def apply_dart(state, shot):
+    """Moves a drill on by one dart. Returns the stream fields ``(target, dart code, hit)``, or None for an invalid dart."""
+    info = dart_info(shot)
+    if info is None or state["done"]:
+        return None
+    target = target_code(state)
+    state["darts"] += 1
+    state["round_darts"] += 1
+    drill = state["drill"]
+    if drill == "checkout_121":
+        hit = _ladder_dart(state, *info)
+    else:
+        hit = _is_hit(state, shot)
+    name = current_target(state) if drill != "checkout_121" else str(state["checkout"])
+    state["target_darts"][name] = state["target_darts"].get(name, 0) + 1
+    if hit:
+        state["target_hits"][name] = state["target_hits"].get(name, 0) + 1
+        state["hits"] += 1
+        state["round_hits"] += 1
+        state["streak"] += 1
+        state["best_streak"] = max(state["best_streak"], state["streak"])
+    else:
+        state["streak"] = 0
+
+    if drill == "around_the_clock":
+        state["score"] = state["darts"]
+        if hit:
+            _next_target(state)
+    elif drill == "bobs_27":
+        value = dart_info(current_target(state))[0]
+        if hit:
+            state["score"] += value
+        if state["round_darts"] == 3:
+            if not state["round_hits"]:
+                state["score"] -= value
+            if state["score"] <= 0:
+                state["done"] = True
+            else:
+                _next_target(state)
+    elif drill == "doubles_practice":
+        state["score"] = round(state["hits"] / state["darts"] * 100, 1)
+        if state["round_darts"] == DARTS_PER_DOUBLE:
+            _next_target(state)
+    else:
+        if hit or state["round_darts"] >= LADDER_DARTS:
+            state["attempts"] += 1
+            if hit:
+                state["score"] = max(state["score"], state["checkout"])
+            state["checkout"] = state["checkout"] + 1 if hit else max(LADDER_START, state["checkout"] - 1)
+            state["remaining"] = state["visit_start"] = state["checkout"]
+            state["round_darts"] = state["round_hits"] = 0
+            state["done"] = state["attempts"] >= LADDER_ATTEMPTS
+    return target, segment_code(shot), hit
+
+
+def hit_rate(state):
+    return round(state["hits"] / state["darts"] * 100, 1) if state["darts"] else 0.0
+
+
+def add_session(stats, state):
+    """Adds a drill's result to a player's practice record; the best score only counts finished drills."""
+    record = stats.setdefault("practice", {}).setdefault(state["drill"], {"sessions": 0, "darts": 0, "hits": 0, "best": None})
+    record["sessions"] += 1
+    record["darts"] += state["darts"]
+    record["hits"] += state["hits"]
+    if state["done"] and state["darts"]:
+        better = min if state["drill"] in LOWER_IS_BETTER else max
+        record["best"] = state["score"] if record["best"] is None else better(record["best"], state["score"])
+    return record
+
+
+# --- Practice stream ---
+def stream_path(account_name, player, log_dir=PRACTICE_LOG_DIR):
+    return os.path.join(log_dir, quote(account_name, safe=""), quote(player, safe="") + ".prc")
+
+
+def append_dart(path, session, drill, target, dart, hit):
+    """Appends one dart record; a single small write, no JSON is rewritten."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(RECORD.pack(session, DRILLS.index(drill), target, dart, int(hit)))
+
+
+def read_stream(path):
+    """Yields ``(session, drill, target, dart, hit)`` for every dart in a practice stream."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        data = f.read()
+    for session, drill, target, dart, hit in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+        yield session, DRILLS[drill], target, dart, bool(hit)
+
+
+def delete_stream(account_name, player, log_dir=PRACTICE_LOG_DIR):
+    path = stream_path(account_name, player, log_dir)
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,118 @@
+"""Elo ratings for the players of an account.
+
+A finished game counts as the winner beating every other player in it; with
+n players each pairing uses K / (n - 1), so a game moves the ratings about
+as much as a two-player game.
+
+Ratings live in ``users[account]["ratings"]``:
+    {"params": {...}, "current": {player: rating},
+     "history": {player: [rating * 10 after each rated game, ...]}}
+History entries are ints (tenths of a point) to keep the JSON small. Rated
+games are marked in their own record (see indexes.py).
+
+``update_ratings`` is called once when a game ends. ``recompute_ratings``
+rebuilds everything from the stored games, e.g. after changing
+``RATING_PARAMS`` (the app runs it as a background job):
+    python ratings.py user_data.json
+"""
+import sys
+import time
+
+from indexes import counted_in, in_finish_order, mark_counted
+
+RATING_PARAMS = {"initial": 1500.0, "k": 32.0, "scale": 400.0}
+RATED_MODES = {"X01"}
+
+
+def empty_ratings(params=None):
+    """Rating block for an account that has no rated games yet."""
+    return {"params": dict(params or RATING_PARAMS), "current": {}, "history": {}}
+
+
+def is_rated(game):
+    """Finished games of a rated mode with a winner and at least two players."""
+    return (isinstance(game, dict) and game.get("mode") in RATED_MODES and game.get("finished")
+            and game.get("winner") in game.get("players", []) and len(game.get("players", [])) >= 2)
+
+
+def expected_score(rating, opponent_rating, scale=RATING_PARAMS["scale"]):
+    """Probability that a player with ``rating`` beats ``opponent_rating``."""
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / scale))
+
+
+def game_deltas(ratings, winner_index, params=RATING_PARAMS):
+    """Rating changes for one game, in the order of ``ratings``."""
+    k = params["k"] / (len(ratings) - 1)
+    winner_rating = ratings[winner_index]
+    deltas = [0.0] * len(ratings)
+    for i, rating in enumerate(ratings):
+        if i == winner_index:
+            continue
+        change = k * (1.0 - expected_score(winner_rating, rating, params["scale"]))
+        deltas[winner_index] += change
+        deltas[i] -= change
+    return deltas
+
+
+# --- Incremental update ---
+def update_ratings(account, game):
+    """Applies one finished game to an account's ratings. Returns the deltas by player, or None if not rated."""
+    if not is_rated(game) or counted_in(game, "ratings"):
+        return None
+    ratings = account.setdefault("ratings", empty_ratings())
+    if ratings["params"] != RATING_PARAMS:
+        return None # Stale; the recompute job (see ratings_stale) includes this game
+    ratings.pop("rated_games", None) # Id list kept by older versions
+    params = ratings["params"]
+    players = game["players"]
+    before = [ratings["current"].get(p, params["initial"]) for p in players]
+    deltas = game_deltas(before, players.index(game["winner"]), params)
+    for player, rating, delta in zip(players, before, deltas):
+        ratings["current"][player] = rating + delta
+        ratings["history"].setdefault(player, []).append(round((rating + delta) * 10))
+    mark_counted(game, "ratings")
+    return dict(zip(players, deltas))
+
+
+# --- Batch recompute ---
+def recompute_ratings(account, params=None):
+    """Rebuilds an account's ratings from all its stored games in one pass, in the order they ended."""
+    params = dict(params or RATING_PARAMS)
+    ratings = empty_ratings(params)
+    current, history = ratings["current"], ratings["history"]
+    for game in in_finish_order(g for g in account.get("games", []) if is_rated(g)):
+        players = game["players"]
+        before = [current.get(p, params["initial"]) for p in players]
+        for player, rating, delta in zip(players, before, game_deltas(before, players.index(game["winner"]), params)):
+            current[player] = rating + delta
+            history.setdefault(player, []).append(round((rating + delta) * 10))
+        mark_counted(game, "ratings")
+    account["ratings"] = ratings
+    return ratings
+
+
+def ratings_stale(account):
+    """Whether the stored ratings were computed with other parameters than RATING_PARAMS."""
+    return "ratings" in account and account["ratings"].get("params") != RATING_PARAMS
+
+
+def main(argv=None):
+    from user_store import LazyUsers
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python ratings.py USER_DATA_FILE", file=sys.stderr)
+        return 2
+    users = LazyUsers(argv[0])
+    start = time.perf_counter()
+    games = 0
+    for username in users:
+        recompute_ratings(users[username])
+        games += sum(1 for g in users[username].get("games", []) if is_rated(g))
+    users.save()
+    print(f"Recomputed ratings for {len(users)} accounts ({games} games) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
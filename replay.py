@@ -0,0 +1,168 @@
+"""Match replay: rebuilds the state of a recorded X01 game at any turn.
+
+Games are stored in ``users[account]["games"]`` as dicts with the match
+settings, the players and every processed visit as ``[player_index, shots]``.
+Replaying runs the visits through ``dart_engine.apply_turn``, the same rules
+the Game page uses, so a replayed state matches what was shown live.
+
+The same log makes live matches resumable: every turn is saved as it is
+played, and every ``CHECKPOINT_INTERVAL`` turns the game record also keeps
+``{"turn": n, "state": ...}``, so resuming after a refresh, logout or server
+restart replays at most ``CHECKPOINT_INTERVAL - 1`` turns. Cricket games are
+resumed the same way, with ``cricket_engine`` states and turns.
+"""
+from cricket_engine import apply_turn as apply_cricket_turn, copy_state as copy_cricket_state, new_cricket_state
+from dart_engine import apply_turn, new_match_state, get_checkout_suggestion
+
+CHECKPOINT_INTERVAL = 10 # Snapshot every N turns for fast seeking
+MATCH_STATE_KEYS = tuple(new_match_state([], 0)) # What a checkpoint stores
+
+
+def is_replayable(game):
+    """Only X01 games recorded with settings and turns can be replayed (older entries are plain score lists)."""
+    return isinstance(game, dict) and "settings" in game and "turns" in game and game.get("mode", "X01") == "X01"
+
+
+def is_cricket(game):
+    return isinstance(game, dict) and game.get("mode") == "Cricket" and "turns" in game
+
+
+def initial_state(game):
+    """Returns the match state before the first turn of a recorded game."""
+    settings = game["settings"]
+    return new_match_state(
+        game["players"],
+        settings["starting_score"],
+        check_out_mode=settings.get("check_out_mode", "Double Out"),
+        set_leg_rule=settings.get("set_leg_rule", "First to"),
+        sets_to_play=settings.get("sets_to_play", 1),
+        legs_to_play=settings.get("legs_to_play", 1),
+        check_in_mode=settings.get("check_in_mode", "Straight In"),
+    )
+
+
+def snapshot_state(state):
+    """Copies a match state so later turns don't change it."""
+    snapshot = dict(state)
+    for key, value in state.items():
+        if isinstance(value, dict):
+            snapshot[key] = {k: list(v) if isinstance(v, list) else v for k, v in value.items()}
+        elif isinstance(value, list):
+            snapshot[key] = list(value)
+    return snapshot
+
+
+def iter_states(game, start_state=None, start_turn=0):
+    """Streams (turn_number, state, outcome) after every turn, starting after ``start_turn``.
+
+    The same state object is updated in place and yielded each time, which keeps
+    batch analysis cheap. Use ``snapshot_state`` to keep a copy.
+    """
+    state = snapshot_state(start_state) if start_state is not None else initial_state(game)
+    players = game["players"]
+    turns = game["turns"]
+    for turn_number in range(start_turn, len(turns)):
+        player_index, shots = turns[turn_number]
+        outcome = apply_turn(state, players[player_index], shots)
+        yield turn_number + 1, state, outcome
+
+
+def build_checkpoints(game, interval=CHECKPOINT_INTERVAL):
+    """Replays the whole game once and keeps a snapshot every ``interval`` turns.
+
+    ``checkpoints[i]`` is the state after ``i * interval`` turns.
+    """
+    state = initial_state(game)
+    checkpoints = [snapshot_state(state)]
+    for turn_number, state, _ in iter_states(game, start_state=state):
+        if turn_number % interval == 0:
+            checkpoints.append(snapshot_state(state))
+    return checkpoints
+
+
+def state_at(game, turn_number, checkpoints=None, interval=CHECKPOINT_INTERVAL):
+    """Returns the state after ``turn_number`` turns (0 = before the first dart).
+
+    With checkpoints from ``build_checkpoints`` at most ``interval - 1`` turns are replayed.
+    """
+    turn_number = max(0, min(turn_number, len(game["turns"])))
+    if checkpoints:
+        checkpoint_index = min(turn_number // interval, len(checkpoints) - 1)
+        state = snapshot_state(checkpoints[checkpoint_index])
+        start_turn = checkpoint_index * interval
+    else:
+        state = initial_state(game)
+        start_turn = 0
+    if start_turn == turn_number:
+        return state
+    for current_turn, state, _ in iter_states(game, start_state=state, start_turn=start_turn):
+        if current_turn == turn_number:
+            break
+    return state
+
+
+# --- Resuming live matches ---
+def update_checkpoint(game, state, interval=CHECKPOINT_INTERVAL):
+    """Call after recording a turn: stores the live state every ``interval`` turns."""
+    turn_number = len(game["turns"])
+    if turn_number and turn_number % interval == 0:
+        if is_cricket(game):
+            saved = copy_cricket_state(state)
+        else:
+            saved = snapshot_state({key: state[key] for key in MATCH_STATE_KEYS})
+        game["checkpoint"] = {"turn": turn_number, "state": saved}
+
+
+def drop_stale_checkpoint(game):
+    """Call after removing turns (undo): forgets a checkpoint that is ahead of the turn log."""
+    if game.get("checkpoint") and game["checkpoint"]["turn"] > len(game["turns"]):
+        del game["checkpoint"]
+
+
+def resume_state(game):
+    """Rebuilds the live state of a recorded game from its checkpoint and the turns after it."""
+    if is_cricket(game):
+        return resume_cricket_state(game)
+    saved = game.get("checkpoint")
+    if saved and saved["turn"] <= len(game["turns"]):
+        state, start_turn = snapshot_state(saved["state"]), saved["turn"]
+    else:
+        state, start_turn = initial_state(game), 0
+    for _, state, _ in iter_states(game, start_state=state, start_turn=start_turn):
+        pass
+    return state
+
+
+def resume_cricket_state(game):
+    """Cricket counterpart of ``resume_state``; returns a ``cricket_engine`` state."""
+    saved = game.get("checkpoint")
+    if saved and saved["turn"] <= len(game["turns"]):
+        state, start_turn = copy_cricket_state(saved["state"]), saved["turn"]
+    else:
+        state, start_turn = new_cricket_state(game["players"], game.get("settings", {}).get("variant", "standard")), 0
+    for player_index, shots in game["turns"][start_turn:]:
+        state["current_player_index"] = player_index
+        apply_cricket_turn(state, shots)
+    return state
+
+
+def resumable_games(account):
+    """Unfinished X01 and Cricket games of an account that were not quit, newest first.
+
+    Matches of the scoring API are left out: the API process owns them and
+    would overwrite turns added in the app.
+    """
+    return [g for g in reversed(account.get("games", []))
+            if (is_replayable(g) or is_cricket(g)) and not g.get("finished") and not g.get("abandoned")
+            and g.get("source") != "api"]
+
+
+def suggestion_at(state, preferred_doubles=None):
+    """Checkout suggestion for the player to throw next, as the scoreboard would show it."""
+    if state["game_over"]:
+        return None
+    players = state["players_selected_for_game"]
+    player = players[state["current_player_index"] % len(players)]
+    if not state.get("player_opened", {}).get(player, True):
+        return None
+    return get_checkout_suggestion(state["player_scores"][player], 3, preferred_doubles, state["check_out_mode"])
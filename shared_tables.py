@@ -0,0 +1,175 @@
+"""Checkout and setup tables in one read-only file mapped by every server process.
+
+Each Streamlit or API worker used to build ``dart_engine.checkout_table`` for
+itself. ``attach(path)`` instead maps a prebuilt file with mmap and points
+``dart_engine`` at it. The pages are shared by every process on the machine
+and survive restarts in the page cache. Lookups decode the few bytes of one
+score straight from the mapping, so no Python copy of the tables is kept.
+
+File layout (little endian):
+    header        magic b"DCKT", format, version, max score, paths per entry, out rules
+    paths         per out rule (CHECK_OUT_MODES order), score 0..max, darts left 1..3:
+                  MAX_SUGGESTIONS paths of 3 dart ids (0 = no dart)
+    setup         per score 0..max: the single to throw for a setup shot (0 = none)
+``version`` is a checksum of the rules the tables are built from. A worker
+only maps a file whose version matches its own code; otherwise it rebuilds
+the file. A rebuild writes a temp file and renames it over the old one, so
+readers see either the old or the new tables, never a mix. Mapped workers
+pick up a new file on ``refresh()``.
+
+Rebuild by hand with
+    python shared_tables.py checkout_tables.bin
+"""
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+
+import dart_engine
+from dart_engine import (
+    CHECK_OUT_MODES, DART_TABLE, LOWEST_FINISH, MAX_SUGGESTIONS, MAX_TABLE_SCORE, SETUP_LEAVES, THROWS_PRIORITY,
+    checkout_table, setup_single,
+)
+
+TABLES_FILE = "checkout_tables.bin"
+MAGIC = b"DCKT"
+FORMAT = 1
+HEADER = struct.Struct("<4sHIHBB")
+DARTS_PER_PATH = 3
+DART_NAMES = ("",) + tuple(DART_TABLE) # Dart id -> notation, 0 = no dart
+DART_IDS = {name: i for i, name in enumerate(DART_NAMES)}
+MODES = tuple(CHECK_OUT_MODES)
+ENTRY_SIZE = MAX_SUGGESTIONS * DARTS_PER_PATH
+
+
+def rules_version():
+    """Checksum of everything the tables are computed from; a change means the file must be rebuilt."""
+    rules = (FORMAT, MODES, MAX_SUGGESTIONS, MAX_TABLE_SCORE, THROWS_PRIORITY, SETUP_LEAVES,
+             sorted(DART_TABLE.items()), sorted((mode, sorted(kinds)) for mode, kinds in CHECK_OUT_MODES.items()))
+    return zlib.crc32(repr(rules).encode())
+
+
+# --- Building ---
+def encode_tables():
+    """The whole file as bytes, built from this process's rules."""
+    out = bytearray(HEADER.pack(MAGIC, FORMAT, rules_version(), MAX_TABLE_SCORE, MAX_SUGGESTIONS, len(MODES)))
+    for mode in MODES:
+        table = checkout_table(mode)
+        for score in range(MAX_TABLE_SCORE + 1):
+            paths = table.get(score, {1: (), 2: (), 3: ()})
+            for darts_left in (1, 2, 3):
+                entry = bytearray(ENTRY_SIZE)
+                for i, path in enumerate(paths[darts_left][:MAX_SUGGESTIONS]):
+                    for j, dart in enumerate(path):
+                        entry[i * DARTS_PER_PATH + j] = DART_IDS[dart]
+                out += entry
+    out += bytes(setup_single(score) or 0 for score in range(MAX_TABLE_SCORE + 1))
+    return bytes(out)
+
+
+def publish(path=TABLES_FILE):
+    """Writes a fresh tables file and swaps it in atomically."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_tables())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    checkout_table.cache_clear() # Only needed for building
+
+
+# --- Reading ---
+class SharedTables:
+    """Read-only view of a mapped tables file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.identity = os.fstat(f.fileno()).st_ino, os.fstat(f.fileno()).st_mtime_ns
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < HEADER.size:
+            raise ValueError(f"{path} is not a tables file")
+        magic, file_format, self.version, self.max_score, paths_per_entry, modes = HEADER.unpack_from(self.mm)
+        expected_size = HEADER.size + (len(MODES) * 3 * ENTRY_SIZE + 1) * (MAX_TABLE_SCORE + 1)
+        if ((magic, file_format, self.version, self.max_score, paths_per_entry, modes)
+                != (MAGIC, FORMAT, rules_version(), MAX_TABLE_SCORE, MAX_SUGGESTIONS, len(MODES)) or len(self.mm) != expected_size):
+            raise ValueError(f"{path} was built for other rules")
+        self.setup_offset = HEADER.size + len(MODES) * (self.max_score + 1) * 3 * ENTRY_SIZE
+        self.mode_index = {mode: i for i, mode in enumerate(MODES)}
+
+    def paths(self, score, check_out_mode):
+        """Same as ``dart_engine.checkout_table(check_out_mode).get(score)``."""
+        if not LOWEST_FINISH[check_out_mode] <= score <= self.max_score:
+            return None
+        offset = HEADER.size + ((self.mode_index[check_out_mode] * (self.max_score + 1) + score) * 3) * ENTRY_SIZE
+        raw = self.mm[offset:offset + 3 * ENTRY_SIZE]
+        result = {}
+        for darts_left in (1, 2, 3):
+            start = (darts_left - 1) * ENTRY_SIZE
+            result[darts_left] = tuple(
+                tuple(DART_NAMES[i] for i in raw[p:p + DARTS_PER_PATH] if i)
+                for p in range(start, start + ENTRY_SIZE, DARTS_PER_PATH) if raw[p]
+            )
+        return result
+
+    def setup(self, score):
+        """Same as ``dart_engine.setup_single(score)`` for scores up to the table's maximum."""
+        return self.mm[self.setup_offset + score] or None
+
+    def changed(self):
+        """Whether the file at ``path`` was replaced since it was mapped."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_ino, stat.st_mtime_ns) != self.identity
+
+
+def attach(path=TABLES_FILE):
+    """Maps the tables file for ``dart_engine``, building it first if it is missing or out of date.
+
+    Returns the tables, or None (with ``dart_engine`` left on its own tables) if the file can't be used.
+    """
+    from user_store import file_lock # One process builds, the others wait and map its file
+
+    try:
+        try:
+            tables = SharedTables(path)
+        except (OSError, ValueError):
+            with file_lock(path):
+                try:
+                    tables = SharedTables(path) # Built while we waited
+                except (OSError, ValueError):
+                    publish(path)
+                    tables = SharedTables(path)
+    except (OSError, ValueError) as e:
+        print(f"Shared checkout tables not used: {e}")
+        return None
+    dart_engine.shared_tables = tables
+    return tables
+
+
+def refresh(tables):
+    """Re-maps the file if it was rebuilt since ``tables`` was mapped. Returns the tables now in use."""
+    if tables is None or not tables.changed():
+        return tables
+    try:
+        tables = SharedTables(tables.path)
+    except (OSError, ValueError):
+        return dart_engine.shared_tables # Keep the mapping we have
+    dart_engine.shared_tables = tables
+    return tables
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path = argv[0] if argv else TABLES_FILE
+    publish(path)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes, version {rules_version():08x})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Exhaustive checks of the checkout suggestions against brute force.
+
+Every combination of up to three darts is enumerated once per out rule; the
+suggestions for every score from 2 to 501 and every number of darts left must
+be legal finishes, and a finish must be suggested exactly when one exists.
+The same tests run against each checkout engine (the tables built in process
+and the mmap'ed ``shared_tables`` file), so a new engine can be added to
+``ENGINES`` and proven equivalent before it is used.
+"""
+import itertools
+from functools import lru_cache
+
+import pytest
+
+import dart_engine
+import shared_tables
+from dart_engine import (
+    BOGIE_NUMBERS_SET, CHECK_OUT_MODES, DART_TABLE, LOWEST_FINISH, MAX_SUGGESTIONS, MAX_TABLE_SCORE, SETUP_LEAVES,
+    bogie_numbers, checkout_table, get_checkout_suggestion, get_checkouts, get_setup_shot, is_checkout_score,
+    score_turn, setup_single, sort_checkouts_by_preference,
+)
+
+SCORES = range(2, 502)
+DARTS = [dart for dart, (value, _) in DART_TABLE.items() if value > 0] # A miss never helps a finish
+ENGINES = ["built", "shared"]
+
+
+@lru_cache(maxsize=None)
+def fewest_darts(check_out_mode):
+    """{score: fewest darts that finish it} by trying every sequence of up to three darts."""
+    lowest = LOWEST_FINISH[check_out_mode]
+    fewest = {}
+    for count in (3, 2, 1):
+        for path in itertools.product(DARTS, repeat=count):
+            values = [DART_TABLE[dart][0] for dart in path]
+            if DART_TABLE[path[-1]][1] not in CHECK_OUT_MODES[check_out_mode]:
+                continue
+            score = sum(values)
+            # Every dart before the last must leave a score that can still be finished
+            if all(score - sum(values[:i]) >= lowest for i in range(1, count)):
+                fewest[score] = count
+    return fewest
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request, tmp_path):
+    if request.param == "shared":
+        assert shared_tables.attach(str(tmp_path / "checkout_tables.bin")) is not None
+    yield request.param
+    dart_engine.shared_tables = None
+    bogie_numbers.cache_clear()
+
+
+def assert_legal_finish(score, path, darts_left, check_out_mode):
+    assert 1 <= len(path) <= darts_left, (score, path)
+    for i in range(1, len(path)):
+        assert score_turn(score, path[:i], check_out_mode)["result"] == "OK", (score, path)
+    assert score_turn(score, path, check_out_mode)["result"] == "WIN", (score, path)
+
+
+# --- get_checkouts ---
+@pytest.mark.parametrize("check_out_mode", list(CHECK_OUT_MODES))
+def test_suggested_finishes_are_legal(engine, check_out_mode):
+    for score in SCORES:
+        for darts_left in (1, 2, 3):
+            paths = get_checkouts(score, darts_left, MAX_SUGGESTIONS, check_out_mode)
+            assert len(paths) <= MAX_SUGGESTIONS
+            assert len(set(map(tuple, paths))) == len(paths), (score, darts_left, paths)
+            for path in paths:
+                assert_legal_finish(score, path, darts_left, check_out_mode)
+
+
+@pytest.mark.parametrize("check_out_mode", list(CHECK_OUT_MODES))
+def test_a_finish_is_suggested_whenever_one_exists(engine, check_out_mode):
+    fewest = fewest_darts(check_out_mode)
+    for score in SCORES:
+        for darts_left in (1, 2, 3):
+            suggested = any(get_checkouts(score, darts, MAX_SUGGESTIONS, check_out_mode) for darts in range(1, darts_left + 1))
+            assert suggested == (fewest.get(score, 4) <= darts_left), (score, darts_left)
+        assert is_checkout_score(score, check_out_mode) == (score in fewest), score
+
+
+@pytest.mark.parametrize("check_out_mode", list(CHECK_OUT_MODES))
+def test_fewest_darts_come_first(engine, check_out_mode):
+    # With three darts left a two-dart finish is listed before any three-dart one
+    fewest = fewest_darts(check_out_mode)
+    for score, darts in fewest.items():
+        paths = get_checkouts(score, 3, MAX_SUGGESTIONS, check_out_mode)
+        if darts == 2:
+            assert len(paths[0]) == 2, (score, paths)
+        lengths = [len(path) for path in paths]
+        assert lengths == sorted(lengths), (score, paths)
+
+
+def test_max_suggestions_limits_the_list(engine):
+    for score in SCORES:
+        for limit in range(MAX_SUGGESTIONS + 1):
+            assert get_checkouts(score, 3, limit) == get_checkouts(score, 3)[:limit]
+
+
+def test_no_finishes_outside_the_table(engine):
+    for check_out_mode in CHECK_OUT_MODES:
+        for score in [-1, 0, LOWEST_FINISH[check_out_mode] - 1, MAX_TABLE_SCORE + 1, 501, 10000]:
+            assert get_checkouts(score, 3, MAX_SUGGESTIONS, check_out_mode) == []
+            assert not is_checkout_score(score, check_out_mode)
+
+
+# --- Bogie numbers ---
+@pytest.mark.parametrize("check_out_mode", list(CHECK_OUT_MODES))
+def test_bogie_numbers_match_brute_force(engine, check_out_mode):
+    fewest = fewest_darts(check_out_mode)
+    expected = set(range(min(fewest), max(fewest))) - set(fewest)
+    assert bogie_numbers(check_out_mode) == expected
+    for score in SCORES:
+        suggestion = get_checkout_suggestion(score, 3, check_out_mode=check_out_mode)
+        assert (suggestion is not None and suggestion["kind"] == "bogie") == (score in expected), score
+
+
+def test_bogie_constant_matches_double_out(engine):
+    assert BOGIE_NUMBERS_SET == bogie_numbers("Double Out") == {159, 162, 163, 165, 166, 168, 169}
+
+
+# --- get_setup_shot ---
+def test_setup_shot_leaves_the_best_reachable_double(engine):
+    for score in SCORES:
+        single = setup_single(score)
+        reachable = [leave for leave in SETUP_LEAVES if 1 <= score - leave <= 20 or score - leave == 25]
+        if reachable:
+            assert single == score - reachable[0], score
+        elif score > 2:
+            assert single in range(1, 21) and score - single >= 2, score
+        else:
+            assert single is None
+        text = get_setup_shot(score)
+        assert text == (None if single is None else f"Setup: {single} (leaves {score - single})")
+
+
+def test_setup_only_offered_without_a_one_dart_finish(engine):
+    for score in SCORES:
+        suggestion = get_checkout_suggestion(score, 1)
+        if suggestion and suggestion["kind"] == "setup":
+            assert not get_checkouts(score, 1), score
+            assert suggestion["text"] == get_setup_shot(score)
+
+
+# --- sort_checkouts_by_preference ---
+@pytest.mark.parametrize("preferred", [set(), {"D16"}, {"D20", "D10", "D25"}, dart_engine.DEFAULT_PREFERRED_DOUBLES])
+def test_preferred_doubles_move_to_the_front_stably(engine, preferred):
+    for check_out_mode in CHECK_OUT_MODES:
+        for score in SCORES:
+            paths = get_checkouts(score, 3, MAX_SUGGESTIONS, check_out_mode)
+            ordered = sort_checkouts_by_preference(paths, preferred)
+            is_preferred = [path[-1] in preferred for path in ordered]
+            assert sorted(map(tuple, ordered)) == sorted(map(tuple, paths))
+            assert is_preferred == sorted(is_preferred, reverse=True), (score, ordered)
+            # Each group keeps the table's order
+            assert [p for p in ordered if p[-1] in preferred] == [p for p in paths if p[-1] in preferred]
+            assert [p for p in ordered if p[-1] not in preferred] == [p for p in paths if p[-1] not in preferred]
+
+
+def test_empty_path_is_kept():
+    assert sort_checkouts_by_preference([[], ["D16"]], {"D16"}) == [["D16"], []]
+
+
+# --- Engines agree ---
+def test_shared_tables_match_built_tables(tmp_path):
+    path = str(tmp_path / "checkout_tables.bin")
+    shared_tables.publish(path)
+    tables = shared_tables.SharedTables(path)
+    for check_out_mode in CHECK_OUT_MODES:
+        built = checkout_table(check_out_mode)
+        for score in range(MAX_TABLE_SCORE + 2):
+            assert tables.paths(score, check_out_mode) == built.get(score), (check_out_mode, score)
+    for score in range(MAX_TABLE_SCORE + 1):
+        assert tables.setup(score) == setup_single(score), score
@@ -0,0 +1,87 @@
+"""Round trips through data_io: exported accounts come back unchanged on import.
+
+CSV files hold one record kind each, so the CSV tests compare that part of
+the account; NDJSON carries whole accounts.
+"""
+import csv
+import json
+
+import pytest
+
+from data_io import CSV_COLUMNS, export_data, import_data
+from user_store import account_json, apply_account_defaults, hash_password, write_accounts
+
+
+def sample_account():
+    return apply_account_defaults({
+        "password": hash_password("pw"),
+        "player_stats": {
+            "Anna": {
+                "games_played": 4, "games_won": 3, "total_score": 1503, "darts_thrown": 45,
+                "preferred_doubles": ["D16", "D8"],
+                "segment_hits": [2, 0, 5] + [0] * 59 + [1],
+                "double_attempts": {"D16": 7, "D8": 2},
+                "double_hits": {"D16": 3},
+                "practice": {"bobs_27": {"sessions": 2, "darts": 60, "hits": 9, "best": -14},
+                             "doubles_practice": {"sessions": 1, "darts": 27, "hits": 5, "best": 18.5},
+                             "checkout_121": {"sessions": 1, "darts": 4, "hits": 0, "best": None}},
+                "avatar": "🐻",
+            },
+            "Ben": {},
+        },
+        "checkout_log": [{
+            "timestamp": "2026-01-02 20:15:00", "player": "Anna", "score_before": 40, "shots": ["D20"],
+            "calculated_score": 40, "result": "WIN", "last_dart_was_double": True, "last_dart_str": "D20",
+            "game_mode": 501, "leg": 1, "set": 1,
+        }],
+        "games": [{"id": "1", "mode": "X01", "players": ["Anna", "Ben"], "settings": {"starting_score": 501},
+                   "turns": [[0, ["T20", "T20", "T20"]]], "finished": False, "winner": None}],
+    })
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / "user_data.json")
+    write_accounts(path, [("bob", account_json("bob", sample_account()))])
+    return path
+
+
+def round_trip(source, tmp_path, file_format, kind=None):
+    exported = str(tmp_path / f"export.{file_format}")
+    imported = str(tmp_path / "imported.json")
+    export_data(source, exported, file_format, kind)
+    assert import_data(exported, imported, file_format, kind) == (1, 0)
+    with open(imported) as f:
+        return json.load(f)["bob"]
+
+
+# --- CSV ---
+def test_player_csv_round_trip(source, tmp_path):
+    assert round_trip(source, tmp_path, "csv", "player")["player_stats"] == sample_account()["player_stats"]
+
+
+def test_checkout_csv_round_trip(source, tmp_path):
+    assert round_trip(source, tmp_path, "csv", "checkout")["checkout_log"] == sample_account()["checkout_log"]
+
+
+def test_game_csv_round_trip(source, tmp_path):
+    assert round_trip(source, tmp_path, "csv", "game")["games"] == sample_account()["games"]
+
+
+@pytest.mark.parametrize("column, cell", [
+    ("segment_hits", "1 x 3"),
+    ("double_attempts", '{"D16": "7"}'),
+    ("practice", '{"bobs_27": {"sessions": 1, "darts": "21", "hits": 3, "best": 27}}'),
+])
+def test_csv_import_rejects_bad_cells(tmp_path, column, cell):
+    path = str(tmp_path / "players.csv")
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS["player"])
+        writer.writeheader()
+        writer.writerow({"username": "bob", "player": "Anna", column: cell})
+    assert import_data(path, str(tmp_path / "imported.json"), "csv", "player") == (0, 1)
+
+
+# --- NDJSON ---
+def test_ndjson_round_trip(source, tmp_path):
+    assert round_trip(source, tmp_path, "ndjson") == sample_account()
@@ -0,0 +1,301 @@
+"""Tournaments and leagues played on several boards at once.
+
+A tournament is a plain dict stored in ``users[account]["tournaments"]``.
+Its matches are created up front; in knockout formats a match slot can point
+at the winner or loser of an earlier match and is filled in when that match
+ends. The scheduler keeps every board busy: whenever a result comes in, the
+finished board (and any other idle board) gets the next match whose players
+are known and not already playing elsewhere.
+
+Slots:
+    {"player": name}      fixed player (or BYE)
+    {"winner_of": id}     filled by the winner of match ``id``
+    {"loser_of": id}      filled by the loser of match ``id``
+
+Standings are updated per result, touching only the two players involved.
+"""
+import time
+
+FORMATS = ["round_robin", "league", "single_elimination", "double_elimination"]
+BYE = "BYE"
+POINTS_PER_WIN = 2
+
+
+# --- Fixtures ---
+def round_robin_rounds(players):
+    """Pairings per round with the circle method; a BYE pads odd player counts."""
+    players = list(players)
+    if len(players) % 2:
+        players.append(BYE)
+    rounds = []
+    for _ in range(len(players) - 1):
+        half = len(players) // 2
+        rounds.append([(players[i], players[-1 - i]) for i in range(half)])
+        players = [players[0], players[-1]] + players[1:-1] # Rotate all but the first
+    return rounds
+
+
+def _match(match_id, round_number, slots, bracket=None):
+    return {
+        "id": match_id,
+        "round": round_number,
+        "bracket": bracket,
+        "slots": slots,
+        "players": [None, None],
+        "status": "pending",
+        "board": None,
+        "winner": None,
+        "game_id": None,
+    }
+
+
+def _round_robin_matches(players, meetings):
+    matches = []
+    rounds = round_robin_rounds(players)
+    for meeting in range(meetings):
+        for round_index, pairings in enumerate(rounds):
+            for a, b in pairings:
+                if BYE in (a, b):
+                    continue
+                if meeting % 2:
+                    a, b = b, a # Return fixture: the other player throws first
+                matches.append(_match(len(matches), meeting * len(rounds) + round_index + 1,
+                                      [{"player": a}, {"player": b}]))
+    return matches
+
+
+def _seeded_slots(players):
+    """First-round slots for a bracket of the next power of two, byes going to the top seeds."""
+    size = 1
+    while size < len(players):
+        size *= 2
+    order = [0]
+    while len(order) < size:
+        # Standard seeding: 1 v N, then each half mirrored
+        order = [x for seed in order for x in (seed, 2 * len(order) - 1 - seed)]
+    seeded = list(players) + [BYE] * (size - len(players))
+    return [{"player": seeded[seed]} for seed in order]
+
+
+def _elimination_matches(players, double):
+    matches = []
+    slots = _seeded_slots(players)
+    round_number = 1
+    winners_round = []
+    for i in range(0, len(slots), 2):
+        match = _match(len(matches), round_number, [slots[i], slots[i + 1]], "W")
+        matches.append(match)
+        winners_round.append(match["id"])
+    winners_rounds = [winners_round]
+    while len(winners_round) > 1:
+        round_number += 1
+        next_round = []
+        for i in range(0, len(winners_round), 2):
+            match = _match(len(matches), round_number,
+                           [{"winner_of": winners_round[i]}, {"winner_of": winners_round[i + 1]}], "W")
+            matches.append(match)
+            next_round.append(match["id"])
+        winners_round = next_round
+        winners_rounds.append(winners_round)
+    if not double or len(winners_rounds) < 2:
+        return matches
+
+    # --- Losers bracket ---
+    # Round 1 pairs the first-round losers; afterwards rounds alternate between
+    # taking in the losers of the next winners round and halving the field.
+    losers_round = []
+    first_losers = winners_rounds[0]
+    for i in range(0, len(first_losers), 2):
+        match = _match(len(matches), 1, [{"loser_of": first_losers[i]}, {"loser_of": first_losers[i + 1]}], "L")
+        matches.append(match)
+        losers_round.append(match["id"])
+    losers_round_number = 1
+    for dropping in winners_rounds[1:]:
+        losers_round_number += 1
+        merged = []
+        # Reverse the dropped losers so rematches of the winners round are postponed
+        for survivor, dropped in zip(losers_round, reversed(dropping)):
+            match = _match(len(matches), losers_round_number, [{"winner_of": survivor}, {"loser_of": dropped}], "L")
+            matches.append(match)
+            merged.append(match["id"])
+        losers_round = merged
+        if len(losers_round) > 1:
+            losers_round_number += 1
+            halved = []
+            for i in range(0, len(losers_round), 2):
+                match = _match(len(matches), losers_round_number,
+                               [{"winner_of": losers_round[i]}, {"winner_of": losers_round[i + 1]}], "L")
+                matches.append(match)
+                halved.append(match["id"])
+            losers_round = halved
+    grand_final = _match(len(matches), round_number + 1,
+                         [{"winner_of": winners_round[0]}, {"winner_of": losers_round[0]}], "F")
+    matches.append(grand_final)
+    return matches
+
+
+def create_tournament(name, tournament_format, players, boards=1, settings=None):
+    """Builds a tournament with all its matches and puts the first matches on the boards."""
+    if tournament_format not in FORMATS:
+        raise ValueError(f"unknown format {tournament_format!r}")
+    players = list(players)
+    if len(players) < 2:
+        raise ValueError("a tournament needs at least two players")
+    if tournament_format == "round_robin":
+        matches = _round_robin_matches(players, 1)
+    elif tournament_format == "league":
+        matches = _round_robin_matches(players, 2) # Home and away
+    else:
+        matches = _elimination_matches(players, tournament_format == "double_elimination")
+    tournament = {
+        "id": str(int(time.time() * 1000)),
+        "name": name,
+        "format": tournament_format,
+        "players": players,
+        "settings": dict(settings or {}),
+        "boards": [None] * max(1, int(boards)),
+        "matches": matches,
+        "standings": {p: {"played": 0, "won": 0, "lost": 0, "points": 0} for p in players},
+        "finished": False,
+        "winner": None,
+    }
+    resolve_matches(tournament, [m["id"] for m in matches])
+    assign_boards(tournament)
+    return tournament
+
+
+# --- Slot resolution ---
+def dependents(tournament):
+    """{match id: [ids of matches whose slots wait on it]}."""
+    waiting = {}
+    for match in tournament["matches"]:
+        for slot in match["slots"]:
+            source = slot.get("winner_of", slot.get("loser_of"))
+            if source is not None:
+                waiting.setdefault(source, []).append(match["id"])
+    return waiting
+
+
+def _slot_player(tournament, slot):
+    if "player" in slot:
+        return slot["player"]
+    source = tournament["matches"][slot.get("winner_of", slot.get("loser_of"))]
+    if source["status"] not in ("done", "bye"):
+        return None
+    if "winner_of" in slot:
+        return source["winner"]
+    loser = [p for p in source["players"] if p != source["winner"]]
+    return loser[0] if loser else BYE
+
+
+def resolve_matches(tournament, match_ids):
+    """Fills in the players of pending matches and settles byes, following on to later matches."""
+    waiting = dependents(tournament)
+    queue = list(match_ids)
+    while queue:
+        match = tournament["matches"][queue.pop(0)]
+        if match["status"] != "pending":
+            continue
+        match["players"] = [_slot_player(tournament, slot) for slot in match["slots"]]
+        if None in match["players"]:
+            continue
+        if BYE in match["players"]:
+            # Walkover (or an empty match): decided without a board
+            real = [p for p in match["players"] if p != BYE]
+            match["status"] = "bye"
+            match["winner"] = real[0] if real else BYE
+            queue.extend(waiting.get(match["id"], []))
+        else:
+            match["status"] = "ready"
+
+
+# --- Board scheduling ---
+def busy_players(tournament):
+    """Players currently on a board."""
+    busy = set()
+    for match_id in tournament["boards"]:
+        if match_id is not None:
+            busy.update(tournament["matches"][match_id]["players"])
+    return busy
+
+
+def next_match(tournament, busy=None):
+    """Earliest ready match whose players are both free, or None."""
+    busy = busy_players(tournament) if busy is None else busy
+    candidates = [m for m in tournament["matches"]
+                  if m["status"] == "ready" and not busy.intersection(m["players"])]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda m: (m["round"], m["id"]))
+
+
+def assign_boards(tournament):
+    """Puts the next matches on every free board. Returns [(board index, match id)] for new assignments."""
+    assigned = []
+    busy = busy_players(tournament)
+    for board, match_id in enumerate(tournament["boards"]):
+        if match_id is not None:
+            continue
+        match = next_match(tournament, busy)
+        if match is None:
+            break
+        match["status"] = "playing"
+        match["board"] = board
+        tournament["boards"][board] = match["id"]
+        busy.update(match["players"])
+        assigned.append((board, match["id"]))
+    return assigned
+
+
+# --- Results ---
+def record_result(tournament, match_id, winner, game_id=None):
+    """Stores a match result, updates the standings and refills the boards.
+
+    Returns the new board assignments as from ``assign_boards``.
+    """
+    match = tournament["matches"][match_id]
+    if match["status"] not in ("ready", "playing"):
+        raise ValueError(f"match {match_id} is {match['status']}")
+    if winner not in match["players"]:
+        raise ValueError(f"{winner!r} is not playing match {match_id}")
+    if match["board"] is not None and tournament["boards"][match["board"]] == match_id:
+        tournament["boards"][match["board"]] = None
+    match["status"] = "done"
+    match["winner"] = winner
+    if game_id is not None:
+        match["game_id"] = game_id
+
+    for player in match["players"]:
+        row = tournament["standings"][player]
+        row["played"] += 1
+        if player == winner:
+            row["won"] += 1
+            row["points"] += POINTS_PER_WIN
+        else:
+            row["lost"] += 1
+
+    resolve_matches(tournament, dependents(tournament).get(match_id, []))
+    assigned = assign_boards(tournament)
+    if all(m["status"] in ("done", "bye") for m in tournament["matches"]):
+        tournament["finished"] = True
+        tournament["winner"] = tournament_winner(tournament)
+    return assigned
+
+
+def standings_table(tournament):
+    """Standings rows sorted by points, then wins, then fewest games played."""
+    rows = [dict(row, player=player) for player, row in tournament["standings"].items()]
+    return sorted(rows, key=lambda r: (-r["points"], -r["won"], r["played"], r["player"]))
+
+
+def tournament_winner(tournament):
+    """Final winner in knockout formats, table leader in round robin and league."""
+    if tournament["format"] in ("single_elimination", "double_elimination"):
+        return tournament["matches"][-1]["winner"]
+    return standings_table(tournament)[0]["player"]
+
+
+def board_utilization(tournament):
+    """Share of boards with a match on them right now."""
+    boards = tournament["boards"]
+    return sum(1 for match_id in boards if match_id is not None) / len(boards)
@@ -0,0 +1,197 @@
+"""Player form over time: rolling 3-dart average, checkout % and win rate.
+
+Every finished game adds its totals to buckets per day, ISO week and season
+(calendar year) in ``users[account]["trends"]``:
+    {"version": 1,
+     "buckets": {"day": {player: {"2026-10-19": [points, darts, checkout chances,
+                                                 checkouts, games, wins]}},
+                 "week": {player: {"2026-W43": [...]}}, "season": {player: {"2026": [...]}}}}
+A chart reads one player's buckets, so it costs the same for a player with
+ten games as for one with ten years of them; ``downsample`` (LTTB) then caps
+the points drawn at ``MAX_CHART_POINTS`` while keeping peaks and dips.
+
+X01 games give all three figures, cricket games only count towards the win
+rate. ``update_trends`` is called once when a game ends (counted games are
+marked, see indexes.py); the buckets for games played before it existed are
+built with
+    python trends.py user_data.json
+"""
+import datetime
+import sys
+import time
+
+from indexes import index_stale, store_index, update_index
+from replay import is_replayable, iter_states
+
+TRENDS_VERSION = 1
+RESOLUTIONS = ("day", "week", "season")
+POINTS, DARTS, CHANCES, CHECKOUTS, PLAYED, WON = range(6)
+BUCKET_SIZE = 6
+ROLLING_WINDOW = {"day": 14, "week": 4, "season": 1} # Buckets with data that make up one rolling value
+MAX_CHART_POINTS = 2000
+TREND_METRICS = {
+    # metric -> (numerator, denominator, factor)
+    "avg_score_turn": (POINTS, DARTS, 3),
+    "checkout_pct": (CHECKOUTS, CHANCES, 100),
+    "win_rate": (WON, PLAYED, 100),
+}
+
+
+def empty_trends():
+    return {"version": TRENDS_VERSION, "buckets": {resolution: {} for resolution in RESOLUTIONS}}
+
+
+def trends_stale(account):
+    """Whether the account has finished games but no (current) trend buckets yet."""
+    return index_stale(account, "trends", TRENDS_VERSION, is_summarized)
+
+
+# --- Buckets ---
+def is_summarized(game):
+    """Finished games with a winner and a start date."""
+    return isinstance(game, dict) and game.get("finished") and game.get("winner") in game.get("players", []) and game.get("started")
+
+
+def bucket_keys(day):
+    """The day, week and season keys of a ``datetime.date``."""
+    year, week, _ = day.isocalendar()
+    return {"day": day.isoformat(), "week": f"{year}-W{week:02d}", "season": str(day.year)}
+
+
+def bucket_start(resolution, key):
+    """First day of a bucket, the inverse of ``bucket_keys``."""
+    if resolution == "day":
+        return datetime.date.fromisoformat(key)
+    if resolution == "week":
+        year, week = key.split("-W")
+        return datetime.date.fromisocalendar(int(year), int(week), 1)
+    return datetime.date(int(key), 1, 1)
+
+
+def game_totals(game):
+    """Bucket values per player for one finished game."""
+    totals = {player: [0] * BUCKET_SIZE for player in game["players"]}
+    for player in game["players"]:
+        totals[player][PLAYED] = 1
+    totals[game["winner"]][WON] = 1
+    if is_replayable(game):
+        for turn_number, _, outcome in iter_states(game):
+            if outcome is None:
+                continue
+            values = totals[game["players"][game["turns"][turn_number - 1][0]]]
+            values[DARTS] += outcome["darts"]
+            if not outcome["is_bust"]:
+                values[POINTS] += outcome["calculated_score"]
+            if outcome.get("checkout_chance"):
+                values[CHANCES] += 1
+                values[CHECKOUTS] += outcome["is_win"]
+    return totals
+
+
+def add_game(trends, game):
+    keys = bucket_keys(datetime.date.fromisoformat(game["started"][:10]))
+    for player, values in game_totals(game).items():
+        for resolution in RESOLUTIONS:
+            bucket = trends["buckets"][resolution].setdefault(player, {}).setdefault(keys[resolution], [0] * BUCKET_SIZE)
+            for i, value in enumerate(values):
+                bucket[i] += value
+
+
+def update_trends(account, game):
+    """Adds one finished game to the account's buckets. Returns False if it wasn't added.
+
+    Accounts without buckets are left to ``rebuild_trends`` (the Statistics page
+    queues it), which counts this game too.
+    """
+    return update_index(account, "trends", TRENDS_VERSION, is_summarized, add_game, game)
+
+
+def rebuild_trends(account):
+    """Rebuilds all buckets from the account's stored games. Returns the number of games counted."""
+    trends = empty_trends()
+    games = [g for g in account.get("games", []) if is_summarized(g)]
+    for game in games:
+        add_game(trends, game)
+    return store_index(account, "trends", trends, games)
+
+
+# --- Series ---
+def trend_series(trends, player, metric, resolution="week", since=None):
+    """(date, value) per bucket with data: ``metric`` over the last ``ROLLING_WINDOW`` buckets.
+
+    Buckets before ``since`` (a date) still feed the rolling window of the first points shown.
+    """
+    numerator, denominator, factor = TREND_METRICS[metric]
+    buckets = (trends or {}).get("buckets", {}).get(resolution, {}).get(player, {})
+    window = ROLLING_WINDOW[resolution]
+    series = []
+    rolling_num, rolling_den = [], []
+    for key in sorted(buckets):
+        values = buckets[key]
+        if not values[denominator]:
+            continue
+        rolling_num.append(values[numerator])
+        rolling_den.append(values[denominator])
+        if len(rolling_num) > window:
+            rolling_num.pop(0)
+            rolling_den.pop(0)
+        day = bucket_start(resolution, key)
+        if since is None or day >= since:
+            series.append((day, sum(rolling_num) / sum(rolling_den) * factor))
+    return series
+
+
+def downsample(points, threshold=MAX_CHART_POINTS):
+    """Largest-Triangle-Three-Buckets: at most ``threshold`` of the (x, y) points, keeping the shape.
+
+    The first and last points are kept; from each of the buckets in between the
+    point spanning the largest triangle with the previous pick and the next
+    bucket's average.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    xs = [float(x) for x, _ in points]
+    ys = [float(y) for _, y in points]
+    every = (len(points) - 2) / (threshold - 2)
+    picked = [points[0]]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        avg_x = sum(xs[end:next_end]) / (next_end - end)
+        avg_y = sum(ys[end:next_end]) / (next_end - end)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(points[best])
+        a = best
+    picked.append(points[-1])
+    return picked
+
+
+def chart_points(trends, player, metric, resolution="week", since=None, threshold=MAX_CHART_POINTS):
+    """A downsampled ``trend_series`` ready to plot: lists of dates and values."""
+    series = trend_series(trends, player, metric, resolution, since)
+    picked = downsample([(day.toordinal(), value) for day, value in series], threshold)
+    return [datetime.date.fromordinal(x) for x, _ in picked], [value for _, value in picked]
+
+
+def main(argv=None):
+    from user_store import LazyUsers
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("usage: python trends.py USER_DATA_FILE", file=sys.stderr)
+        return 2
+    users = LazyUsers(argv[0])
+    start = time.perf_counter()
+    games = sum(rebuild_trends(users[username]) for username in users)
+    users.save()
+    print(f"Rebuilt trends for {len(users)} accounts ({games} games) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""Storage helpers for user_data.json that don't need Streamlit.
+
+The file is one JSON object keyed by account name. ``index_accounts`` finds
+where each account's value starts without parsing the file, so tools can
+read one account at a time instead of loading everything with ``json.load``.
+``LazyUsers`` uses the same index to give the app a dict that only parses
+the accounts a session actually touches.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+try:
+    import fcntl # Save lock on Unix
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt # Save lock on Windows
+except ImportError:
+    msvcrt = None
+
+from dart_engine import DEFAULT_PREFERRED_DOUBLES, is_checkout_score
+
+# --- Defaults applied on load ---
+PLAYER_STATS_DEFAULTS = {
+    "games_played": 0,
+    "games_won": 0,
+    "legs_won": 0,
+    "sets_won": 0,
+    "total_score": 0,
+    "highest_score": 0,
+    "total_turns": 0,
+    "num_busts": 0,
+    "darts_thrown": 0,
+    "preferred_doubles": [],
+    "cricket_games_played": 0,
+    "cricket_games_won": 0,
+    "cricket_marks": 0,
+    "cricket_darts": 0,
+    "count_180": 0,
+    "highest_finish": 0,
+    "checkout_chances": 0, # Visits that started on a finishable score
+    "checkouts_hit": 0,
+    "segment_hits": [], # Darts per segment code, see dart_log
+    "double_attempts": {}, # Double -> darts thrown at it on a one-dart finish
+    "double_hits": {}, # Double -> checkouts hit with it
+    "practice": {}, # Drill -> {"sessions", "darts", "hits", "best"}, see practice
+}
+LIST_ITEM_TYPES = {"preferred_doubles": str, "segment_hits": int} # Element type of the list stats
+
+
+def apply_account_defaults(data):
+    """Ensures essential keys exist for an account and each of its players."""
+    data.setdefault("password", "")
+    player_stats_dict = data.setdefault("player_stats", {})
+    data.setdefault("games", [])
+    data.setdefault("checkout_log", [])
+    for stats in player_stats_dict.values():
+        for key, default in PLAYER_STATS_DEFAULTS.items():
+            stats.setdefault(key, type(default)(default) if isinstance(default, (list, dict)) else default)
+    return data
+
+
+def hash_password(password):
+    """Hashes the password using SHA256."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def valid_practice_record(record):
+    """Counters are non-negative integers; ``best`` is a score (Bob's 27 can end below zero) or None."""
+    if not isinstance(record, dict):
+        return False
+    counters = [record.get(key) for key in ("sessions", "darts", "hits")]
+    best = record.get("best")
+    return (all(isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in counters)
+            and (best is None or isinstance(best, (int, float)) and not isinstance(best, bool)))
+
+
+def validate_account(data):
+    """Checks an account against the types of the load defaults. Returns a list of problems."""
+    problems = []
+    if not isinstance(data, dict):
+        return ["account is not an object"]
+    if not isinstance(data.get("password", ""), str):
+        problems.append("password must be a string")
+    for key in ("games", "checkout_log"):
+        if not isinstance(data.get(key, []), list):
+            problems.append(f"{key} must be a list")
+    player_stats_dict = data.get("player_stats", {})
+    if not isinstance(player_stats_dict, dict):
+        return problems + ["player_stats must be an object"]
+    for player, stats in player_stats_dict.items():
+        if not isinstance(stats, dict):
+            problems.append(f"player {player!r}: stats must be an object")
+            continue
+        for key, default in PLAYER_STATS_DEFAULTS.items():
+            if key not in stats:
+                continue
+            value = stats[key]
+            if isinstance(default, list):
+                if not isinstance(value, list):
+                    problems.append(f"player {player!r}: {key} must be a list")
+                elif LIST_ITEM_TYPES.get(key) is int:
+                    if not all(isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in value):
+                        problems.append(f"player {player!r}: {key} must be a list of non-negative integers")
+                elif not all(isinstance(item, LIST_ITEM_TYPES.get(key, object)) for item in value):
+                    problems.append(f"player {player!r}: {key} must be a list of strings")
+            elif key == "practice":
+                if not isinstance(value, dict) or not all(valid_practice_record(record) for record in value.values()):
+                    problems.append(f"player {player!r}: practice must be an object of drill records")
+            elif isinstance(default, dict):
+                if not isinstance(value, dict) or not all(isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in value.values()):
+                    problems.append(f"player {player!r}: {key} must be an object of non-negative integers")
+            elif isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                problems.append(f"player {player!r}: {key} must be a non-negative integer")
+    for entry in data.get("checkout_log", []) if isinstance(data.get("checkout_log", []), list) else []:
+        if not isinstance(entry, dict):
+            problems.append("checkout_log entries must be objects")
+            break
+    return problems
+
+
+# --- Stats from processed turns ---
+def apply_turn_stats(account, player_name, outcome, players):
+    """Adds one processed X01 visit (an ``apply_turn`` outcome) to the lifetime player stats."""
+    player_stats_all = account.get("player_stats", {})
+    # Ensure player exists in stats before updating
+    if player_name in player_stats_all:
+        stats = player_stats_all[player_name]
+        if outcome["is_bust"]:
+            stats["num_busts"] = stats.get("num_busts", 0) + 1
+        stats["total_turns"] = stats.get("total_turns", 0) + 1
+        stats["darts_thrown"] = stats.get("darts_thrown", 0) + outcome["darts"]
+        # Only add score if not a bust
+        if not outcome["is_bust"]:
+            stats["total_score"] = stats.get("total_score", 0) + outcome["calculated_score"]
+        if outcome["calculated_score"] > stats.get("highest_score", 0):
+            stats["highest_score"] = outcome["calculated_score"]
+        if outcome["calculated_score"] == 180:
+            stats["count_180"] = stats.get("count_180", 0) + 1
+        if outcome.get("checkout_chance"):
+            stats["checkout_chances"] = stats.get("checkout_chances", 0) + 1
+            if outcome["is_win"]:
+                stats["checkouts_hit"] = stats.get("checkouts_hit", 0) + 1
+        if outcome["advanced"]: # A visit kept open for correction is counted once it is final
+            add_double_attempts(stats, outcome.get("double_attempts", []))
+        if outcome["is_win"] and outcome["calculated_score"] > stats.get("highest_finish", 0):
+            stats["highest_finish"] = outcome["calculated_score"]
+        if outcome["set_won"]:
+            stats["sets_won"] = stats.get("sets_won", 0) + 1
+    # Update final game stats for all players
+    if outcome["game_won"]:
+        for p in players:
+            if p in player_stats_all:
+                stats_p = player_stats_all[p]
+                stats_p["games_played"] = stats_p.get("games_played", 0) + 1
+                if p == player_name:
+                    stats_p["games_won"] = stats_p.get("games_won", 0) + 1
+
+
+def add_double_attempts(stats, attempts, sign=1):
+    """Adds (or with ``sign=-1`` takes back) ``dart_engine.double_attempts`` results to a player's per-double counters."""
+    double_attempts = stats.setdefault("double_attempts", {})
+    double_hits = stats.setdefault("double_hits", {})
+    for double, hit in attempts:
+        double_attempts[double] = double_attempts.get(double, 0) + sign
+        if hit:
+            double_hits[double] = double_hits.get(double, 0) + sign
+
+
+def checkout_log_entry(player_name, score_before, shots_list, outcome, check_out_mode, game_mode, leg, set_number, timestamp):
+    """Checkout-log record for a visit that started on a finishable score and didn't end "OK", else None."""
+    if not is_checkout_score(score_before, check_out_mode) or outcome["result"] == "OK":
+        return None
+    return {
+        "timestamp": timestamp,
+        "player": player_name,
+        "score_before": score_before,
+        "shots": list(shots_list),
+        "calculated_score": outcome["calculated_score"],
+        "result": outcome["result"],
+        "last_dart_was_double": outcome["last_dart_double"] if outcome["result"] == "WIN" else None,
+        "last_dart_str": shots_list[-1] if shots_list else None,
+        "game_mode": game_mode,
+        "leg": leg,
+        "set": set_number,
+    }
+
+
+# --- Player profiles ---
+DEFAULT_AVATAR = "🎯"
+
+
+def player_profiles(account, players):
+    """Per-match view of what the scoreboard shows about each player, built once at match start.
+
+    ``preferred_doubles`` is a frozenset, ready for ``sort_checkouts_by_preference``;
+    ``label`` is the card heading and ``rating`` the current Elo (None if unrated).
+    """
+    player_stats_all = account.get("player_stats", {})
+    ratings = account.get("ratings", {}).get("current", {})
+    profiles = {}
+    for player in players:
+        stats = player_stats_all.get(player, {})
+        avatar = stats.get("avatar") or DEFAULT_AVATAR
+        profiles[player] = {
+            "preferred_doubles": frozenset(stats.get("preferred_doubles") or DEFAULT_PREFERRED_DOUBLES),
+            "avatar": avatar,
+            "label": f"{avatar} {player}",
+            "rating": round(ratings[player]) if player in ratings else None,
+        }
+    return profiles
+
+
+# --- Offset index over the top-level object ---
+# Strings (with escapes) and brackets are the only tokens that matter for finding
+# the top-level keys; the regex runs over an mmap so the file is never read into memory.
+_TOKEN_RE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+_WHITESPACE = b" \t\r\n"
+_index_cache = {} # path -> (file signature, index), reused across Streamlit reruns
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, used to tell whether a cached index is still valid."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def cached_index(path):
+    """Returns ``index_accounts(path)``, rescanning only when the file changed since the last call."""
+    if not os.path.exists(path):
+        return {}
+    signature = file_signature(path)
+    cached = _index_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    index = index_accounts(path)
+    _index_cache[path] = (signature, index)
+    return index
+
+
+def index_accounts(path):
+    """Returns ``{username: (start, end)}`` byte spans of every account value in the file.
+
+    Each span holds the account JSON plus trailing whitespace and separators;
+    ``read_account`` parses it.
+    """
+    index = {}
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return index
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        depth = 0
+        last_key = None
+        last_start = None
+        for match in _TOKEN_RE.finditer(mm):
+            first = mm[match.start()]
+            if first in b"{[":
+                depth += 1
+            elif first in b"}]":
+                depth -= 1
+                if depth == 0 and last_key is not None:
+                    index[last_key] = (last_start, match.start())
+            elif depth == 1:
+                # A string at depth 1 followed by ':' is an account key
+                pos = match.end()
+                while pos < size and mm[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < size and mm[pos] == ord(":"):
+                    if last_key is not None:
+                        index[last_key] = (last_start, match.start())
+                    last_key = json.loads(mm[match.start():match.end()])
+                    last_start = pos + 1
+    return index
+
+
+def read_account(path, span, mm=None):
+    """Parses one account from a span returned by ``index_accounts``."""
+    start, end = span
+    if mm is not None:
+        raw = mm[start:end]
+    else:
+        with open(path, "rb") as f:
+            f.seek(start)
+            raw = f.read(end - start)
+    text = raw.decode("utf-8").strip().rstrip(",")
+    return json.loads(text)
+
+
+def iter_accounts(path):
+    """Streams ``(username, account)`` pairs from a user data file, one account in memory at a time."""
+    index = index_accounts(path)
+    if not index:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for username, span in index.items():
+            yield username, read_account(path, span, mm)
+
+
+def iter_account_texts(path):
+    """Like ``iter_accounts`` but yields the raw JSON text so parsing can happen elsewhere."""
+    index = index_accounts(path)
+    if not index:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for username, (start, end) in index.items():
+            yield username, mm[start:end].decode("utf-8").strip().rstrip(",")
+
+
+# --- Writing ---
+def account_json(username, data):
+    """Serializes one account as it appears inside the file written by save_users (indent=4)."""
+    value = json.dumps(data, indent=4).replace("\n", "\n    ")
+    return f"    {json.dumps(username)}: {value}"
+
+
+def write_accounts(path, accounts):
+    """Writes ``(username, account_json_text)`` pairs as a user data file, replacing it atomically."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp" # Sessions save from their own threads
+    with open(tmp_path, "w") as f:
+        f.write("{")
+        first = True
+        for _, account_text in accounts:
+            f.write("\n" if first else ",\n")
+            f.write(account_text)
+            first = False
+        f.write("\n}" if not first else "}")
+        f.flush()
+        os.fsync(f.fileno()) # Live matches are saved every turn; a crash must not leave a half-written file
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock on ``<path>.lock``, shared by every process and session thread that saves ``path``."""
+    with open(f"{path}.lock", "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# --- Lazy loading ---
+class LazyUsers(MutableMapping):
+    """Dict of accounts backed by user_data.json that parses each account on first access.
+
+    Membership checks only use the offset index, so the login check and a
+    session's own account cost one account parse, not the whole file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._index = cached_index(path)
+        self._signature = file_signature(path) if os.path.exists(path) else None
+        self._loaded = {}
+        self._deleted = set()
+
+    def __contains__(self, username):
+        return username in self._loaded or (username in self._index and username not in self._deleted)
+
+    def __getitem__(self, username):
+        if username in self._loaded:
+            return self._loaded[username]
+        if username in self._deleted or username not in self._index:
+            raise KeyError(username)
+        try:
+            raw = read_account(self.path, self._index[username])
+        except ValueError:
+            # Another session replaced the file since it was indexed; the offsets are stale
+            self._index = cached_index(self.path)
+            if username not in self._index:
+                raise KeyError(username)
+            raw = read_account(self.path, self._index[username])
+        data = apply_account_defaults(raw)
+        self._loaded[username] = data
+        return data
+
+    def __setitem__(self, username, data):
+        self._loaded[username] = data
+        self._deleted.discard(username)
+
+    def __delitem__(self, username):
+        if username not in self:
+            raise KeyError(username)
+        self._loaded.pop(username, None)
+        self._deleted.add(username)
+
+    def __iter__(self):
+        for username in self._index:
+            if username not in self._deleted:
+                yield username
+        for username in self._loaded:
+            if username not in self._index:
+                yield username
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def loaded_accounts(self):
+        """Names of the accounts parsed so far."""
+        return list(self._loaded)
+
+    def save(self, only_if_unchanged=False):
+        """Writes the file back: parsed accounts are serialized, untouched ones are copied as raw text.
+
+        The read-copy-replace runs under ``file_lock`` so concurrent sessions
+        don't drop each other's accounts. With ``only_if_unchanged`` nothing is
+        written if anyone saved since this object read the file; returns
+        whether the file was written.
+        """
+        with file_lock(self.path):
+            index = self._index
+            changed = os.path.exists(self.path) and file_signature(self.path) != self._signature
+            if changed and only_if_unchanged:
+                return False
+            if changed:
+                # Someone else saved since we indexed; copy untouched accounts from the current file
+                index = cached_index(self.path)
+            write_accounts(self.path, self._accounts_to_write(index))
+            self._index = cached_index(self.path)
+            self._signature = file_signature(self.path)
+        self._deleted = set()
+        return True
+
+    def _accounts_to_write(self, index):
+        if index:
+            # The old file is closed again before write_accounts replaces it
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for username, (start, end) in index.items():
+                    if username in self._deleted:
+                        continue
+                    if username in self._loaded:
+                        yield username, account_json(username, self._loaded[username])
+                    else:
+                        raw = mm[start:end].decode("utf-8").strip().rstrip(",")
+                        yield username, f"    {json.dumps(username)}: {raw}"
+        for username, data in self._loaded.items():
+            if username not in index:
+                yield username, account_json(username, data)